@@ -0,0 +1,48 @@
+"""Request counts of the work order chunker, before and after the URL budget.
+
+Run with ``python benchmarks/bench_chunking.py`` from the repo root.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from rich.console import Console
+from rich.table import Table
+
+from labor_report.main import parameterize_wo_list
+
+ITEM_PREFIX = "contains(Item, 'labor:') and "
+LEGACY_SLICE_SIZE = 10
+
+
+def legacy_chunk_count(total: int) -> int:
+    return -(-total // LEGACY_SLICE_SIZE)
+
+
+def main() -> None:
+    table = Table(title="Job item requests per chunking strategy")
+    table.add_column("Work orders")
+    table.add_column("ID digits")
+    table.add_column("Fixed 10 per chunk")
+    table.add_column("Budgeted 'or'")
+    table.add_column("Budgeted 'in'")
+
+    for total in (1_000, 10_000):
+        for digits in (5, 8, 12):
+            first_id = 10 ** (digits - 1)
+            wo_list = list(range(first_id, first_id + total))
+
+            budgeted = parameterize_wo_list(wo_list, ITEM_PREFIX)
+            compact = parameterize_wo_list(wo_list, ITEM_PREFIX, compact=True)
+
+            table.add_row(
+                f"{total:,}", str(digits), str(legacy_chunk_count(total)),
+                str(len(budgeted)), str(len(compact)),
+            )
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
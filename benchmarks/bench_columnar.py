@@ -0,0 +1,91 @@
+"""Loop vs NumPy columnar tallies at 100k and 1M job items.
+
+Run with ``python benchmarks/bench_columnar.py`` from the repo root. Pass
+``--sizes 100000`` to skip the slow 1M run.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from rich.console import Console
+from rich.table import Table
+
+from labor_report import columnar, main
+
+TECHS = [f"Tech {n:02d}" for n in range(40)]
+
+
+def synthetic_items(count: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    names = [f"labor:{tech}" for tech in TECHS] + [
+        "Service Call: standard", "Hose", "Seal kit", "Filter", "BRAKE CLEANER",
+    ]
+    return [
+        {
+            "ActivityNo": str(rng.randrange(count // 6 + 1)),
+            "Item": rng.choice(names),
+            "Qty": rng.choice([0.25, 0.5, 1, 1.5, 2]),
+            "Amount": round(rng.uniform(0, 300), 2),
+        }
+        for _ in range(count)
+    ]
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def pplh_loop(items: list[dict]) -> dict:
+    items_by_work_order = main.group_by_work_order(items)
+    return main.calculate_parts_per_labor_hour(
+        list(items_by_work_order), TECHS, items_by_work_order=items_by_work_order,
+        columnar=False,
+    )
+
+
+def main_benchmark(sizes: list[int]) -> None:
+    console = Console()
+    table = Table(title="Loop vs columnar")
+    table.add_column("Items")
+    table.add_column("Function")
+    table.add_column("Loop (s)", justify="right")
+    table.add_column("Columnar (s)", justify="right")
+    table.add_column("Speedup", justify="right")
+    table.add_column("Identical")
+
+    for size in sizes:
+        items = synthetic_items(size)
+
+        loop_time, loop_result = timed(
+            main.tally_labor_items, items, "labor:", TECHS, columnar=False
+        )
+        fast_time, fast_result = timed(columnar.tally_labor_items, items, "labor:", TECHS)
+        table.add_row(
+            f"{size:,}", "tally_labor_items", f"{loop_time:.3f}", f"{fast_time:.3f}",
+            f"{loop_time / fast_time:.1f}x", str(loop_result == fast_result),
+        )
+
+        loop_time, loop_result = timed(pplh_loop, items)
+        fast_time, fast_result = timed(columnar.parts_per_labor_hour, items, TECHS)
+        identical = all(
+            abs(loop_result[tech] - fast_result[tech]) <= 1e-6 * max(1, abs(loop_result[tech]))
+            for tech in TECHS
+        )
+        table.add_row(
+            f"{size:,}", "parts per labor hour", f"{loop_time:.3f}", f"{fast_time:.3f}",
+            f"{loop_time / fast_time:.1f}x", str(identical),
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    main_benchmark(parser.parse_args().sizes)
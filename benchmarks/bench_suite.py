@@ -0,0 +1,268 @@
+"""End-to-end and micro benchmarks against the local fake Method API.
+
+Run with ``python benchmarks/bench_suite.py`` from the repo root. Every report
+type is computed against tests/fake_api.py serving synthetic data, recording
+wall time, requests and bytes sent per report, then the hot helpers are timed
+on their own.
+
+Results are compared with benchmarks/baseline.json when it exists and was
+recorded with the same scale and latency. ``--save-baseline`` records a new
+one, ``--check`` exits with status 1 if anything regressed. Request and byte
+counts are deterministic, timings depend on the machine.
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+import rich
+from rich.console import Console
+from rich.table import Table
+
+from labor_report import cache, main
+from tests.fake_api import FakeMethodApi
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+START, END = "2025-01-01", "2025-02-01"
+PARTS = ["Hose", "Seal kit", "Filter", "BRAKE CLEANER", "Service Call Fee"]
+OUTSIDE_CUSTOMERS = ["Acme", "Globex", "Initech", "Umbrella"]
+
+# Allowed slowdown before a timing counts as a regression, runs of a few
+# tens of milliseconds easily vary by a third between runs
+TIME_TOLERANCE = 0.5
+BYTES_TOLERANCE = 0.05
+
+
+def synthetic_range(
+    work_order_count: int, tech_count: int, seed: int = 1
+) -> tuple[list[str], list[dict], list[dict]]:
+    """Technicians, January work orders spread over internal and outside
+    customers, and their job items: labor for one to three techs, sometimes a
+    service call, and a few parts"""
+    rng = random.Random(seed)
+    techs = [f"Tech {n:02d}" for n in range(tech_count)]
+    customers = [
+        customer
+        for definition in main.report_types.values()
+        for customer in (
+            definition["customer"] if isinstance(definition["customer"], tuple)
+            else (definition["customer"],)
+        )
+        if customer
+    ]
+    customers = list(dict.fromkeys(customers)) + OUTSIDE_CUSTOMERS
+
+    work_orders, job_items = [], []
+    for record_id in range(100_001, 100_001 + work_order_count):
+        customer = rng.choice(customers)
+        work_orders.append({
+            "RecordID": record_id,
+            "ActualCompletedDate":
+                f"2025-01-{rng.randint(1, 31):02d}T{rng.randint(7, 17):02d}:00:00",
+            "EntityCompanyName": customer,
+            "ContactsName": customer,
+        })
+
+        for tech in rng.sample(techs, rng.randint(1, min(3, tech_count))):
+            job_items.append({"ActivityNo": str(record_id), "Item": f"labor:{tech}",
+                              "Qty": rng.choice([0.5, 1, 1.5, 2, 3]), "Amount": 0})
+            if rng.random() < 0.3:
+                job_items.append({"ActivityNo": str(record_id), "Item": f"Service call:{tech}",
+                                  "Qty": 1, "Amount": 95.0})
+
+        for part in rng.sample(PARTS, rng.randint(0, 3)):
+            job_items.append({"ActivityNo": str(record_id), "Item": part,
+                              "Qty": rng.randint(1, 4), "Amount": round(rng.uniform(5, 400), 2)})
+
+    return techs, work_orders, job_items
+
+
+def run_reports(api: FakeMethodApi, repeat: int) -> dict[str, dict]:
+    """Best of repeat wall times per report type, with the requests and
+    bytes of the last run"""
+    results = {}
+    # Roster first, so the first report's counts don't depend on repeat
+    main.get_technician_names()
+
+    for report_title in main.report_types:
+        best = None
+
+        for _ in range(repeat):
+            requests, bytes_sent = len(api.requests), api.bytes_sent
+            started = time.perf_counter()
+
+            tech_names = main.get_technician_names()
+            main.compute_report(START, END, report_title, tech_names)
+
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+            results[report_title] = {
+                "seconds": best,
+                "requests": len(api.requests) - requests,
+                "bytes": api.bytes_sent - bytes_sent,
+            }
+
+    return results
+
+
+def best_per_call(function, repeat: int = 5) -> float:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_micro(techs: list[str], job_items: list[dict]) -> dict[str, dict]:
+    wo_list = list(range(100_001, 110_001))
+    items = job_items[:20_000]
+    one_work_order = [item for item in job_items if item["ActivityNo"] == "100001"] * 5
+
+    return {
+        "parameterize_wo_list (10k)": {
+            "seconds": best_per_call(
+                lambda: main.parameterize_wo_list(wo_list, "contains(Item, 'labor:') and ")
+            ),
+        },
+        "tally_labor_items (20k)": {
+            "seconds": best_per_call(
+                lambda: main.tally_labor_items(items, "labor:", techs, columnar=False), repeat=3
+            ),
+        },
+        "divide_item_amounts_per_tech": {
+            "seconds": best_per_call(
+                lambda: main.divide_item_amounts_per_tech(one_work_order, techs)
+            ),
+        },
+    }
+
+
+def regressions(current: dict, baseline: dict) -> list[str]:
+    found = []
+
+    for section in ("reports", "micro"):
+        for name, values in current[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before is None:
+                continue
+
+            if values["seconds"] > before["seconds"] * (1 + TIME_TOLERANCE):
+                found.append(f"{name}: time")
+            if values.get("requests", 0) > before.get("requests", 0):
+                found.append(f"{name}: requests")
+            if values.get("bytes", 0) > before.get("bytes", 0) * (1 + BYTES_TOLERANCE):
+                found.append(f"{name}: bytes")
+
+    return found
+
+
+def change(value: float, before: float | None) -> str:
+    if not before:
+        return ""
+
+    ratio = value / before - 1
+    colour = "red" if ratio > TIME_TOLERANCE else "green" if ratio < -TIME_TOLERANCE else "white"
+    return f"[{colour}]{ratio:+.0%}[/]"
+
+
+def print_results(current: dict, baseline: dict | None) -> None:
+    console = Console()
+    baseline = baseline or {}
+
+    table = Table(title=(
+        f"Reports, {current['config']['work_orders']:,} work orders, "
+        f"{current['config']['latency'] * 1000:.0f} ms latency"
+    ))
+    table.add_column("Report Type")
+    table.add_column("Seconds", justify="right")
+    table.add_column("vs baseline", justify="right")
+    table.add_column("Requests", justify="right")
+    table.add_column("KiB sent", justify="right")
+
+    for name, values in current["reports"].items():
+        before = baseline.get("reports", {}).get(name, {})
+        table.add_row(
+            name, f"{values['seconds']:.3f}", change(values["seconds"], before.get("seconds")),
+            f"{values['requests']} ({before['requests']})" if before else str(values["requests"]),
+            f"{values['bytes'] / 1024:,.1f}",
+        )
+    console.print(table)
+
+    table = Table(title="Microbenchmarks")
+    table.add_column("Function")
+    table.add_column("Per call (ms)", justify="right")
+    table.add_column("vs baseline", justify="right")
+
+    for name, values in current["micro"].items():
+        before = baseline.get("micro", {}).get(name, {})
+        table.add_row(
+            name,
+            f"{values['seconds'] * 1000:.3f}",
+            change(values["seconds"], before.get("seconds")),
+        )
+    console.print(table)
+
+
+def main_benchmark(args: argparse.Namespace) -> int:
+    config = {"work_orders": args.work_orders, "techs": args.techs, "latency": args.latency}
+    techs, work_orders, job_items = synthetic_range(args.work_orders, args.techs)
+
+    baseline = None
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text())
+        if baseline.get("config") != config:
+            print(f"Baseline was recorded with {baseline.get('config')}, not comparing")
+            baseline = None
+
+    cache.disable()
+    # Progress bars and counts from main would bury the tables
+    rich.get_console().quiet = True
+
+    with tempfile.TemporaryDirectory() as data_dir, FakeMethodApi(
+        techs, work_orders, job_items, latency=args.latency
+    ) as api:
+        main.URL = api.url
+        main.ROSTER_FILE_PATH = str(Path(data_dir) / "roster.sqlite")
+
+        current = {
+            "config": config,
+            "reports": run_reports(api, args.repeat),
+            "micro": run_micro(techs, job_items),
+        }
+
+    rich.get_console().quiet = False
+    print_results(current, baseline)
+
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Saved baseline to {BASELINE_PATH}")
+
+    if baseline is not None:
+        found = regressions(current, baseline)
+        for regression in found:
+            print(f"Regression: {regression}")
+        if found and args.check:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--work-orders", type=int, default=2_000)
+    parser.add_argument("--techs", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="seconds the fake server waits before each response")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true",
+                        help="exit with status 1 when a result regressed")
+    sys.exit(main_benchmark(parser.parse_args()))
@@ -0,0 +1,140 @@
+"""Compute many per-technician metrics in one pass over job items.
+
+Items are walked once per work order. That pass fills a small per work order
+summary (hours per tech for every tally tag, parts amount, quantities of
+tagged items), and each metric then folds the summary into its totals, so
+adding a metric costs one step per work order rather than another walk over
+every item.
+"""
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+from labor_report.classify import LABOR_TAG, ItemClassifier, get_classifier
+
+
+class WorkOrderSummary:
+    def __init__(self, tally_tags: Iterable[str], quantity_tags: Iterable[str]):
+        self.tech_qty = {tag: {} for tag in tally_tags}
+        self.tag_qty = {tag: 0 for tag in quantity_tags}
+        self.parts_amount = 0
+
+    def labor_shares(self) -> dict[str, float]:
+        hours = self.tech_qty.get(LABOR_TAG, {})
+        total_hours = sum(hours.values())
+        if total_hours <= 0:
+            return {}
+        return {tech: qty / total_hours for tech, qty in hours.items() if qty > 0}
+
+
+class Metric(ABC):
+    """Base for one report column. work_orders limits the metric to those
+    work order numbers, None counts every work order"""
+    tally_tags = ()
+    quantity_tags = ()
+
+    def __init__(self, name: str, work_orders: Iterable | None = None):
+        self.name = name
+        self.work_orders = None if work_orders is None else {str(wo) for wo in work_orders}
+
+    def applies_to(self, work_order: str) -> bool:
+        return self.work_orders is None or work_order in self.work_orders
+
+    @abstractmethod
+    def add(self, totals: dict[str, float], summary: WorkOrderSummary) -> None:
+        """Fold one work order's summary into totals"""
+
+
+class TechTally(Metric):
+    """Sum of Qty of items named '<tag><tech name>', like tally_labor_items"""
+
+    def __init__(self, name: str, tag: str, work_orders: Iterable | None = None):
+        super().__init__(name, work_orders)
+        self.tag = tag
+        self.tally_tags = (tag,)
+
+    def add(self, totals, summary):
+        for tech, qty in summary.tech_qty[self.tag].items():
+            totals[tech] += qty
+
+
+class PartsPerLaborHour(Metric):
+    """Each work order's parts amount split by the techs' share of its labor
+    hours, like divide_item_amounts_per_tech summed over work orders"""
+    tally_tags = (LABOR_TAG,)
+
+    def add(self, totals, summary):
+        for tech, share in summary.labor_shares().items():
+            totals[tech] += summary.parts_amount * share
+
+
+class ItemQuantityShare(Metric):
+    """Qty of items containing tag, credited to the techs on each work order
+    by their share of its labor hours"""
+
+    tally_tags = (LABOR_TAG,)
+
+    def __init__(self, name: str, tag: str, work_orders: Iterable | None = None):
+        super().__init__(name, work_orders)
+        self.tag = tag
+        self.quantity_tags = (tag,)
+
+    def add(self, totals, summary):
+        for tech, share in summary.labor_shares().items():
+            totals[tech] += summary.tag_qty[self.tag] * share
+
+
+def summarize(
+    items: list[dict],
+    tally_tags: tuple[str, ...],
+    quantity_tags: tuple[str, ...],
+    classifier: ItemClassifier,
+) -> WorkOrderSummary:
+    summary = WorkOrderSummary(tally_tags, quantity_tags)
+    tech_names = classifier.tech_names
+
+    for item in items:
+        item_class = classifier.classify(item["Item"])
+
+        for tag, tech_index in item_class.techs.items():
+            if tech_index >= 0 and tag in summary.tech_qty:
+                tech_qty = summary.tech_qty[tag]
+                tech = tech_names[tech_index]
+                tech_qty[tech] = tech_qty.get(tech, 0) + item["Qty"]
+
+            if tag in summary.tag_qty:
+                summary.tag_qty[tag] += item["Qty"]
+
+        if item_class.is_part:
+            summary.parts_amount += item["Amount"]
+
+    return summary
+
+
+def aggregate(
+    items_by_work_order: dict[str, list[dict]],
+    metrics: list[Metric],
+    tech_names: list[str],
+) -> dict[str, dict[str, float]]:
+    """Metric name -> {tech: value} for every metric, from a single walk over
+    the items of each work order"""
+    tally_tags = tuple(dict.fromkeys(tag for metric in metrics for tag in metric.tally_tags))
+    quantity_tags = tuple(
+        dict.fromkeys(tag for metric in metrics for tag in metric.quantity_tags)
+    )
+    classifier = get_classifier(tech_names, tally_tags + quantity_tags)
+
+    results = {metric.name: {name: 0 for name in tech_names} for metric in metrics}
+
+    for work_order, items in items_by_work_order.items():
+        work_order = str(work_order)
+        interested = [metric for metric in metrics if metric.applies_to(work_order)]
+
+        if not interested:
+            continue
+
+        summary = summarize(items, tally_tags, quantity_tags, classifier)
+
+        for metric in interested:
+            metric.add(results[metric.name], summary)
+
+    return results
@@ -0,0 +1,142 @@
+import traceback
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from rich import print
+
+from labor_report import client
+from labor_report.paging import KeysetCursor
+
+if TYPE_CHECKING:
+    import asyncio
+
+# asyncio is imported where it is used, main imports this module for its
+# constants and most commands never fetch anything
+
+# Upper bound on requests in flight across all chunks
+MAX_CONCURRENCY = 8
+PAGE_SIZE = 100
+
+
+async def _walk_keyset(
+    url: str,
+    params: dict,
+    headers: dict,
+    semaphore: "asyncio.Semaphore",
+    key: str,
+    data_list: list[dict],
+) -> None:
+    """Append every row of the query to data_list, a page after the last key
+    at a time"""
+    import asyncio
+
+    cursor = KeysetCursor(params, key)
+
+    while not cursor.done:
+        async with semaphore:
+            data = await asyncio.to_thread(
+                client.get_json, url, params=cursor.next_params(), headers=headers
+            )
+
+        data_list.extend(data["value"])
+        cursor.advance(data["value"])
+
+
+async def _fetch_query_pages(
+    url: str,
+    params: dict,
+    headers: dict,
+    semaphore: "asyncio.Semaphore",
+    raise_errors: bool = False,
+    keyset: str | None = None,
+) -> list[dict]:
+    """Walk every page of a single query. Pages of one query are dependent,
+    so they run in order, but many queries run side by side. With keyset
+    the pages are walked by that key instead of by skip, see paging.py"""
+    import asyncio
+
+    data_list = []
+    params = {**params, "skip": params.get("skip", 0)}
+
+    try:
+        if keyset is not None:
+            await _walk_keyset(url, params, headers, semaphore, keyset, data_list)
+            return data_list
+
+        while True:
+            async with semaphore:
+                # client.get_json blocks, run it on the default executor so
+                # the pooled session and its retries are shared with sync code
+                data = await asyncio.to_thread(
+                    client.get_json, url, params=dict(params), headers=headers
+                )
+
+            if "value" in data:
+                data_list.extend(data["value"])
+
+                if data.get("count", len(data["value"])) < PAGE_SIZE:
+                    break
+
+                params["skip"] += PAGE_SIZE
+
+            else:
+                data_list.extend(data)
+                break
+
+    except Exception:
+        if raise_errors:
+            raise
+        print(traceback.format_exc())
+
+    return data_list
+
+
+async def fetch_queries(
+    url: str,
+    param_sets: list[dict],
+    headers: dict,
+    max_concurrency: int = MAX_CONCURRENCY,
+    on_query_done: Callable[[], None] | None = None,
+    raise_errors: bool = False,
+    keyset: str | None = None,
+    on_rows: Callable[[int, list[dict]], None] | None = None,
+) -> list[list[dict]]:
+    """Run all queries concurrently and return their rows in input order.
+    Failed queries are logged and return what they got so far, unless
+    raise_errors is set. on_rows gets the index and rows of each query as
+    soon as it has finished"""
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def run(index: int, params: dict) -> list[dict]:
+        rows = await _fetch_query_pages(url, params, headers, semaphore, raise_errors, keyset)
+        if on_rows is not None:
+            on_rows(index, rows)
+        if on_query_done is not None:
+            on_query_done()
+        return rows
+
+    return await asyncio.gather(*(run(index, params) for index, params in enumerate(param_sets)))
+
+
+def fetch_all(
+    url: str,
+    param_sets: list[dict],
+    headers: dict,
+    max_concurrency: int = MAX_CONCURRENCY,
+    on_query_done: Callable[[], None] | None = None,
+    raise_errors: bool = False,
+    keyset: str | None = None,
+    on_rows: Callable[[int, list[dict]], None] | None = None,
+) -> list[dict]:
+    """Synchronous entry point, flattens the per query results"""
+    import asyncio
+
+    results = asyncio.run(
+        fetch_queries(
+            url, param_sets, headers, max_concurrency, on_query_done, raise_errors, keyset,
+            on_rows,
+        )
+    )
+    return [row for rows in results for row in rows]
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+CACHE_FILE_PATH = os.path.join("data", "http_cache.sqlite")
+
+# Ranges ending more than this many days ago are treated as closed and their
+# responses are kept forever
+SETTLE_DAYS = 7
+# Seconds a response for a still open range stays fresh
+OPEN_RANGE_TTL = 60 * 60
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+_cache = None
+_ttl = OPEN_RANGE_TTL
+
+
+def cache_key(url: str, params: dict | None) -> str:
+    """Normalize the request so the same query always maps to one entry"""
+    parts = urlsplit(url)
+    normalized_url = urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", "")
+    )
+    normalized_params = sorted(
+        (str(key).lstrip("$"), str(value).strip())
+        for key, value in (params or {}).items()
+    )
+    return f"{normalized_url}?{urlencode(normalized_params)}"
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: str = CACHE_FILE_PATH,
+        max_bytes: int = MAX_CACHE_BYTES,
+        refresh: bool = False,
+    ):
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+            """
+        )
+        self._total_bytes = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if self.refresh or row is None or (row[1] is not None and row[1] <= now):
+                self.misses += 1
+                return None
+
+            self._connection.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self._connection.commit()
+            self.hits += 1
+
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, data: dict, ttl: float | None) -> None:
+        body = zlib.compress(json.dumps(data).encode())
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if previous is not None:
+                self._total_bytes -= previous[0]
+
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), expires_at, now),
+            )
+            self._total_bytes += len(body)
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits max_bytes"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._connection.execute(
+                "SELECT key, size FROM responses ORDER BY last_used LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+
+            for key, size in rows:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def enable(path: str = CACHE_FILE_PATH, refresh: bool = False) -> ResponseCache:
+    """Turn the cache on for every client.get_json call. With refresh, cached
+    responses are ignored but fresh ones are still stored"""
+    global _cache
+
+    disable()
+    _cache = ResponseCache(path, refresh=refresh)
+    return _cache
+
+
+def disable() -> None:
+    global _cache
+
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+def set_range(start: str, end: str, today: date | None = None) -> None:
+    """Pick the expiry policy for the report being fetched. end is exclusive,
+    like the ActualCompletedDate filters"""
+    global _ttl
+
+    today = today or date.today()
+    settled = date.fromisoformat(end) <= today - timedelta(days=SETTLE_DAYS)
+    _ttl = None if settled else OPEN_RANGE_TTL
+
+    if _cache is not None:
+        _cache.hits = _cache.misses = 0
+
+
+def lookup(url: str, params: dict | None) -> dict | None:
+    if _cache is None:
+        return None
+    return _cache.get(cache_key(url, params))
+
+
+def store(url: str, params: dict | None, data: dict) -> None:
+    if _cache is not None:
+        _cache.put(cache_key(url, params), data, _ttl)
+
+
+def stats() -> tuple[int, int] | None:
+    if _cache is None:
+        return None
+    return _cache.hits, _cache.misses
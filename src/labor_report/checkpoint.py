@@ -0,0 +1,101 @@
+"""Fetch progress of long reports, kept on disk so a failed run can resume.
+
+A run is keyed by its report name. It records the work orders of the range
+once, then the partial {tech: value} aggregate of every job item chunk as
+soon as that chunk is done. Every report metric is a sum over work orders,
+so the report is the sum of its chunk partials, and a rerun of the same
+report only fetches the chunks that have no partial yet.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+
+CHECKPOINT_FILE_PATH = os.path.join("data", "checkpoints.sqlite")
+
+
+def chunks_key(chunks: list[str]) -> str:
+    """Fingerprint of a chunking, partials of another chunking don't apply"""
+    return hashlib.sha256(json.dumps(chunks).encode()).hexdigest()
+
+
+class CheckpointStore:
+    def __init__(self, path: str = CHECKPOINT_FILE_PATH):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                name TEXT PRIMARY KEY,
+                work_orders TEXT NOT NULL,
+                chunks_key TEXT,
+                started REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                name TEXT NOT NULL,
+                chunk INTEGER NOT NULL,
+                partial TEXT NOT NULL,
+                PRIMARY KEY (name, chunk)
+            );
+            """
+        )
+
+    def work_orders(self, name: str) -> list | None:
+        row = self._connection.execute(
+            "SELECT work_orders FROM runs WHERE name = ?", (name,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def start(self, name: str, work_orders: list, now: float | None = None) -> None:
+        """Record the work orders of a new run, dropping any older progress"""
+        now = time.time() if now is None else now
+
+        with self._connection:
+            self._connection.execute("DELETE FROM chunks WHERE name = ?", (name,))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, NULL, ?)",
+                (name, json.dumps(work_orders), now),
+            )
+
+    def partials(self, name: str, chunks: list[str]) -> dict[int, dict]:
+        """Chunk index -> partial aggregate of the chunks already done. When
+        the work orders are chunked differently than last time the old
+        partials are dropped"""
+        key = chunks_key(chunks)
+
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT chunks_key FROM runs WHERE name = ?", (name,)
+            ).fetchone()
+
+            if row is not None and row[0] != key:
+                self._connection.execute("DELETE FROM chunks WHERE name = ?", (name,))
+                self._connection.execute(
+                    "UPDATE runs SET chunks_key = ? WHERE name = ?", (key, name)
+                )
+
+        return {
+            chunk: json.loads(partial)
+            for chunk, partial in self._connection.execute(
+                "SELECT chunk, partial FROM chunks WHERE name = ?", (name,)
+            )
+        }
+
+    def save_partial(self, name: str, chunk: int, partial: dict) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)",
+                (name, chunk, json.dumps(partial)),
+            )
+
+    def finish(self, name: str) -> None:
+        """Forget a completed run, the next run of the name starts over"""
+        with self._connection:
+            self._connection.execute("DELETE FROM chunks WHERE name = ?", (name,))
+            self._connection.execute("DELETE FROM runs WHERE name = ?", (name,))
+
+    def names(self) -> list[str]:
+        return [row[0] for row in self._connection.execute("SELECT name FROM runs ORDER BY started")]
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,109 @@
+"""Item classification compiled once from the report definitions.
+
+Job item names like ``labor:Jane Doe`` repeat thousands of times in a
+report, so every distinct name is classified once (which report tags it
+carries, which technician it names, whether it is a part) and the result is
+memoized on the classifier.
+"""
+import json
+from functools import lru_cache
+from typing import NamedTuple
+from collections.abc import Iterable
+
+LABOR_TAG = "labor:"
+SERVICE_CALL_TAG = "Service Call"
+
+REPORT_KINDS = ("tally", "pplh", "item_share")
+
+
+class ItemClass(NamedTuple):
+    # tag -> index into tech_names, -1 if the tag is present but names no tech
+    techs: dict[str, int]
+    is_part: bool
+
+
+NOT_AN_ITEM = ItemClass({}, False)
+
+
+def tech_from_item(item_name: str, tag: str) -> str:
+    """The text after tag, 'labor:Sam Lee' -> 'Sam Lee'"""
+    return item_name.partition(tag)[2].strip()
+
+
+class ItemClassifier:
+    def __init__(self, tags: Iterable[str], tech_names: Iterable[str]):
+        self.tags = tuple(dict.fromkeys((LABOR_TAG, *tags)))
+        self.tech_names = list(tech_names)
+        self.tech_index = {name: index for index, name in enumerate(self.tech_names)}
+        self._memo = {}
+
+    def classify(self, item_name: str | None) -> ItemClass:
+        try:
+            return self._memo[item_name]
+        except KeyError:
+            pass
+
+        if not item_name:
+            item_class = NOT_AN_ITEM
+        else:
+            techs = {
+                tag: self.tech_index.get(tech_from_item(item_name, tag), -1)
+                for tag in self.tags if tag in item_name
+            }
+            is_part = LABOR_TAG not in techs and SERVICE_CALL_TAG not in item_name
+            item_class = ItemClass(techs, is_part)
+
+        self._memo[item_name] = item_class
+        return item_class
+
+    def tech_for(self, item_name: str | None, tag: str) -> int:
+        """Index of the tech named by a '<tag><tech>' item, -1 otherwise"""
+        return self.classify(item_name).techs.get(tag, -1)
+
+
+@lru_cache(maxsize=32)
+def _cached_classifier(tags: tuple[str, ...], tech_names: tuple[str, ...]) -> ItemClassifier:
+    return ItemClassifier(tags, tech_names)
+
+
+def get_classifier(tech_names: Iterable[str], tags: Iterable[str] = ()) -> ItemClassifier:
+    """Shared classifier for this roster and tag set, so its memo carries over
+    between tallies"""
+    return _cached_classifier(tuple(dict.fromkeys(tags)), tuple(tech_names))
+
+
+def load_report_types(path: str) -> dict:
+    """Read report definitions from a JSON file shaped like main.report_types:
+
+        {"Lost Time": {"customer": "Accurate - Lost Time", "item": "labor:"},
+         "All Internals": {"customer": ["A", "B"], "item": "labor:", "exclude": true},
+         "Parts per labor hour": {"customer": "", "item": "PPLH", "kind": "pplh"}}
+
+    kind is one of REPORT_KINDS and defaults to "tally"."""
+    with open(path, "r") as f:
+        raw = json.load(f)
+
+    report_definitions = {}
+
+    for name, definition in raw.items():
+        if not isinstance(definition.get("item"), str):
+            raise ValueError(f"Report type {name!r} needs an 'item' string")
+
+        kind = definition.get("kind", "tally")
+        if kind not in REPORT_KINDS:
+            raise ValueError(
+                f"Report type {name!r} has unknown kind {kind!r}, expected one of {REPORT_KINDS}"
+            )
+
+        customer = definition.get("customer", "")
+        if isinstance(customer, list):
+            customer = tuple(customer)
+
+        report_definitions[name] = {
+            "customer": customer,
+            "item": definition["item"],
+            "kind": kind,
+            "exclude": bool(definition.get("exclude", False)),
+        }
+
+    return report_definitions
@@ -0,0 +1,165 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from labor_report import cache, instrument
+from labor_report.ratelimit import RateGovernor
+
+# requests is imported on first use, commands that never call the API
+# shouldn't pay for loading it
+if TYPE_CHECKING:
+    import requests
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 60)
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+MAX_BACKOFF = 30
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+POOL_SIZE = 16
+
+_session = None
+_session_lock = threading.Lock()
+
+# Paces every request made through get, from any thread
+governor = RateGovernor()
+
+
+class ApiError(Exception):
+    def __init__(self, status_code: int | None, content: bytes | str = b"", url: str = ""):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+        super().__init__(f"{status_code} from {url}: {content[:200]!r}")
+
+
+def get_session() -> "requests.Session":
+    """Return the process wide session so every call reuses pooled
+    keep-alive connections"""
+    global _session
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+            _session = session
+
+    return _session
+
+
+def close_session() -> None:
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _retry_after_seconds(response: "requests.Response") -> float | None:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(attempt: int, response: "requests.Response | None" = None) -> float:
+    delay = min(BACKOFF_FACTOR * 2 ** attempt, MAX_BACKOFF)
+
+    if response is not None:
+        retry_after = _retry_after_seconds(response)
+        if retry_after is not None:
+            delay = min(max(delay, retry_after), MAX_BACKOFF)
+
+    return delay
+
+
+def get(
+    url: str,
+    params: dict | None = None,
+    headers: dict | None = None,
+    timeout: float | tuple = DEFAULT_TIMEOUT,
+    max_retries: int | None = None,
+) -> "requests.Response":
+    """GET with bounded exponential backoff on connection errors, 429 and
+    5xx responses, paced by the shared rate governor. Raises ApiError once
+    the retries are used up or on any other non-200 status"""
+    import requests
+
+    if max_retries is None:
+        max_retries = MAX_RETRIES
+
+    session = get_session()
+    attempt = 0
+    started = time.perf_counter()
+
+    while True:
+        sent_at = governor.acquire()
+
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            if attempt >= max_retries:
+                instrument.record_request(
+                    url, params, None, time.perf_counter() - started, attempt
+                )
+                raise ApiError(None, str(exc), url) from exc
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if response.status_code == 200:
+            governor.on_success()
+            instrument.record_request(
+                url, params, 200, time.perf_counter() - started, attempt, response
+            )
+            return response
+
+        if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+            instrument.record_request(
+                url, params, response.status_code, time.perf_counter() - started, attempt, response
+            )
+            raise ApiError(response.status_code, response.content, response.url)
+
+        if response.status_code == 429:
+            # Every caller waits this one out in governor.acquire
+            governor.on_throttle(backoff_delay(attempt, response), sent_at)
+        else:
+            time.sleep(backoff_delay(attempt, response))
+        attempt += 1
+
+
+def get_json(
+    url: str,
+    params: dict | None = None,
+    headers: dict | None = None,
+    timeout: float | tuple = DEFAULT_TIMEOUT,
+    max_retries: int | None = None,
+) -> dict:
+    data = cache.lookup(url, params)
+
+    if data is None:
+        data = get(url, params, headers, timeout, max_retries).json()
+        instrument.record_rows(len(data.get("value", ())))
+        cache.store(url, params, data)
+
+    return data
@@ -0,0 +1,96 @@
+"""NumPy versions of the per-technician tallies.
+
+Items are encoded once into flat arrays (a tech code per item, -1 for items
+that don't count, plus Qty and Amount) and the sums are done with
+np.bincount. Item names repeat heavily, so each distinct name is classified
+once by the shared classifier.
+"""
+import numpy as np
+
+from labor_report.classify import LABOR_TAG, ItemClassifier, get_classifier
+
+
+def _tech_codes(names: list, tag: str, classifier: ItemClassifier) -> np.ndarray:
+    return np.fromiter(
+        (classifier.tech_for(name, tag) for name in names), dtype=np.int64, count=len(names)
+    )
+
+
+def _column(items: list[dict], field: str) -> np.ndarray:
+    return np.fromiter(
+        (item[field] or 0 for item in items), dtype=np.float64, count=len(items)
+    )
+
+
+def _as_dict(values: np.ndarray, tech_names: list) -> dict:
+    return {name: values[index].item() for index, name in enumerate(tech_names)}
+
+
+def tally_labor_items(items: list[dict], labor_filter: str, tech_names: list) -> dict:
+    """Same result as main.tally_labor_items"""
+    classifier = get_classifier(tech_names, (labor_filter,))
+    codes = _tech_codes([item["Item"] for item in items], labor_filter, classifier)
+    counted = codes >= 0
+
+    totals = np.bincount(
+        codes[counted],
+        weights=_column(items, "Qty")[counted],
+        minlength=len(tech_names),
+    )
+
+    return _as_dict(totals, tech_names)
+
+
+def parts_per_labor_hour(items: list[dict], tech_names: list) -> dict:
+    """divide_item_amounts_per_tech for every work order at once, summed per
+    tech the way calculate_parts_per_labor_hour does. items need ActivityNo"""
+    tech_count = len(tech_names)
+    if not items or not tech_count:
+        return {name: 0 for name in tech_names}
+
+    names = [item["Item"] for item in items]
+    work_order_index = {}
+    work_order_codes = np.fromiter(
+        (
+            work_order_index.setdefault(str(item["ActivityNo"]), len(work_order_index))
+            for item in items
+        ),
+        dtype=np.int64,
+        count=len(items),
+    )
+    work_order_count = len(work_order_index)
+
+    classifier = get_classifier(tech_names)
+    tech_codes = _tech_codes(names, LABOR_TAG, classifier)
+    is_part = np.fromiter(
+        (classifier.classify(name).is_part for name in names), dtype=bool, count=len(names)
+    )
+
+    labor = tech_codes >= 0
+    qty = _column(items, "Qty")[labor]
+    labor_work_orders = work_order_codes[labor]
+
+    parts_amount = np.bincount(
+        work_order_codes[is_part],
+        weights=_column(items, "Amount")[is_part],
+        minlength=work_order_count,
+    )
+    total_hours = np.bincount(labor_work_orders, weights=qty, minlength=work_order_count)
+
+    # Hours per (work order, tech) pair that actually occurs
+    pairs, pair_codes = np.unique(
+        labor_work_orders * tech_count + tech_codes[labor], return_inverse=True
+    )
+    pair_hours = np.bincount(pair_codes, weights=qty, minlength=len(pairs))
+    pair_work_orders = pairs // tech_count
+    pair_techs = pairs % tech_count
+
+    pair_totals = total_hours[pair_work_orders]
+    counted = (pair_hours > 0) & (pair_totals > 0)
+    share = np.divide(pair_hours, pair_totals, out=np.zeros_like(pair_hours), where=counted)
+
+    pplh = np.bincount(
+        pair_techs, weights=parts_amount[pair_work_orders] * share, minlength=tech_count
+    )
+
+    return _as_dict(pplh, tech_names)
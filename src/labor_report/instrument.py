@@ -0,0 +1,216 @@
+"""Opt-in timing spans and per-request statistics.
+
+Nothing is recorded until enable() is called. While disabled every hook is a
+check of a module global that returns straight away, so instrumented code
+pays well under a microsecond per call.
+"""
+import json
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from functools import wraps
+from statistics import median
+from urllib.parse import urlsplit
+
+from rich.console import Console
+from rich.table import Table
+
+_recorder = None
+
+
+class Recorder:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.requests = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def add_span(self, record: dict) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+    def add_request(self, record: dict) -> None:
+        self._local.last_request = record
+        with self._lock:
+            self.requests.append(record)
+
+    def trace(self) -> dict:
+        with self._lock:
+            return {
+                "duration": time.perf_counter() - self.started,
+                "spans": list(self.spans),
+                "requests": list(self.requests),
+            }
+
+
+def enable() -> Recorder:
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def disable() -> None:
+    global _recorder
+    _recorder = None
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the enclosed block as one stage. Spans nest per thread"""
+    recorder = _recorder
+    if recorder is None:
+        yield
+        return
+
+    stack = recorder._stack()
+    record = {
+        "name": name,
+        "parent": stack[-1]["name"] if stack else None,
+        "thread": threading.current_thread().name,
+        "start": time.perf_counter() - recorder.started,
+        **attributes,
+    }
+    stack.append(record)
+
+    try:
+        yield
+    finally:
+        stack.pop()
+        record["duration"] = time.perf_counter() - recorder.started - record["start"]
+        recorder.add_span(record)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of span"""
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_request(
+    url: str,
+    params: dict | None,
+    status: int | None,
+    seconds: float,
+    retries: int,
+    response=None,
+) -> None:
+    """One logical API call, including all of its retries. Bytes are as sent
+    on the wire, before any gzip decoding"""
+    recorder = _recorder
+    if recorder is None:
+        return
+
+    size = 0
+    if response is not None:
+        size = int(response.headers.get("Content-Length", len(response.content)))
+
+    recorder.add_request({
+        "table": urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1],
+        "params": dict(params or {}),
+        "status": status,
+        "seconds": seconds,
+        "retries": retries,
+        "bytes": size,
+        "rows": None,
+        "thread": threading.current_thread().name,
+        "start": time.perf_counter() - recorder.started - seconds,
+    })
+
+
+def record_rows(rows: int) -> None:
+    """Page size of the last request made on this thread"""
+    recorder = _recorder
+    if recorder is None:
+        return
+
+    last_request = getattr(recorder._local, "last_request", None)
+    if last_request is not None:
+        last_request["rows"] = rows
+
+
+def write_trace(path: str) -> None:
+    if _recorder is None:
+        return
+
+    with open(path, "w") as f:
+        json.dump(_recorder.trace(), f, indent=2)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def print_summary(console: Console | None = None) -> None:
+    if _recorder is None:
+        return
+
+    console = console or Console()
+    trace = _recorder.trace()
+
+    stages = {}
+    for record in trace["spans"]:
+        count, total = stages.get(record["name"], (0, 0.0))
+        stages[record["name"]] = (count + 1, total + record["duration"])
+
+    table = Table(title=f"Stages, {trace['duration']:.2f}s run")
+    table.add_column("Stage")
+    table.add_column("Calls", justify="right")
+    table.add_column("Seconds", justify="right")
+    table.add_column("% of run", justify="right")
+
+    for name, (count, total) in sorted(stages.items(), key=lambda stage: -stage[1][1]):
+        table.add_row(
+            name, str(count), f"{total:.3f}", f"{total / max(trace['duration'], 1e-9):.0%}"
+        )
+    console.print(table)
+
+    tables = {}
+    for record in trace["requests"]:
+        tables.setdefault(record["table"], []).append(record)
+
+    table = Table(title="API requests")
+    table.add_column("Table")
+    table.add_column("Requests", justify="right")
+    table.add_column("Retries", justify="right")
+    table.add_column("Errors", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+    table.add_column("Rows", justify="right")
+    table.add_column("KiB", justify="right")
+
+    for name, records in tables.items():
+        latencies = [record["seconds"] * 1000 for record in records]
+        table.add_row(
+            name,
+            str(len(records)),
+            str(sum(record["retries"] for record in records)),
+            str(sum(record["status"] != 200 for record in records)),
+            f"{median(latencies):.1f}",
+            f"{_percentile(latencies, 0.95):.1f}",
+            str(sum(record["rows"] or 0 for record in records)),
+            f"{sum(record['bytes'] for record in records) / 1024:,.1f}",
+        )
+    console.print(table)
@@ -1,28 +1,97 @@
 import os
 import sys
-import json
-from json import JSONDecodeError
+import math
+import pstats
+import cProfile
+import argparse
 
-import requests
 import traceback
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from calendar import prmonth
-from dotenv import load_dotenv
-from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, quote_plus, urlsplit
 
-from rich.progress import Progress
 from rich.console import Console
 from rich.table import Table
 from rich import print_json, print
-
-from labor_report.plots import plot_report_data
-
+from rich.markup import escape
+
+from labor_report import (
+    aggregate,
+    async_fetch,
+    cache,
+    checkpoint,
+    classify,
+    client,
+    instrument,
+    paging,
+    ratelimit,
+    roster,
+    series,
+    store,
+    sync,
+)
+from labor_report.client import ApiError
+
+if TYPE_CHECKING:
+    from labor_report.stats import Comparison
+
+# Legacy JSON archive, imported into the report store on first use
 REPORT_FILE_PATH = os.path.join("data", "reports.json")
+REPORT_DB_PATH = store.REPORT_DB_PATH
+ROSTER_FILE_PATH = roster.ROSTER_FILE_PATH
+CHECKPOINT_FILE_PATH = checkpoint.CHECKPOINT_FILE_PATH
+# Optional JSON file replacing the built in report_types below
+REPORT_TYPES_PATH = os.path.join("data", "report_types.json")
+# report file -> (store version, report headers)
+_catalog_cache = {}
 api_key_file = ".env"
 
 URL = "https://rest.method.me/api/v1"
 
+# Concurrent page requests when listing work orders, 1 pages sequentially
+WORK_ORDER_WORKERS = 8
+
+# Max URL encoded bytes of a $filter built from work order numbers. Keeps the
+# whole request URL comfortably under the common 2048 byte limit
+FILTER_BYTE_BUDGET = 1800
+# Send "ActivityNo in ('1','2')" rather than "ActivityNo eq '1' or ..."
+USE_IN_OPERATOR = False
+
+# Ask the API to sum labor hours per item instead of downloading every row
+AGGREGATE_PUSHDOWN = True
+
+# Statuses the server answers an $apply it can't run with, anything else is
+# not a reason to fall back to tallying job items locally
+AGGREGATION_REJECTED_STATUSES = (400, 501)
+
+# Compute reports from the local mirror in data/, fetching only missing days
+USE_LOCAL_SYNC = False
+
+# Tally reports stream work orders into item queries instead of listing
+# every work order first, see pipeline.py
+USE_PIPELINE = True
+
+# Page work orders and job items by RecordID instead of by skip offset,
+# with a page size that grows while pages come back fast, see paging.py
+KEYSET_PAGING = False
+
+# Save report fetch progress after every job item chunk and resume an
+# interrupted run of the same report, see checkpoint.py
+CHECKPOINT_RUNS = False
+
+# Functions listed by --profile, and where it saves the full stats
+PROFILE_LINES = 25
+PROFILE_PATH = os.path.join("data", "profile.pstats")
+
+# Re-read the whole technician table instead of trusting the stored roster
+REFRESH_ROSTER = False
+
+# Tally with NumPy from this many items up, below it the loop is fast enough
+COLUMNAR_MIN_ITEMS = 50_000
+
 report_types = {
     "Lost Time": {
         "customer": "Accurate - Lost Time",
@@ -48,10 +117,12 @@ report_types = {
             "Accurate Vehicle Maintenance",
         ),
         "item": "labor:",
+        "exclude": True,
     },
     "Brake cleaner sales": {
         "customer": "",
-        "item": "BRAKE CLEANER"
+        "item": "BRAKE CLEANER",
+        "kind": "item_share",
     },
     "Service Calls": {
         "customer": "",
@@ -59,7 +130,8 @@ report_types = {
     },
     "Parts per labor hour": {
         "customer": "",
-        "item": "PPLH"
+        "item": "PPLH",
+        "kind": "pplh",
     },
 }
 
@@ -68,7 +140,16 @@ payload = {}
 
 console = Console()
 
+def progress_bar():
+    # rich.progress is only needed by commands that fetch, keep it off startup
+    from rich.progress import Progress
+
+    return Progress()
+
+
 def initialize_api_key(key_path) -> str:
+    from dotenv import load_dotenv
+
     load_dotenv(dotenv_path=key_path)
 
     api_key = os.getenv("MY_API_KEY")
@@ -88,25 +169,44 @@ def initialize_api_key(key_path) -> str:
     return f"APIkey {api_key}"
 
 
-def get_technician_names() -> list:
-    with Progress() as progress:
-        tech_name_task = progress.add_task(
-            "Checking technician names...", total=1
-        )
-        params = {"skip": 0, "top": 100, "select": "FullName"}
+@instrument.timed("technician roster")
+def get_technician_roster(refresh: bool | None = None) -> dict[str, int]:
+    """Technician name -> index, from the roster stored under data/. The API
+    is only asked when the stored copy is older than roster.ROSTER_TTL"""
+    refresh = REFRESH_ROSTER if refresh is None else refresh
+    roster_store = roster.RosterStore(ROSTER_FILE_PATH)
 
-        response = requests.get(
-            f"{URL}/tables/FieldTechnicians",
-            params=params, headers=headers
-        )
+    try:
+        if refresh or not roster_store.is_fresh():
+            with progress_bar() as progress:
+                tech_name_task = progress.add_task(
+                    "Checking technician names...", total=1
+                )
+                try:
+                    roster.refresh(roster_store, URL, headers, force=refresh)
+
+                except ApiError as error:
+                    # A stale roster beats failing every report
+                    if not roster_store.names():
+                        raise
+                    print(
+                        f"[yellow]Technician refresh failed ({error.status_code}), "
+                        f"using the stored roster[/]"
+                    )
+
+                progress.update(tech_name_task, advance=1)
+
+        return roster_store.index()
 
-        data = response.json()
-        names_list = [name["FullName"] for name in data["value"]]
-        progress.update(tech_name_task, advance=1)
+    finally:
+        roster_store.close()
 
-    return names_list
+
+def get_technician_names() -> list:
+    return list(get_technician_roster())
 
 
+@instrument.timed("count work orders")
 def get_work_order_count(
     start: str, end: str, customer_filter: str | None
 ) -> int | None:
@@ -117,23 +217,32 @@ def get_work_order_count(
         f"/aggregate($count as TotalWorkOrders)"
     }
 
-    response = requests.get(f"{URL}/tables/Activity",
-                            params=params, headers=headers
-                            )
+    try:
+        data = client.get_json(f"{URL}/tables/Activity",
+                               params=params, headers=headers
+                               )
 
-    if response.status_code == 200:
-        data = response.json()
-        total = int(data["value"][0]["TotalWorkOrders"])
-        print(
-            f"[bold green]Total Work Orders found:[/bold green][bold yellow] {total}[/bold yellow]"
-        )
+    except ApiError:
+        return None
 
-        return total
+    total = int(data["value"][0]["TotalWorkOrders"])
+    print(
+        f"[bold green]Total Work Orders found:[/bold green][bold yellow] {total}[/bold yellow]"
+    )
 
-    else:
-        return None
+    return total
 
 def generate_customer_filter(*customers, exclude) -> str:
+    # report_types stores one customer as a str and several as a tuple, an
+    # empty customer means no customer restriction
+    if len(customers) == 1 and isinstance(customers[0], tuple):
+        customers = customers[0]
+
+    customers = [customer for customer in customers if customer]
+
+    if not customers:
+        return ""
+
     if exclude is False:
         join_param = " or "
         comparator = "eq"
@@ -147,75 +256,203 @@ def generate_customer_filter(*customers, exclude) -> str:
     ]
 
     customer_filter_string = join_param.join(customer_filter_list)
-    customer_filter_string = f" and {customer_filter_string}"
+    customer_filter_string = f" and ({customer_filter_string})"
 
     return customer_filter_string
 
 
-def get_work_orders_by_range(start: str, end: str, customer_filter: str) -> list:
-    work_order_dict_list = []
+def _get_work_order_page(params: dict, skip: int | None = None) -> list[dict]:
+    if skip is not None:
+        params = {**params, "skip": skip}
 
-    params = {
+    data = client.get_json(f"{URL}/tables/Activity", params=params, headers=headers)
+    return data["value"]
+
+
+def _work_order_params(start: str, end: str, customer_filter: str, select: str) -> dict:
+    # Without an order the server may page the rows differently from one
+    # request to the next, skipping some and repeating others
+    return {
         "skip": 0,
         "top": 100,
-        "select": "RecordID",
+        "orderby": "RecordID",
+        "select": select,
         "filter": f"ActualCompletedDate ge '{start}T00:00:00' "
         f"and ActualCompletedDate lt '{end}T00:00:00'{customer_filter}",
     }
 
+
+@instrument.timed("list work orders")
+def get_work_order_records(
+    start: str,
+    end: str,
+    customer_filter: str,
+    select: str = "RecordID",
+    max_workers: int = WORK_ORDER_WORKERS,
+    raise_errors: bool = True,
+    keyset: bool | None = None,
+) -> list[dict]:
+    """Page through the work orders completed in the range. With keyset the
+    pages are walked in RecordID order. Otherwise, when the total is known,
+    the page offsets are fetched concurrently by up to max_workers threads,
+    or else walked one at a time until a short page. A failed page raises,
+    or with raise_errors off is printed and the rows so far are returned"""
+    if keyset is None:
+        keyset = KEYSET_PAGING
+
+    work_order_dict_list = []
+    params = _work_order_params(start, end, customer_filter, select)
+
     total_work_orders = get_work_order_count(start, end, customer_filter)
 
-    with Progress() as progress:
+    with progress_bar() as progress:
         task = progress.add_task(
             "Getting work order numbers...", total=total_work_orders
         )
 
-        while True:
-            progress.update(task, advance=100)
-            try:
-                response = requests.get(
-                    f"{URL}/tables/Activity", params=params, headers=headers
-                )
+        try:
+            skip = 0
+            page = []
+
+            if keyset:
+                cursor = paging.KeysetCursor(params)
+
+                while not cursor.done:
+                    page = _get_work_order_page(cursor.next_params())
+                    cursor.advance(page)
+                    work_order_dict_list.extend(page)
+                    progress.update(task, advance=len(page))
+
+            elif total_work_orders is not None and max_workers > 1:
+                offsets = range(0, max(total_work_orders, 1), 100)
+
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    # map() yields in submission order, so pages stay sorted
+                    for page in executor.map(
+                        lambda offset: _get_work_order_page(params, offset), offsets
+                    ):
+                        progress.update(task, advance=100)
+                        work_order_dict_list.extend(page)
+
+                skip = offsets[-1] + 100
+
+            # Sequential paging, or picking up rows added after the count
+            if not keyset and (
+                total_work_orders is None or max_workers <= 1 or len(page) == 100
+            ):
+                while True:
+                    progress.update(task, advance=100)
+                    page = _get_work_order_page(params, skip)
+                    work_order_dict_list.extend(page)
+
+                    if len(page) < 100:
+                        break
 
-                if response.status_code != 200:
-                    print(response.status_code)
-                    print(response.content)
-                    continue
+                    skip += 100
 
-                data = response.json()
-                work_order_dict_list.extend(data["value"])
+        except Exception:
+            if raise_errors:
+                raise
+            print(traceback.format_exc())
 
-                if data["count"] < 100:
-                    break
+    # Pages can overlap if work orders are completed mid-run
+    records = {item["RecordID"]: item for item in work_order_dict_list}
 
-                params["skip"] += 100
+    return list(records.values())
 
-            except Exception:
-                print(traceback.format_exc())
 
-    work_order_list = [item["RecordID"] for item in work_order_dict_list]
+def get_work_orders_by_range(
+    start: str,
+    end: str,
+    customer_filter: str,
+    max_workers: int = WORK_ORDER_WORKERS,
+    keyset: bool | None = None,
+    raise_errors: bool = True,
+) -> list:
+    records = get_work_order_records(
+        start, end, customer_filter, max_workers=max_workers, raise_errors=raise_errors,
+        keyset=keyset,
+    )
 
-    return work_order_list
+    return [record["RecordID"] for record in records]
 
 
-def parameterize_wo_list(wo_list: list) -> list:
-    """Break large work order list into bite-sized chunks to pass as
-    filter params"""
-    filter_list = []
+def _encoded_length(text: str) -> int:
+    # requests encodes params with urlencode, which quotes with quote_plus
+    return len(quote_plus(text))
+
+
+class FilterChunker:
+    """Packs work orders, fed one at a time, into filter chunks of at most
+    budget bytes of URL encoded filter, after leaving room for item_filter,
+    the rest of the filter text sent alongside the chunk"""
+
+    def __init__(
+        self, item_filter: str = "", budget: int | None = None, compact: bool | None = None
+    ):
+        self.budget = FILTER_BYTE_BUDGET if budget is None else budget
+        self.compact = USE_IN_OPERATOR if compact is None else compact
+
+        if self.compact:
+            self.opening, self.joiner, self.closing = "ActivityNo in (", ",", ")"
+        else:
+            self.opening, self.joiner, self.closing = "(", " or ", ")"
+
+        self.fixed_length = _encoded_length(item_filter + self.opening + self.closing)
+        self.joiner_length = _encoded_length(self.joiner)
+        self.chunk = []
+        self.chunk_length = self.fixed_length
+
+    def _clause(self, num) -> str:
+        return f"'{num}'" if self.compact else f"ActivityNo eq '{num}'"
+
+    def add(self, num) -> str | None:
+        """Add a work order, returns the previous chunk if this one didn't fit"""
+        clause = self._clause(num)
+        clause_length = _encoded_length(clause)
+        added_length = clause_length + (self.joiner_length if self.chunk else 0)
+        full_chunk = None
+
+        # A chunk always takes at least one clause, even an oversized one
+        if self.chunk and self.chunk_length + added_length > self.budget:
+            full_chunk = self.flush()
+            added_length = clause_length
+
+        self.chunk.append(clause)
+        self.chunk_length += added_length
+
+        return full_chunk
+
+    def flush(self) -> str | None:
+        if not self.chunk:
+            return None
 
-    for num in wo_list:
-        filter_list.append(f"ActivityNo eq '{num}'")
+        chunk = self.opening + self.joiner.join(self.chunk) + self.closing
+        self.chunk = []
+        self.chunk_length = self.fixed_length
 
-    total = len(wo_list)
-    slice_size = 10
-    split_list = [filter_list[i : i + slice_size] for i in range(0, total, slice_size)]
-    param_list = []
+        return chunk
 
-    for item in split_list:
-        param_list.append(" or ".join(item))
+
+def parameterize_wo_list(
+    wo_list: list,
+    item_filter: str = "",
+    budget: int | None = None,
+    compact: bool | None = None,
+) -> list:
+    """Break large work order list into bite-sized chunks to pass as
+    filter params, packed by FilterChunker"""
+    chunker = FilterChunker(item_filter, budget, compact)
+
+    param_list = [chunk for chunk in map(chunker.add, wo_list) if chunk is not None]
+
+    last_chunk = chunker.flush()
+    if last_chunk is not None:
+        param_list.append(last_chunk)
 
     return param_list
 
+
 def get_items_per_work_order(work_order_num: int) -> list[dict]:
         params = {
             "skip": 0,
@@ -224,132 +461,264 @@ def get_items_per_work_order(work_order_num: int) -> list[dict]:
             "filter": f"ActivityNo eq '{work_order_num}'"
         }
 
-        response = requests.get(
+        data = client.get_json(
             f"{URL}/tables/ActivityJobItems",
             params=params, headers=headers
         )
 
-        data = response.json()
         if "value" in data:
             data = data["value"]
 
         return data
 
 
-def get_job_items(work_order_num_list, item_filter) -> list[dict]:
-    data_list = []
-    param_list = parameterize_wo_list(work_order_num_list)
-
-    with Progress() as progress:
-        task = progress.add_task("Getting work order items...", total=len(param_list))
-
-        for work_order_parameter in param_list:
-            progress.update(task, advance=1)
-
-            params = {
-                "skip": 0,
-                "top": 100,
-                "select": "Item, Qty",
-                "filter": f"contains(Item, '{item_filter}') and {work_order_parameter}",
-            }
-
-            try:
-                while True:
-                    response = requests.get(
-                        f"{URL}/tables/ActivityJobItems", params=params, headers=headers
-                    )
-
-                    if response.status_code != 200:
-                        print(response.status_code)
-                        print(response.content)
-                        continue
+def _keyset_key(keyset: bool | None) -> str | None:
+    """Key for async_fetch to walk pages by, None to page by skip"""
+    if keyset is None:
+        keyset = KEYSET_PAGING
 
-                    data = response.json()
+    return paging.KEYSET_KEY if keyset else None
 
-                    if "value" in data:
-                        data_list.extend(data["value"])
 
-                        if data["count"] < 100:
-                            break
+@instrument.timed("job items")
+def get_job_items(
+    work_order_num_list,
+    item_filter,
+    max_concurrency: int = async_fetch.MAX_CONCURRENCY,
+    keyset: bool | None = None,
+    raise_errors: bool = True,
+) -> list[dict]:
+    item_filter_prefix = f"contains(Item, '{item_filter}') and "
+    param_list = parameterize_wo_list(work_order_num_list, item_filter_prefix)
 
-                        params["skip"] += 100
+    param_sets = [
+        {
+            "skip": 0,
+            "top": 100,
+            "select": "Item, Qty",
+            "filter": item_filter_prefix + work_order_parameter,
+        }
+        for work_order_parameter in param_list
+    ]
 
-                    else:
-                        data_list.extend(data)
-                        break
+    with progress_bar() as progress:
+        task = progress.add_task("Getting work order items...", total=len(param_list))
 
-            except Exception:
-                print(traceback.format_exc())
+        data_list = async_fetch.fetch_all(
+            f"{URL}/tables/ActivityJobItems", param_sets, headers,
+            max_concurrency=max_concurrency,
+            on_query_done=lambda: progress.update(task, advance=1),
+            raise_errors=raise_errors,
+            keyset=_keyset_key(keyset),
+        )
 
     return data_list
 
 
-def get_all_job_items(work_order_num_list, item_filter: str | None = None) -> list:
-    data_list = []
-    param_list = parameterize_wo_list(work_order_num_list)
+@instrument.timed("job items")
+def get_all_job_items(
+    work_order_num_list,
+    item_filter: str | None = None,
+    max_concurrency: int = async_fetch.MAX_CONCURRENCY,
+    raise_errors: bool = True,
+    keyset: bool | None = None,
+) -> list:
+    param_sets = _job_item_param_sets(work_order_num_list, item_filter)
+
+    return async_fetch.fetch_all(
+        f"{URL}/tables/ActivityJobItems", param_sets, headers,
+        max_concurrency=max_concurrency, raise_errors=raise_errors,
+        keyset=_keyset_key(keyset),
+    )
 
-    for parameter in param_list:
-        if item_filter:
-            item_filter = f" and contains(Item,'{item_filter}')"
-            parameter = parameter + item_filter
 
-        params = {
+def _job_item_param_sets(work_order_num_list, item_filter: str | None = None) -> list[dict]:
+    """One query per filter chunk of parameterize_wo_list, in chunk order"""
+    item_filter_suffix = f" and contains(Item,'{item_filter}')" if item_filter else ""
+    param_list = [
+        parameter + item_filter_suffix
+        for parameter in parameterize_wo_list(work_order_num_list, item_filter_suffix)
+    ]
+
+    return [
+        {
             "skip": 0,
             "top": 100,
             "select": "ActivityNo, Item, Qty, Amount",
             "filter": parameter,
         }
+        for parameter in param_list
+    ]
+
+
+@instrument.timed("item totals")
+def get_item_totals(
+    work_order_num_list, item_filter, max_concurrency: int = async_fetch.MAX_CONCURRENCY
+) -> list[dict]:
+    """Sum Qty per Item on the server with $apply/groupby. Rows come back
+    shaped like job items ({"Item", "Qty"}) so tally_labor_items can add up
+    the per chunk totals exactly as it does raw items. Raises ApiError if
+    the server rejects the aggregation"""
+    item_filter_prefix = f"contains(Item, '{item_filter}') and "
+    aggregation = "/groupby((Item), aggregate(Qty with sum as Hours))"
+    param_list = parameterize_wo_list(
+        work_order_num_list, f"filter({item_filter_prefix}){aggregation}"
+    )
+
+    param_sets = [
+        {"apply": f"filter({item_filter_prefix}{work_order_parameter}){aggregation}"}
+        for work_order_parameter in param_list
+    ]
+
+    rows = async_fetch.fetch_all(
+        f"{URL}/tables/ActivityJobItems", param_sets, headers,
+        max_concurrency=max_concurrency, raise_errors=True,
+    )
+
+    return [{"Item": row["Item"], "Qty": row["Hours"]} for row in rows]
+
+
+def _aggregation_rejected(error: ApiError) -> bool:
+    """Whether the server refused a groupby query on job items, rather than
+    failing in a way a plain item query would fail too"""
+    parts = urlsplit(error.url)
+
+    return (
+        error.status_code in AGGREGATION_REJECTED_STATUSES
+        and parts.path.endswith("/tables/ActivityJobItems")
+        and "apply" in parse_qs(parts.query)
+    )
 
+
+def get_labor_tally(
+    work_orders: list, item_filter: str, tech_names: list, pushdown: bool | None = None
+) -> dict:
+    if pushdown is None:
+        pushdown = AGGREGATE_PUSHDOWN
+
+    if pushdown and work_orders:
         try:
-            while True:
-                response = requests.get(
-                    f"{URL}/tables/ActivityJobItems", params=params, headers=headers
-                )
+            item_totals = get_item_totals(work_orders, item_filter)
+
+        except ApiError as error:
+            if not _aggregation_rejected(error):
+                raise
+
+            print(
+                f"[yellow]Server side aggregation failed ({error.status_code}), "
+                f"tallying job items locally[/]"
+            )
+
+        else:
+            return tally_labor_items(item_totals, item_filter, tech_names)
+
+    job_items = get_job_items(work_orders, item_filter)
+    return tally_labor_items(job_items, item_filter, tech_names)
+
+
+@instrument.timed("stream tally")
+def stream_labor_tally(
+    start: str,
+    end: str,
+    customer_filter: str,
+    item_filter: str,
+    tech_names: list,
+    pushdown: bool | None = None,
+    max_concurrency: int = async_fetch.MAX_CONCURRENCY,
+    keyset: bool | None = None,
+) -> dict:
+    """get_labor_tally for a date range without waiting for the work order
+    list, item chunks are fetched and tallied while it is still paging in"""
+    from labor_report import pipeline
 
-                if response.status_code != 200:
-                    print(response.status_code)
-                    print(response.content)
-                    continue
+    if pushdown is None:
+        pushdown = AGGREGATE_PUSHDOWN
 
-                data = response.json()
+    item_filter_prefix = f"contains(Item, '{item_filter}') and "
+    aggregation = "/groupby((Item), aggregate(Qty with sum as Hours))"
 
-                if "value" in data:
-                    data_list.extend(data["value"])
+    if pushdown:
+        chunker = FilterChunker(f"filter({item_filter_prefix}){aggregation}")
+        qty_field = "Hours"
 
-                    if data["count"] < 100:
-                        break
+        def item_params(chunk: str) -> dict:
+            return {"apply": f"filter({item_filter_prefix}{chunk}){aggregation}"}
 
-                    params["skip"] += 100
+    else:
+        chunker = FilterChunker(item_filter_prefix)
+        qty_field = "Qty"
 
-                else:
-                    data_list.extend(data)
-                    break
+        def item_params(chunk: str) -> dict:
+            return {
+                "skip": 0,
+                "top": 100,
+                "select": "Item, Qty",
+                "filter": item_filter_prefix + chunk,
+            }
 
-        except Exception:
-            print(traceback.format_exc())
+    labor_dict = {name: 0 for name in tech_names}
+    classifier = classify.get_classifier(tech_names, (item_filter,))
+
+    with progress_bar() as progress:
+        task = progress.add_task(f"Streaming {item_filter} items...", total=None)
+
+        def tally_page(rows: list[dict]) -> None:
+            for row in rows:
+                tech_index = classifier.tech_for(row["Item"], item_filter)
+                if tech_index >= 0:
+                    labor_dict[tech_names[tech_index]] += row[qty_field]
+            progress.update(task, advance=1)
+
+        try:
+            pipeline.run(
+                f"{URL}/tables/Activity",
+                _work_order_params(start, end, customer_filter, "RecordID"),
+                f"{URL}/tables/ActivityJobItems",
+                item_params,
+                chunker,
+                tally_page,
+                headers,
+                max_concurrency=max_concurrency,
+                keyset=_keyset_key(keyset),
+            )
+
+        except ApiError as error:
+            # Listing and transient failures would fail without pushdown too
+            if not pushdown or not _aggregation_rejected(error):
+                raise
+
+            print(
+                f"[yellow]Server side aggregation failed ({error.status_code}), "
+                f"tallying job items locally[/]"
+            )
+            progress.remove_task(task)
+
+        else:
+            return labor_dict
+
+    return stream_labor_tally(
+        start, end, customer_filter, item_filter, tech_names, False, max_concurrency, keyset
+    )
 
-    return data_list
 
 def divide_item_amounts_per_tech(items: list, tech_names: list) -> dict:
     total_amount = 0
 
     #track total labor hours per tech
     labor_dict = {name: 0 for name in tech_names}
-    tag = "labor:"
+    classifier = classify.get_classifier(tech_names)
 
     for item in items:
-        item_name = item["Item"]
-
-        if not item_name: continue
+        item_class = classifier.classify(item["Item"])
 
-        # If 'labor' in item name, extract tech name, then add tech and hrs to dict
-        if tag in item_name:
-            tech_name = item_name.lstrip(tag)
-            if tech_name in labor_dict:
-                labor_dict[tech_name] += item["Qty"]
+        # If 'labor' in item name, add the named tech's hrs to dict
+        if classify.LABOR_TAG in item_class.techs:
+            tech_index = item_class.techs[classify.LABOR_TAG]
+            if tech_index >= 0:
+                labor_dict[tech_names[tech_index]] += item["Qty"]
 
         # If not a labor item or service call fee, add amount to total for WO
-        elif "Service Call" not in item_name:
+        elif item_class.is_part:
             total_amount += item["Amount"]
 
     total_hours = sum(labor_dict.values())
@@ -357,7 +726,7 @@ def divide_item_amounts_per_tech(items: list, tech_names: list) -> dict:
     proportion_dict = {name: 0 for name in labor_dict.keys()}
 
     for name in proportion_dict.keys():
-        if proportion_dict[name] > 0 and total_hours > 0:
+        if labor_dict[name] > 0 and total_hours > 0:
             # Divide each tech's hours by total hours for a percentage
             proportion_dict[name] = labor_dict[name] / total_hours
 
@@ -368,19 +737,64 @@ def divide_item_amounts_per_tech(items: list, tech_names: list) -> dict:
     return pplh_per_wo_dict
 
 
+def group_by_work_order(job_items: list[dict], work_orders: list = ()) -> dict[str, list[dict]]:
+    items_by_work_order = {str(work_order): [] for work_order in work_orders}
+
+    for item in job_items:
+        items_by_work_order.setdefault(str(item["ActivityNo"]), []).append(item)
+
+    return items_by_work_order
+
+
+def get_items_by_work_order(
+    work_orders: list, raise_errors: bool = True
+) -> dict[str, list[dict]]:
+    """Fetch the job items of many work orders per request and group them
+    by ActivityNo, instead of one request per work order"""
+    return group_by_work_order(
+        get_all_job_items(work_orders, raise_errors=raise_errors), work_orders
+    )
+
+
+@instrument.timed("parts per labor hour")
 def calculate_parts_per_labor_hour(
-        work_orders: list, tech_names: list
+        work_orders: list,
+        tech_names: list,
+        bulk: bool = True,
+        items_by_work_order: dict[str, list[dict]] | None = None,
+        columnar: bool | None = None,
 ) -> dict:
     pplh_dict = {name: 0 for name in tech_names}
 
-    with Progress() as progress:
+    if items_by_work_order is None and bulk:
+        items_by_work_order = get_items_by_work_order(work_orders)
+
+    if items_by_work_order is not None:
+        items = [
+            item for work_order in work_orders
+            for item in items_by_work_order.get(str(work_order), [])
+        ]
+
+        if columnar is None:
+            columnar = len(items) >= COLUMNAR_MIN_ITEMS
+
+        if columnar:
+            from labor_report import columnar as columnar_backend
+
+            return columnar_backend.parts_per_labor_hour(items, tech_names)
+
+    with progress_bar() as progress:
         task = progress.add_task(
             "Calculating parts per labor hour...", total=len(work_orders))
 
         for work_order in work_orders:
             try:
                 # Get all job items from a single WO
-                job_items = get_items_per_work_order(work_order)
+                if items_by_work_order is None:
+                    job_items = get_items_per_work_order(work_order)
+                else:
+                    job_items = items_by_work_order.get(str(work_order), [])
+
                 pplh_per_work_order_dict = divide_item_amounts_per_tech(job_items, tech_names)
 
                 for tech in pplh_per_work_order_dict.keys():
@@ -398,23 +812,32 @@ def calculate_parts_per_labor_hour(
     return pplh_dict
 
 
+@instrument.timed("tally")
+def tally_labor_items(
+    items: list, labor_filter: str, tech_names: list, columnar: bool | None = None
+) -> dict:
+    if columnar is None:
+        columnar = len(items) >= COLUMNAR_MIN_ITEMS
+
+    if columnar:
+        from labor_report import columnar as columnar_backend
+
+        return columnar_backend.tally_labor_items(items, labor_filter, tech_names)
 
-def tally_labor_items(items: list, labor_filter: str, tech_names: list) -> dict:
     labor_dict = {name: 0 for name in tech_names}
-    with Progress() as progress:
+    classifier = classify.get_classifier(tech_names, (labor_filter,))
+
+    with progress_bar() as progress:
         task = progress.add_task(f"Counting {labor_filter}...", total=len(items))
 
         for job_item in items:
             progress.update(task, advance=1)
 
             try:
-                item_name = job_item["Item"]
+                tech_index = classifier.tech_for(job_item["Item"], labor_filter)
 
-                if item_name and labor_filter in item_name:
-                    tech_name_key = item_name.lstrip(labor_filter)
-
-                    if tech_name_key in tech_names:
-                        labor_dict[tech_name_key] += job_item["Qty"]
+                if tech_index >= 0:
+                    labor_dict[tech_names[tech_index]] += job_item["Qty"]
 
             except TypeError:
                 print(traceback.format_exc())
@@ -473,15 +896,9 @@ def get_report_type(types: dict) -> str:
 
 
 def resolve_report_type(key: str, reports_dict: dict) -> tuple[str, str, bool, bool]:
-    exclude_flag = False
-    parts_per_labor_hour_flag = False
     report_type = reports_dict[key]
-
-    if key == "All Internals":
-        exclude_flag = True
-
-    if key == "Parts per labor hour":
-        parts_per_labor_hour_flag = True
+    exclude_flag = report_type.get("exclude", False)
+    parts_per_labor_hour_flag = report_type.get("kind") == "pplh"
 
     return (report_type["customer"],
             report_type["item"],
@@ -489,84 +906,434 @@ def resolve_report_type(key: str, reports_dict: dict) -> tuple[str, str, bool, b
             parts_per_labor_hour_flag)
 
 
+def open_report_store(report_file: str | None = None) -> store.ReportStore:
+    return store.ReportStore(report_file or REPORT_DB_PATH, legacy_json_path=REPORT_FILE_PATH)
+
+
+@instrument.timed("write report")
 def write_report_to_file(
-    new_data: dict, data_name: str, report_file=REPORT_FILE_PATH
+    new_data: dict, data_name: str, report_file: str | None = None
 ) -> None:
-    path = Path(report_file)
+    report_store = open_report_store(report_file)
+    report_store.save(data_name, new_data)
+    report_store.close()
+
+
+def create_report_name(start: str, end: str, report_type: str) -> str:
+    return f"{start}:{end}::{report_type}"
+
+
+@instrument.timed("sync range")
+def sync_range(start: str, end: str, sync_store: sync.SyncStore) -> None:
+    """Bring the local mirror up to date for [start, end), fetching only the
+    completion days that are missing or not yet settled"""
+    for sync_start, sync_end in sync_store.stale_ranges(start, end):
+        print(f"[bold]Syncing[/] {sync_start} to {sync_end}")
+
+        records = get_work_order_records(
+            sync_start, sync_end, "",
+            select=", ".join(sync.WORK_ORDER_FIELDS), raise_errors=True,
+        )
+        job_items = get_all_job_items(
+            [record["RecordID"] for record in records], raise_errors=True
+        )
+
+        sync_store.replace_days(sync_start, sync_end, records, job_items)
 
-    if path.exists():
-        try:
-            with open(report_file, "r") as f:
-                json_data = json.load(f)
-                json_data[data_name] = new_data
 
-        except JSONDecodeError:
-            json_data = {}
+def get_synced_report(
+    start: str, end: str, report_title: str, tech_names: list, sync_store: sync.SyncStore
+) -> dict:
+    sync_range(start, end, sync_store)
+
+    records = sync_store.work_order_records(start, end)
+    items_by_work_order = group_by_work_order(sync_store.job_items(start, end))
+
+    return derive_report(report_title, records, items_by_work_order, tech_names)
 
+
+def _range_filters(report_titles: list[str]) -> tuple[str, str | None]:
+    """Customer filter and item tag that still cover every requested report
+    type. Types mixing included and excluded customers fetch every work
+    order, and types needing every item (pplh, item_share) or different tags
+    fetch every item"""
+    definitions = [report_types[report_title] for report_title in report_titles]
+    customer_sets = []
+
+    for definition in definitions:
+        customers = definition["customer"]
+        if isinstance(customers, str):
+            customers = (customers,)
+        customer_sets.append(
+            (definition.get("exclude", False), [customer for customer in customers if customer])
+        )
+
+    excludes = {exclude for exclude, _ in customer_sets}
+
+    if len(excludes) != 1 or not all(customers for _, customers in customer_sets):
+        customer_filter = ""
+    elif excludes == {True}:
+        # Only a work order every type excludes can be left out
+        excluded = [
+            customer for customer in customer_sets[0][1]
+            if all(customer in customers for _, customers in customer_sets)
+        ]
+        customer_filter = generate_customer_filter(tuple(excluded), exclude=True)
     else:
-        json_data = {}
+        included = dict.fromkeys(
+            customer for _, customers in customer_sets for customer in customers
+        )
+        customer_filter = generate_customer_filter(tuple(included), exclude=False)
 
-    json_data[data_name] = new_data
+    kinds = {definition.get("kind", "tally") for definition in definitions}
+    tags = {definition["item"] for definition in definitions}
+    item_filter = next(iter(tags)) if kinds == {"tally"} and len(tags) == 1 else None
 
-    with open(report_file, "w") as f:
-        json.dump(json_data, f, indent=4)
+    return customer_filter, item_filter
 
 
-def create_report_name(start: str, end: str, report_type: str) -> str:
-    return f"{start}:{end}::{report_type}"
+def fetch_range_data(
+    start: str, end: str, report_titles: list[str] | None = None
+) -> tuple[list[dict], dict[str, list[dict]]]:
+    """The work orders in the range with their customer fields, and their job
+    items. With report_titles only what those report types need is fetched,
+    otherwise enough to derive any entry in report_types"""
+    if report_titles is None:
+        customer_filter, item_filter = "", None
+    else:
+        customer_filter, item_filter = _range_filters(report_titles)
 
+    records = get_work_order_records(
+        start, end, customer_filter, select=", ".join(sync.WORK_ORDER_FIELDS)
+    )
+    work_orders = [record["RecordID"] for record in records]
+    items_by_work_order = group_by_work_order(
+        get_all_job_items(work_orders, item_filter), work_orders
+    )
+
+    return records, items_by_work_order
+
+
+def build_metric(report_title: str, records: list[dict] | None = None) -> aggregate.Metric:
+    """The aggregation metric for one entry of report_types. With records it
+    is limited to the work orders of its customers among them, otherwise it
+    counts every work order it is given"""
+    customers, item, exclude_flag, PPLH_flag = resolve_report_type(
+        key=report_title, reports_dict=report_types
+    )
+
+    work_orders = None if records is None else [
+        record["RecordID"] for record in records
+        if sync.matches_customers(record, customers, exclude_flag)
+    ]
+
+    if PPLH_flag:
+        return aggregate.PartsPerLaborHour(report_title, work_orders)
+
+    if report_types[report_title].get("kind") == "item_share":
+        return aggregate.ItemQuantityShare(report_title, item, work_orders)
+
+    return aggregate.TechTally(report_title, item, work_orders)
+
+
+@instrument.timed("derive reports")
+def derive_reports(
+    report_titles: list[str],
+    records: list[dict],
+    items_by_work_order: dict[str, list[dict]],
+    tech_names: list,
+) -> dict[str, dict]:
+    """Compute report types from already fetched work orders and items, all
+    of them in a single pass over the items"""
+    metrics = [build_metric(report_title, records) for report_title in report_titles]
+
+    return aggregate.aggregate(items_by_work_order, metrics, tech_names)
+
+
+def derive_report(
+    report_title: str,
+    records: list[dict],
+    items_by_work_order: dict[str, list[dict]],
+    tech_names: list,
+) -> dict:
+    return derive_reports([report_title], records, items_by_work_order, tech_names)[report_title]
 
-def get_report() -> None:
-    start_date = get_date("start")
-    end_date = get_date("end")
 
+def load_range_data(
+    start: str, end: str, report_titles: list[str] | None = None
+) -> tuple[list[dict], dict[str, list[dict]]]:
+    """fetch_range_data, or the same from the local mirror with --sync"""
+    if not USE_LOCAL_SYNC:
+        return fetch_range_data(start, end, report_titles)
+
+    sync_store = sync.SyncStore()
+    sync_range(start, end, sync_store)
+    records = sync_store.work_order_records(start, end)
+    items_by_work_order = group_by_work_order(sync_store.job_items(start, end))
+    sync_store.close()
+
+    return records, items_by_work_order
+
+
+def run_batch(start: str, end: str, report_titles: list[str]) -> dict[str, dict]:
+    """Fetch the range once and save every requested report type from it"""
+    cache.set_range(start, end)
     field_tech_list = get_technician_names()
-    
-    # Get user input for report type
-    report_title = get_report_type(report_types)
 
+    records, items_by_work_order = load_range_data(start, end, report_titles)
+
+    reports = derive_reports(report_titles, records, items_by_work_order, field_tech_list)
+
+    for report_title, report_dict in reports.items():
+        write_report_to_file(report_dict, create_report_name(start, end, report_title))
+
+    table = Table(title=f"Saved reports {start} to {end}")
+    table.add_column("Report Type")
+    table.add_column("Total", justify="right")
+
+    for report_title, report_dict in reports.items():
+        table.add_row(report_title, f"{sum(report_dict.values()):.2f}")
+
+    console.print(table)
+    print_cache_stats()
+
+    return reports
+
+
+@instrument.timed("series reports")
+def run_series(
+    start: str, end: str, report_titles: list[str], bucket: str
+) -> dict[str, dict[str, dict]]:
+    """Fetch the range once and save every requested report type as one
+    series report, {bucket start: {tech: value}}, split by completion date"""
+    cache.set_range(start, end)
+    field_tech_list = get_technician_names()
+
+    records, items_by_work_order = load_range_data(start, end, report_titles)
+
+    reports = {report_title: {} for report_title in report_titles}
+
+    for first, bucket_records in series.split_records(records, start, end, bucket).items():
+        bucket_items = {
+            str(record["RecordID"]): items_by_work_order.get(str(record["RecordID"]), [])
+            for record in bucket_records
+        }
+        bucket_reports = derive_reports(
+            report_titles, bucket_records, bucket_items, field_tech_list
+        )
+
+        for report_title, report_dict in bucket_reports.items():
+            reports[report_title][first] = report_dict
+
+    for report_title, report_series in reports.items():
+        report_type = series.series_report_type(report_title, bucket)
+        write_report_to_file(report_series, create_report_name(start, end, report_type))
+
+    table = Table(title=f"Saved {bucket}ly series {start} to {end}")
+    table.add_column("Report Type")
+    table.add_column("Buckets", justify="right")
+    table.add_column("Total", justify="right")
+
+    for report_title, report_series in reports.items():
+        total = sum(sum(report_dict.values()) for report_dict in report_series.values())
+        table.add_row(report_title, str(len(report_series)), f"{total:.2f}")
+
+    console.print(table)
+    print_cache_stats()
+
+    return reports
+
+
+def print_cache_stats() -> None:
+    cache_stats = cache.stats()
+
+    if cache_stats is not None:
+        hits, misses = cache_stats
+        print(f"[bold]API cache:[/] {hits} hits, {misses} misses")
+
+    rate_stats = client.governor.stats()
+
+    if rate_stats.throttles:
+        print(
+            f"[bold]Rate limit:[/] {rate_stats.throttles} throttled, "
+            f"{rate_stats.waited:.1f}s waiting, now {rate_stats.rate:.1f} req/s "
+            f"({rate_stats.throughput:.1f} req/s over the last {ratelimit.WINDOW:.0f}s)"
+        )
+
+
+@instrument.timed("checkpointed report")
+def compute_checkpointed_report(
+    start_date: str,
+    end_date: str,
+    report_title: str,
+    field_tech_list: list,
+    checkpoint_file: str | None = None,
+) -> dict:
+    """compute_report with its progress saved after every job item chunk. A
+    rerun of the same report name picks up the stored work order list and
+    the finished chunks and only fetches the rest. Failed requests raise
+    instead of leaving holes in the report"""
+    customers, item, exclude_flag, _ = resolve_report_type(
+        key=report_title, reports_dict=report_types
+    )
+    metric = build_metric(report_title)
+    name = create_report_name(start_date, end_date, report_title)
+    checkpoints = checkpoint.CheckpointStore(checkpoint_file or CHECKPOINT_FILE_PATH)
+
+    try:
+        work_orders = checkpoints.work_orders(name)
+
+        if work_orders is None:
+            customer_filter = generate_customer_filter(customers, exclude=exclude_flag)
+            records = get_work_order_records(
+                start_date, end_date, customer_filter, raise_errors=True
+            )
+            work_orders = [record["RecordID"] for record in records]
+            checkpoints.start(name, work_orders)
+
+        # Tallies only need the tagged items, the other kinds need every item
+        item_filter = item if isinstance(metric, aggregate.TechTally) else None
+        param_sets = _job_item_param_sets(work_orders, item_filter)
+        partials = checkpoints.partials(name, [params["filter"] for params in param_sets])
+        pending = [chunk for chunk in range(len(param_sets)) if chunk not in partials]
+
+        if partials:
+            print(
+                f"[bold]Resuming[/] {name}: {len(partials)} of {len(param_sets)} "
+                f"chunks already done"
+            )
+
+        def save_partial(position: int, rows: list[dict]) -> None:
+            chunk = pending[position]
+            partials[chunk] = aggregate.aggregate(
+                group_by_work_order(rows), [metric], field_tech_list
+            )[report_title]
+            checkpoints.save_partial(name, chunk, partials[chunk])
+
+        with progress_bar() as progress:
+            task = progress.add_task(
+                "Getting work order items...", total=len(param_sets), completed=len(partials)
+            )
+
+            async_fetch.fetch_all(
+                f"{URL}/tables/ActivityJobItems", [param_sets[chunk] for chunk in pending],
+                headers, raise_errors=True, keyset=_keyset_key(None),
+                on_query_done=lambda: progress.update(task, advance=1),
+                on_rows=save_partial,
+            )
+
+        report_dict = {tech: 0 for tech in field_tech_list}
+        for partial in partials.values():
+            for tech, value in partial.items():
+                report_dict[tech] = report_dict.get(tech, 0) + value
+
+        checkpoints.finish(name)
+
+    finally:
+        checkpoints.close()
+
+    return report_dict
+
+
+@instrument.timed("compute report")
+def compute_report(
+    start_date: str, end_date: str, report_title: str, field_tech_list: list
+) -> dict:
+    """The {tech: value} body of one report type, without prompting or saving"""
     customers, item, exclude_flag, PPLH_flag = resolve_report_type(
         key=report_title, reports_dict=report_types
     )
 
+    if USE_LOCAL_SYNC:
+        sync_store = sync.SyncStore()
+        report_dict = get_synced_report(
+            start_date, end_date, report_title, field_tech_list, sync_store
+        )
+        sync_store.close()
+
+        return report_dict
+
+    if CHECKPOINT_RUNS:
+        return compute_checkpointed_report(start_date, end_date, report_title, field_tech_list)
+
     customer_filter = generate_customer_filter(customers, exclude=exclude_flag)
+    kind = report_types[report_title].get("kind", "tally")
+
+    if kind == "tally" and USE_PIPELINE:
+        return stream_labor_tally(start_date, end_date, customer_filter, item, field_tech_list)
 
     work_orders = get_work_orders_by_range(start_date, end_date, customer_filter)
 
     if PPLH_flag:
-        report_dict = calculate_parts_per_labor_hour(work_orders, field_tech_list)
-    elif item == 'BRAKE CLEANER':
-        pass
-    else:
-        job_items = get_job_items(work_orders, item)
-        report_dict = tally_labor_items(job_items, item, field_tech_list)
+        return calculate_parts_per_labor_hour(work_orders, field_tech_list)
+
+    if kind == "item_share":
+        return aggregate.aggregate(
+            get_items_by_work_order(work_orders), [build_metric(report_title)], field_tech_list
+        )[report_title]
+
+    return get_labor_tally(work_orders, item, field_tech_list)
+
+
+def get_report() -> None:
+    start_date = get_date("start")
+    end_date = get_date("end")
+    cache.set_range(start_date, end_date)
+
+    field_tech_list = get_technician_names()
+    
+    # Get user input for report type
+    report_title = get_report_type(report_types)
+
+    try:
+        report_dict = compute_report(start_date, end_date, report_title, field_tech_list)
+
+    except ApiError as error:
+        # Nothing is saved, a partial report would read as a complete one
+        print(f"[bold red]{report_title} report failed:[/] {escape(str(error))}")
+        return
 
     report_name = create_report_name(start_date, end_date, report_title)
     write_report_to_file(report_dict, report_name)
+    print_cache_stats()
 
 
-def get_stored_data(report_file=REPORT_FILE_PATH) -> tuple[dict, dict]:
-    print("Displaying reports...")
-    with open(report_file, "r") as f:
-        data = json.load(f)
-    return data, {index: item for index, item in (enumerate(data.keys()))}
+def get_report_catalog(report_file: str | None = None) -> dict[int, store.ReportHeader]:
+    """Index -> header of every stored report. The headers are kept for the
+    session and only re-read after the store has changed"""
+    report_store = open_report_store(report_file)
+    version = report_store.version()
+    cache_key = report_file or REPORT_DB_PATH
+    cached = _catalog_cache.get(cache_key)
 
+    if cached is None or cached[0] != version:
+        cached = (version, report_store.catalog())
+        _catalog_cache[cache_key] = cached
 
-def get_user_selection(selection_menu: dict) -> int | None:
+    report_store.close()
+
+    return dict(enumerate(cached[1]))
+
+
+def load_report(name: str, report_file: str | None = None) -> dict | None:
+    report_store = open_report_store(report_file)
+    report = report_store.get(name)
+    report_store.close()
+    return report
+
+
+def get_user_selection(selection_menu: dict[int, store.ReportHeader]) -> int | None:
     table = Table(title="Stored Reports")
     table.add_column("Index")
     table.add_column("Start Date")
     table.add_column("End Date")
     table.add_column("Report Type")
+    table.add_column("Size", justify="right")
 
-    for key, value in selection_menu.items():
-        index = str(key)
-        title = value
-
-        date_range, report_type = title.split("::")
-        start_date, end_date = date_range.split(":")
-
-        table.add_row(index, start_date, end_date, report_type)
+    for key, header in selection_menu.items():
+        table.add_row(
+            str(key), header.start, header.end, header.report_type, f"{header.size:,} B"
+        )
 
     console.print(table)
 
@@ -585,34 +1352,35 @@ def get_user_selection(selection_menu: dict) -> int | None:
 
 
 def list_report() -> None:
-    data, selection_dict = get_stored_data()
+    selection_dict = get_report_catalog()
 
     print("Which report would you like to print?\n")
 
     selection = get_user_selection(selection_dict)
 
     if selection in selection_dict.keys():
-        print_json(data=data[selection_dict[selection]])
+        print_json(data=load_report(selection_dict[selection].name))
 
     else:
         print("[red bold]Invalid selection![/]\n")
 
 
-def delete_report(report_file=REPORT_FILE_PATH) -> None:
-    data, selection_dict = get_stored_data()
+def delete_report(report_file: str | None = None) -> None:
+    selection_dict = get_report_catalog(report_file)
 
     print("Which report would you like to delete?\n")
 
     selection = get_user_selection(selection_dict)
 
     if selection in selection_dict.keys():
-        data.pop(selection_dict[selection])
+        report_name = selection_dict[selection].name
 
         print("[red bold]Deleting the following report:[/]")
-        print(f"[red]{selection_dict[selection]}[/]")
+        print(f"[red]{report_name}[/]")
 
-        with open(report_file, "w") as f:
-            json.dump(data, f, indent=4)
+        report_store = open_report_store(report_file)
+        report_store.delete(report_name)
+        report_store.close()
 
     else:
         print("[red bold]Invalid selection![/]\n")
@@ -623,13 +1391,14 @@ def plot_data() -> None:
     labels = []
 
     while True:
-        data, selection_dict = get_stored_data()
+        selection_dict = get_report_catalog()
         print("Which report would you like to plot?\n")
         selection = get_user_selection(selection_dict)
 
         if selection in selection_dict.keys():
-            labels.append(selection_dict[selection])
-            report_to_plot = data[selection_dict[selection]]
+            report_name = selection_dict[selection].name
+            labels.append(report_name)
+            report_to_plot = load_report(report_name)
 
             print("[green bold]Adding to list: [/]")
             print_json(data=report_to_plot)
@@ -639,9 +1408,106 @@ def plot_data() -> None:
             break
 
     print("\nPlotting data...\n\n")
+    from labor_report.plots import plot_report_data
+
     plot_report_data(*plots_list, data_labels=labels)
 
 
+def chart_file_name(report_name: str, file_format: str) -> str:
+    start, end, report_type = store.split_report_name(report_name)
+    safe_type = "".join(c if c.isalnum() or c in " -_" else "_" for c in report_type)
+    return f"{start}_{end}_{safe_type}.{file_format}"
+
+
+@instrument.timed("render charts")
+def plot_saved_reports(
+    start: str,
+    end: str,
+    out_dir: str,
+    file_format: str = "png",
+    report_titles: list[str] | None = None,
+    max_workers: int | None = None,
+    report_file: str | None = None,
+) -> list[str]:
+    """Render one chart file per saved report inside [start, end], without
+    opening any windows"""
+    from labor_report.plots import ChartJob, render_reports
+
+    report_store = open_report_store(report_file)
+
+    # A series report is plotted with the type it was bucketed from
+    names = [
+        name for name in report_store.find(start=start, end=end)
+        if report_titles is None
+        or series.base_report_type(store.split_report_name(name)[2]) in report_titles
+    ]
+    jobs = [
+        ChartJob(
+            os.path.join(out_dir, chart_file_name(name, file_format)),
+            (report_store.get(name),),
+            [name],
+            title=name,
+        )
+        for name in names
+    ]
+    report_store.close()
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = render_reports(jobs, max_workers=max_workers)
+    print(f"[green]Rendered {len(paths)} chart(s) to {out_dir}[/]")
+
+    return paths
+
+
+@instrument.timed("compare reports")
+def compare_saved_reports(
+    start: str, end: str, report_title: str, report_file: str | None = None
+) -> "Comparison":
+    """Print per technician statistics across every saved report of one type
+    inside [start, end], periods in date order"""
+    from labor_report import stats
+
+    report_store = open_report_store(report_file)
+    names = sorted(
+        report_store.find(start=start, end=end, report_type=report_title),
+        key=store.split_report_name,
+    )
+    comparison = stats.compare(
+        [report_store.get(name) for name in names],
+        [store.split_report_name(name)[0] for name in names],
+    )
+    report_store.close()
+
+    if not names:
+        print(f"[red]No saved {report_title} reports between {start} and {end}[/]")
+        return comparison
+
+    table = Table(title=f"{report_title}, {len(names)} report(s) from {start} to {end}")
+    table.add_column("Technician")
+    for column in ("Mean", "Mean w/ zeros", "Std", *(f"p{q}" for q in stats.PERCENTILES),
+                   "Latest", "Latest z", "Last change"):
+        table.add_column(column, justify="right")
+
+    def cell(value: float) -> str:
+        return "-" if math.isnan(value) else f"{value:,.2f}"
+
+    for row, tech in enumerate(comparison.techs):
+        last_change = comparison.deltas[row, -1] if comparison.deltas.shape[1] else float("nan")
+        table.add_row(
+            tech,
+            cell(comparison.mean[row]),
+            cell(comparison.mean_with_zeros[row]),
+            cell(comparison.std[row]),
+            *(cell(value) for value in comparison.percentiles[:, row]),
+            cell(comparison.values[row, -1]),
+            cell(comparison.z_scores[row, -1]),
+            cell(last_change),
+        )
+
+    console.print(table)
+    return comparison
+
+
 def quit_program() -> None:
     quit()
 
@@ -686,13 +1552,197 @@ def main_menu() -> None:
         return
 
 
-if __name__ == "__main__":
+def _iso_date(value: str) -> str:
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}")
+
+
+def _report_type_list(value: str) -> list[str]:
+    if value == "all":
+        return list(report_types.keys())
+
+    titles = [title.strip() for title in value.split(",") if title.strip()]
+    unknown = [title for title in titles if title not in report_types]
+
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown report type(s): {', '.join(unknown)}. "
+            f"Choose from: {', '.join(report_types)}"
+        )
+
+    return titles
+
+
+def _report_type(value: str) -> str:
+    titles = _report_type_list(value)
+
+    if len(titles) != 1:
+        raise argparse.ArgumentTypeError("expected exactly one report type")
+
+    return titles[0]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="labor-report", description="Labor Report Downloader"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="don't read or write the local API response cache",
+    )
+    parser.add_argument(
+        "--refresh", action="store_true",
+        help="ignore cached API responses and the stored technician roster, "
+        "but store the fresh ones",
+    )
+    parser.add_argument(
+        "--sync", action="store_true",
+        help="compute reports from a local mirror, fetching only missing days",
+    )
+    parser.add_argument(
+        "--checkpoint", action="store_true",
+        help=f"save fetch progress to {CHECKPOINT_FILE_PATH}, a rerun of a failed report "
+        "resumes where it stopped",
+    )
+    parser.add_argument(
+        "--keyset", action="store_true",
+        help="page by RecordID instead of by skip offset, with an adaptive page size",
+    )
+
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="time each stage and API request and print a summary at the end",
+    )
+    parser.add_argument(
+        "--trace", metavar="FILE",
+        help="like --stats, and write every span and request to FILE as JSON",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help=f"run under cProfile, print the slowest calls and save the stats to {PROFILE_PATH}",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser(
+        "run", help="fetch a date range once and save several report types, no prompts"
+    )
+    run_parser.add_argument("--start", required=True, type=_iso_date, help="YYYY-MM-DD")
+    run_parser.add_argument(
+        "--end", required=True, type=_iso_date, help="YYYY-MM-DD, exclusive"
+    )
+    run_parser.add_argument(
+        "--types", default="all", type=_report_type_list,
+        help="comma separated report types, or 'all' (default)",
+    )
+    run_parser.add_argument(
+        "--bucket", choices=series.BUCKETS,
+        help="save each type as one series of day, week or month buckets",
+    )
+
+    plot_parser = subparsers.add_parser(
+        "plot", help="render saved reports in a date range to image files, no window"
+    )
+    plot_parser.add_argument("--start", required=True, type=_iso_date, help="YYYY-MM-DD")
+    plot_parser.add_argument(
+        "--end", required=True, type=_iso_date, help="YYYY-MM-DD, exclusive"
+    )
+    plot_parser.add_argument(
+        "--types", default="all", type=_report_type_list,
+        help="comma separated report types, or 'all' (default)",
+    )
+    plot_parser.add_argument("--out", default=os.path.join("data", "charts"), help="directory")
+    plot_parser.add_argument("--format", default="png", choices=("png", "svg", "pdf"))
+    plot_parser.add_argument(
+        "--workers", type=int, default=None, help="render processes, default one per CPU"
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="compare every technician across saved reports of one type"
+    )
+    compare_parser.add_argument("--start", required=True, type=_iso_date, help="YYYY-MM-DD")
+    compare_parser.add_argument(
+        "--end", required=True, type=_iso_date, help="YYYY-MM-DD, exclusive"
+    )
+    compare_parser.add_argument(
+        "--type", required=True, type=_report_type, help="one report type"
+    )
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    global USE_LOCAL_SYNC, REFRESH_ROSTER, KEYSET_PAGING, CHECKPOINT_RUNS, report_types
+
+    if os.path.exists(REPORT_TYPES_PATH):
+        report_types = classify.load_report_types(REPORT_TYPES_PATH)
+
+    args = build_parser().parse_args(argv)
+    USE_LOCAL_SYNC = args.sync
+    KEYSET_PAGING = args.keyset
+    CHECKPOINT_RUNS = args.checkpoint
+    REFRESH_ROSTER = args.refresh
+
     headers["Authorization"] = initialize_api_key(api_key_file)
 
     if not os.path.exists("data/"):
         os.makedirs("data/")
 
+    if not args.no_cache:
+        cache.enable(refresh=args.refresh)
+
+    if args.stats or args.trace:
+        instrument.enable()
+
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        run_command(args)
+
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            print_profile(profiler)
+
+        instrument.print_summary(console)
+        if args.trace:
+            instrument.write_trace(args.trace)
+
+
+def run_command(args: argparse.Namespace) -> None:
+    if args.command == "run":
+        if args.bucket:
+            run_series(args.start, args.end, args.types, args.bucket)
+        else:
+            run_batch(args.start, args.end, args.types)
+        return
+
+    if args.command == "plot":
+        plot_saved_reports(
+            args.start, args.end, args.out, args.format, args.types, args.workers
+        )
+        return
+
+    if args.command == "compare":
+        compare_saved_reports(args.start, args.end, args.type)
+        return
+
     print("Welcome to Labor Report Downloader\n")
 
     while True:
         main_menu()
+
+
+def print_profile(profiler: cProfile.Profile) -> None:
+    profiler.dump_stats(PROFILE_PATH)
+
+    stats = pstats.Stats(profiler)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_LINES)
+
+
+if __name__ == "__main__":
+    main()
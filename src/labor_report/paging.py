@@ -0,0 +1,110 @@
+"""Keyset (cursor) paging.
+
+Offset paging with skip makes the server walk past every earlier row on each
+page, so deep pages of a large range get slower and slower, and a row
+inserted or deleted mid-run shifts the offsets, skipping or repeating rows.
+A keyset walk orders by a unique key and asks for the rows after the last
+key it has seen, so every page is an index seek whatever its depth.
+
+The page size starts at MIN_PAGE_SIZE, which every endpoint honours, and
+doubles while pages come back fast. The server may cap top below what was
+asked for. A page that is shorter than requested but not shorter than one
+the server already returned in full is either that cap or the last page,
+so the walk goes on, and the size is only capped once the next page comes
+back short at the same length.
+"""
+import time
+
+# Key rows are ordered and resumed by, unique in both tables paged this way
+KEYSET_KEY = "RecordID"
+MIN_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Pages returned faster than this grow the next page, slower ones shrink it
+FAST_PAGE_SECONDS = 0.5
+SLOW_PAGE_SECONDS = 2.0
+
+
+def _literal(value) -> str:
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+class PageSizer:
+    """Page size adapted to how long the last page took"""
+
+    def __init__(
+        self,
+        size: int = MIN_PAGE_SIZE,
+        minimum: int = MIN_PAGE_SIZE,
+        maximum: int = MAX_PAGE_SIZE,
+    ):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.size = min(max(size, minimum), self.maximum)
+
+    def update(self, seconds: float) -> int:
+        if seconds < FAST_PAGE_SECONDS:
+            self.size = min(self.size * 2, self.maximum)
+        elif seconds > SLOW_PAGE_SECONDS:
+            self.size = max(self.size // 2, self.minimum)
+        return self.size
+
+    def cap(self, size: int) -> None:
+        """The server returns at most size rows per page"""
+        self.maximum = max(size, 1)
+        self.minimum = min(self.minimum, self.maximum)
+        self.size = min(self.size, self.maximum)
+
+
+class KeysetCursor:
+    """One keyset walk over the rows matching params. Call next_params for
+    each request and advance with the rows it returned until done"""
+
+    def __init__(self, params: dict, key: str = KEYSET_KEY, sizer: PageSizer | None = None):
+        self.params = {name: value for name, value in params.items() if name not in ("skip", "top")}
+        self.key = key
+        self.sizer = sizer or PageSizer()
+        self.last = None
+        self.done = False
+        # Largest page size the server is known to return in full
+        self._honoured = self.sizer.minimum
+        # Length of a short page that may be a server cap, until the next
+        # page confirms it
+        self._short = None
+        self._started = None
+
+        select = self.params.get("select")
+        if select and key not in (field.strip() for field in select.split(",")):
+            self.params["select"] = f"{select}, {key}"
+
+    def next_params(self) -> dict:
+        params = {**self.params, "orderby": self.key, "top": self.sizer.size}
+
+        if self.last is not None:
+            after = f"{self.key} gt {_literal(self.last)}"
+            base = params.get("filter")
+            params["filter"] = f"({base}) and {after}" if base else after
+
+        self._started = time.perf_counter()
+        return params
+
+    def advance(self, page: list[dict]) -> None:
+        requested = self.sizer.size
+        seconds = time.perf_counter() - self._started
+
+        if page:
+            self.last = page[-1][self.key]
+
+        if len(page) >= requested:
+            self._honoured = max(self._honoured, requested)
+            self._short = None
+            self.sizer.update(seconds)
+        elif len(page) < self._honoured or (self._short is not None and len(page) < self._short):
+            self.done = True
+        elif len(page) == self._short:
+            self._honoured = len(page)
+            self._short = None
+            self.sizer.cap(len(page))
+        else:
+            self._short = len(page)
@@ -0,0 +1,187 @@
+"""Streaming work order -> job item pipeline.
+
+Four stages connected by bounded queues run side by side:
+
+    list work orders -> pack filter chunks -> fetch item pages -> consume
+
+Chunk queries start as soon as the first page of work orders has filled a
+chunk, and item rows are folded into the result while later pages are still
+in flight, so a report takes about as long as its slowest stage rather than
+the sum of them. A full queue blocks the stage feeding it, which keeps memory
+to a few pages per stage however large the range is.
+"""
+import asyncio
+from collections.abc import Callable
+
+from labor_report import client
+from labor_report.async_fetch import MAX_CONCURRENCY, PAGE_SIZE
+from labor_report.paging import KeysetCursor
+
+# Pages or chunks buffered between two stages
+QUEUE_SIZE = 8
+
+_DONE = None
+
+
+async def _get_page(
+    url: str, params: dict, headers: dict, semaphore: asyncio.Semaphore
+) -> list[dict]:
+    async with semaphore:
+        data = await asyncio.to_thread(client.get_json, url, params=params, headers=headers)
+    return data["value"]
+
+
+async def _walk_pages(
+    url: str,
+    params: dict,
+    headers: dict,
+    semaphore: asyncio.Semaphore,
+    out: asyncio.Queue,
+    keyset: str | None = None,
+) -> None:
+    """Put every page of the query on out. With keyset the pages are walked
+    by that key instead of by skip, see paging.py"""
+    if keyset is not None:
+        cursor = KeysetCursor(params, keyset)
+
+        while not cursor.done:
+            page = await _get_page(url, cursor.next_params(), headers, semaphore)
+            # Before waiting on the queue, which would count as page latency
+            cursor.advance(page)
+            await out.put(page)
+
+        return
+
+    skip = params.get("skip", 0)
+
+    while True:
+        page = await _get_page(url, {**params, "skip": skip}, headers, semaphore)
+        await out.put(page)
+
+        if len(page) < PAGE_SIZE:
+            break
+
+        skip += PAGE_SIZE
+
+
+async def _list_work_orders(
+    url: str,
+    params: dict,
+    headers: dict,
+    semaphore: asyncio.Semaphore,
+    out: asyncio.Queue,
+    keyset: str | None = None,
+) -> None:
+    await _walk_pages(url, params, headers, semaphore, out, keyset)
+    await out.put(_DONE)
+
+
+async def _pack_chunks(
+    chunker, pages: asyncio.Queue, out: asyncio.Queue, work_orders: list, workers: int
+) -> None:
+    seen = set()
+
+    while (page := await pages.get()) is not _DONE:
+        for record in page:
+            # Pages can overlap if work orders are completed mid-run
+            if record["RecordID"] in seen:
+                continue
+
+            seen.add(record["RecordID"])
+            work_orders.append(record["RecordID"])
+
+            chunk = chunker.add(record["RecordID"])
+            if chunk is not None:
+                await out.put(chunk)
+
+    last_chunk = chunker.flush()
+    if last_chunk is not None:
+        await out.put(last_chunk)
+
+    for _ in range(workers):
+        await out.put(_DONE)
+
+
+async def _fetch_items(
+    url: str,
+    item_params: Callable[[str], dict],
+    headers: dict,
+    semaphore: asyncio.Semaphore,
+    chunks: asyncio.Queue,
+    out: asyncio.Queue,
+    keyset: str | None = None,
+) -> None:
+    while (chunk := await chunks.get()) is not _DONE:
+        params = item_params(chunk)
+        # Aggregated rows have no key to resume after
+        key = None if "apply" in params else keyset
+        await _walk_pages(url, params, headers, semaphore, out, key)
+
+    await out.put(_DONE)
+
+
+async def _consume(pages: asyncio.Queue, consume: Callable[[list[dict]], None], workers: int):
+    finished = 0
+
+    while finished < workers:
+        page = await pages.get()
+
+        if page is _DONE:
+            finished += 1
+        else:
+            consume(page)
+
+
+async def stream(
+    work_order_url: str,
+    work_order_params: dict,
+    item_url: str,
+    item_params: Callable[[str], dict],
+    chunker,
+    consume: Callable[[list[dict]], None],
+    headers: dict,
+    max_concurrency: int = MAX_CONCURRENCY,
+    queue_size: int = QUEUE_SIZE,
+    keyset: str | None = None,
+) -> list:
+    """Run the pipeline and return the work order numbers it saw.
+
+    work_order_params is the Activity query, item_params turns a filter chunk
+    from chunker (main.FilterChunker) into an item query and consume is
+    called with every page of item rows. At most max_concurrency requests are
+    in flight across the listing and item stages. With keyset the listing and
+    the item queries are paged by that key rather than by skip. The first
+    failure cancels every stage and is raised"""
+    workers = max(max_concurrency, 1)
+    semaphore = asyncio.Semaphore(workers)
+    work_order_pages = asyncio.Queue(queue_size)
+    chunks = asyncio.Queue(queue_size)
+    item_pages = asyncio.Queue(queue_size)
+    work_orders = []
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(
+                _list_work_orders(
+                    work_order_url, work_order_params, headers, semaphore, work_order_pages,
+                    keyset,
+                )
+            )
+            group.create_task(_pack_chunks(chunker, work_order_pages, chunks, work_orders, workers))
+            for _ in range(workers):
+                group.create_task(
+                    _fetch_items(
+                        item_url, item_params, headers, semaphore, chunks, item_pages, keyset
+                    )
+                )
+            group.create_task(_consume(item_pages, consume, workers))
+
+    except ExceptionGroup as errors:
+        raise errors.exceptions[0]
+
+    return work_orders
+
+
+def run(*args, **kwargs) -> list:
+    """Synchronous entry point for stream"""
+    return asyncio.run(stream(*args, **kwargs))
@@ -1,49 +1,75 @@
-import math
+import os
+import multiprocessing
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
 
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from labor_report import series, stats
+
+# Inches and dots per inch of files rendered without a window
+FIGURE_SIZE = (10, 6)
+FIGURE_DPI = 100
 
 
 def _calculate_mean(data_set: dict[str:float | int], ignore_zero=True) -> float:
-    data_sum = 0
-    divisor = 0
-    if ignore_zero:
-        for value in data_set.values():
-            if value > 0:
-                data_sum += value
-                divisor += 1
-    else:
-        for value in data_set.values():
-            data_sum += value
-            divisor += 1
-    if divisor == 0:
-        return 0
-    else:
-        return data_sum / divisor
+    values = stats.align([data_set]).values
+    return stats.mean(values, ignore_zero).item()
 
 
 def calculate_stand_dev(data_set: dict, mean: float | None = None) -> float:
-    if mean is None:
-        mean = _calculate_mean(data_set)
-    total = 0
-    for value in data_set.values():
-        total += (value - +mean) ** 2
-    average_of_total = total / len(data_set)
-    return round(math.sqrt(average_of_total), 4)
+    values = stats.align([data_set]).values
+    means = None if mean is None else np.array([mean], dtype=np.float64)
+    return stats.std(values, means).item()
 
 
-def plot_report_data(
-    *data_sets: dict, data_labels: list, data_type="Hours", title=""
+class ChartJob(NamedTuple):
+    path: str
+    data_sets: tuple[dict, ...]
+    data_labels: list
+    data_type: str = "Hours"
+    title: str = ""
+
+
+def draw_series(
+    ax: Axes, data_sets: Sequence[dict], data_labels: list, data_type="Hours", title=""
 ) -> None:
+    """One line per technician across the buckets of each series report"""
+    for data_set, data_label in zip(data_sets, data_labels):
+        buckets = sorted(data_set)
+        techs, _, values = stats.align([data_set[bucket] for bucket in buckets], buckets)
+
+        for tech, row in zip(techs, values):
+            label = tech if len(data_sets) == 1 else f"{data_label}: {tech}"
+            ax.plot(buckets, row, marker="o", label=label)
+
+    ax.tick_params(axis="x", labelrotation=70)
+    ax.legend(loc="lower center", bbox_to_anchor=(0.5, 1.10), ncol=4, frameon=False)
+
+    ax.set_ylabel(data_type)
+    ax.set_title(title or f"{data_type} per Technician over time")
+
+
+def draw_report(
+    ax: Axes, data_sets: Sequence[dict], data_labels: list, data_type="Hours", title=""
+) -> None:
+    if series.is_series(data_sets[0]):
+        draw_series(ax, data_sets, data_labels, data_type, title)
+        return
+
     width = 0.75
     num_sets = len(data_sets)
     categories = list(data_sets[0].keys())
     bar_spacing = 2
     x = np.arange(len(categories)) * (1 + bar_spacing)
-    fix, ax = plt.subplots(layout="constrained")
 
-    for i, data_set in enumerate(data_sets):
-        mean = _calculate_mean(data_set)
+    means = stats.mean(stats.align(data_sets).values)
+
+    for i, (data_set, mean) in enumerate(zip(data_sets, means)):
         hrs = list(data_set.values())
         offset = (i - (num_sets - 1) / 2) * width
         rects = ax.bar(x + offset, hrs, width, label=data_labels[i])
@@ -57,5 +83,69 @@ def plot_report_data(
     ax.set_xticks(x, categories, rotation=70)
 
     ax.set_ylabel(data_type)
-    ax.set_title("Lost Time hours per Technician")
+    ax.set_title(title or f"{data_type} per Technician")
+
+
+class ChartRenderer:
+    """Renders charts to files without pyplot or a GUI backend. One figure
+    and axes are cleared and reused for every chart, so rendering hundreds
+    of them doesn't pile up figures or rebuild matplotlib state"""
+
+    def __init__(self, figsize: tuple[float, float] = FIGURE_SIZE, dpi: int = FIGURE_DPI):
+        self.figure = Figure(figsize=figsize, dpi=dpi, layout="constrained")
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+
+    def render(self, job: ChartJob) -> str:
+        """Draw job and save it, the format comes from the file suffix
+        (.png, .svg, .pdf)"""
+        self.ax.clear()
+        draw_report(self.ax, job.data_sets, job.data_labels, job.data_type, job.title)
+        self.figure.savefig(job.path)
+        return job.path
+
+
+_worker_renderer = None
+
+
+def _render_in_worker(job: ChartJob) -> str:
+    global _worker_renderer
+
+    if _worker_renderer is None:
+        _worker_renderer = ChartRenderer()
+    return _worker_renderer.render(job)
+
+
+def render_reports(jobs: Iterable[ChartJob], max_workers: int | None = None) -> list[str]:
+    """Render every job to its file and return the paths in job order. Jobs
+    are spread over a process pool, each worker reusing one figure; with
+    max_workers=1 they are rendered in this process"""
+    jobs = list(jobs)
+
+    if max_workers == 1 or len(jobs) <= 1:
+        renderer = ChartRenderer()
+        return [renderer.render(job) for job in jobs]
+
+    # spawn, forking a process that runs fetch threads can deadlock
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        chunksize = max(1, len(jobs) // ((max_workers or os.cpu_count() or 1) * 4))
+        return list(executor.map(_render_in_worker, jobs, chunksize=chunksize))
+
+
+def plot_report_data(
+    *data_sets: dict, data_labels: list, data_type="Hours", title="", output: str | None = None
+) -> None:
+    """Show the reports side by side, series reports as lines over time, or
+    save the chart to output without opening a window"""
+    if output is not None:
+        ChartRenderer().render(ChartJob(output, data_sets, data_labels, data_type, title))
+        return
+
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(layout="constrained")
+    draw_report(ax, data_sets, data_labels, data_type, title)
     plt.show()
+    plt.close(fig)
@@ -0,0 +1,127 @@
+"""Token bucket shared by every thread that talks to the API.
+
+The governor starts out unlimited. The first 429 caps it at a fraction of
+the throughput measured so far, a 429 for a request sent at the capped rate
+cuts it again, and every successful request lets it creep back up (additive
+increase, multiplicative decrease). A Retry-After pauses every caller, not just the one
+that got the 429, so concurrent paging waits out the limit together instead
+of each worker hitting it in turn.
+"""
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+# Requests per second never drops below MIN_RATE or climbs past MAX_RATE
+MIN_RATE = 1.0
+MAX_RATE = 200.0
+# Requests that may go out back to back before the rate applies
+BURST = 4
+# Rate is multiplied by this on a 429. Requests sent before the last cut
+# were paced at the old rate, so their 429s don't cut it again
+DECREASE = 0.7
+# Requests per second regained with every successful request
+INCREASE = 0.5
+# Seconds of history behind the throughput figure
+WINDOW = 10.0
+
+
+class GovernorStats(NamedTuple):
+    rate: float | None
+    throughput: float
+    requests: int
+    throttles: int
+    waited: float
+
+
+class RateGovernor:
+    def __init__(self, rate: float | None = None, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset(rate)
+
+    def reset(self, rate: float | None = None) -> None:
+        with self._lock:
+            self.rate = rate
+            self._tokens = float(BURST)
+            self._last = self._clock()
+            self._paused_until = 0.0
+            self._decreased_at = None
+            self._sent = deque()
+            self.requests = 0
+            self.throttles = 0
+            self.waited = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            elapsed = max(now - self._last, 0.0)
+            self._tokens = min(float(BURST), self._tokens + elapsed * self.rate)
+        self._last = max(now, self._last)
+
+    def _throughput(self, now: float) -> float:
+        """Requests per second over the last WINDOW seconds, or since the
+        first request if that was more recent"""
+        while self._sent and self._sent[0] < now - WINDOW:
+            self._sent.popleft()
+
+        if len(self._sent) < 2:
+            return len(self._sent) / WINDOW
+
+        elapsed = now - self._sent[0]
+        return MAX_RATE if elapsed <= 0 else min(len(self._sent) / elapsed, MAX_RATE)
+
+    def acquire(self) -> float:
+        """Block until this request may be sent and return the clock time it
+        was let through. A token is reserved up front so waiters are served
+        in arrival order"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+
+            ready = self._paused_until
+            if self.rate is not None:
+                self._tokens -= 1
+                if self._tokens < 0:
+                    ready = max(ready, self._last - self._tokens / self.rate)
+            wait = max(ready - now, 0.0)
+
+            self.requests += 1
+            self.waited += wait
+            self._sent.append(now + wait)
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return now + wait
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate is not None:
+                self.rate = min(MAX_RATE, self.rate + INCREASE)
+
+    def on_throttle(self, pause: float = 0.0, sent_at: float | None = None) -> None:
+        """A 429 came back for the request acquire let through at sent_at,
+        slow down and hold every caller for pause seconds"""
+        with self._lock:
+            now = self._clock()
+            self.throttles += 1
+
+            if self._decreased_at is None or sent_at is None or sent_at >= self._decreased_at:
+                if self.rate is None:
+                    self.rate = self._throughput(now)
+                self.rate = max(MIN_RATE, self.rate * DECREASE)
+                self._decreased_at = now
+
+            if pause > 0:
+                self._paused_until = max(self._paused_until, now + pause)
+                # Only the first request goes out when the pause ends, no
+                # tokens build up while paused
+                self._tokens = min(self._tokens, 1.0)
+                self._last = max(self._last, self._paused_until)
+
+    def stats(self) -> GovernorStats:
+        with self._lock:
+            return GovernorStats(
+                self.rate, self._throughput(self._clock()), self.requests, self.throttles,
+                self.waited,
+            )
@@ -0,0 +1,188 @@
+import os
+import time
+import sqlite3
+
+from labor_report import client
+from labor_report.client import ApiError
+
+ROSTER_FILE_PATH = os.path.join("data", "roster.sqlite")
+
+# Seconds a fetched roster is used without asking the API at all
+ROSTER_TTL = 12 * 60 * 60
+# Delta refreshes can't see deleted technicians, so the whole table is
+# re-read at least this often
+FULL_REFRESH_AGE = 7 * 24 * 60 * 60
+PAGE_SIZE = 100
+MODIFIED_FIELD = "LastModifiedDate"
+FIELDS = ("RecordID", "FullName", MODIFIED_FIELD)
+# Selected once the table turned out to have no usable MODIFIED_FIELD
+BASE_FIELDS = ("RecordID", "FullName")
+
+
+def fetch_technicians(
+    url: str,
+    headers: dict,
+    modified_since: str | None = None,
+    fields: tuple[str, ...] = FIELDS,
+) -> list[dict]:
+    """Every FieldTechnicians row, paged PAGE_SIZE at a time. With
+    modified_since only rows changed after it are requested"""
+    params = {"skip": 0, "top": PAGE_SIZE, "select": ",".join(fields), "orderby": "RecordID"}
+    if modified_since is not None:
+        params["filter"] = f"{MODIFIED_FIELD} gt '{modified_since}'"
+
+    rows = []
+    while True:
+        # Straight to the client, the roster keeps its own cache
+        data = client.get(f"{url}/tables/FieldTechnicians", params, headers).json()
+        rows.extend(data["value"])
+
+        if data.get("count", len(data["value"])) < PAGE_SIZE:
+            return rows
+
+        params["skip"] += PAGE_SIZE
+
+
+class RosterStore:
+    """The technician table kept on disk. Each technician keeps the index it
+    was first given, so the roster can be used as a name -> index map"""
+
+    def __init__(self, path: str = ROSTER_FILE_PATH):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS technicians (
+                RecordID TEXT PRIMARY KEY,
+                FullName TEXT NOT NULL,
+                modified TEXT,
+                position INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+            """
+        )
+
+    def _meta(self, key: str):
+        row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _set_meta(self, **values) -> None:
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)", list(values.items())
+        )
+
+    @property
+    def refreshed_at(self) -> float | None:
+        return self._meta("refreshed_at")
+
+    @property
+    def full_refreshed_at(self) -> float | None:
+        return self._meta("full_refreshed_at")
+
+    @property
+    def supports_delta(self) -> bool:
+        return self._meta("supports_delta") != 0
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return self.refreshed_at is not None and now - self.refreshed_at < ROSTER_TTL
+
+    def high_water(self) -> str | None:
+        """Latest modified time seen, where the next delta refresh starts"""
+        return self._connection.execute("SELECT MAX(modified) FROM technicians").fetchone()[0]
+
+    def replace(self, rows: list[dict], now: float | None = None) -> None:
+        now = time.time() if now is None else now
+
+        with self._connection:
+            self._connection.execute("DELETE FROM technicians")
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO technicians VALUES (?, ?, ?, ?)",
+                [
+                    (str(row["RecordID"]), row["FullName"], row.get(MODIFIED_FIELD), position)
+                    for position, row in enumerate(rows)
+                ],
+            )
+            self._set_meta(refreshed_at=now, full_refreshed_at=now)
+
+    def merge(self, rows: list[dict], now: float | None = None) -> None:
+        """Apply a delta: changed technicians keep their index, new ones are
+        appended"""
+        now = time.time() if now is None else now
+
+        with self._connection:
+            for row in rows:
+                updated = self._connection.execute(
+                    "UPDATE technicians SET FullName = ?, modified = ? WHERE RecordID = ?",
+                    (row["FullName"], row.get(MODIFIED_FIELD), str(row["RecordID"])),
+                )
+                if updated.rowcount == 0:
+                    self._connection.execute(
+                        "INSERT INTO technicians VALUES (?, ?, ?, "
+                        "(SELECT COALESCE(MAX(position) + 1, 0) FROM technicians))",
+                        (str(row["RecordID"]), row["FullName"], row.get(MODIFIED_FIELD)),
+                    )
+            self._set_meta(refreshed_at=now)
+
+    def mark_delta_unsupported(self) -> None:
+        with self._connection:
+            self._set_meta(supports_delta=0)
+
+    def names(self) -> list[str]:
+        return [
+            row[0] for row in
+            self._connection.execute("SELECT FullName FROM technicians ORDER BY position")
+        ]
+
+    def index(self) -> dict[str, int]:
+        """Name -> position in names()"""
+        return {name: position for position, name in enumerate(self.names())}
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def refresh(
+    roster_store: RosterStore,
+    url: str,
+    headers: dict,
+    force: bool = False,
+    now: float | None = None,
+) -> bool:
+    """Bring the stored roster up to date, returns False when the stored copy
+    was fresh enough to use without asking the API"""
+    now = time.time() if now is None else now
+
+    if not force and roster_store.is_fresh(now):
+        return False
+
+    full_refreshed_at = roster_store.full_refreshed_at
+    high_water = roster_store.high_water()
+
+    if (
+        not force
+        and roster_store.supports_delta
+        and high_water is not None
+        and full_refreshed_at is not None
+        and now - full_refreshed_at < FULL_REFRESH_AGE
+    ):
+        try:
+            roster_store.merge(fetch_technicians(url, headers, high_water), now)
+            return True
+        except ApiError as error:
+            if error.status_code != 400:
+                raise
+            # The table can't be filtered on MODIFIED_FIELD, stop trying
+            roster_store.mark_delta_unsupported()
+
+    if roster_store.supports_delta:
+        try:
+            roster_store.replace(fetch_technicians(url, headers), now)
+            return True
+        except ApiError as error:
+            if error.status_code != 400:
+                raise
+            # The table has no MODIFIED_FIELD to select either
+            roster_store.mark_delta_unsupported()
+
+    roster_store.replace(fetch_technicians(url, headers, fields=BASE_FIELDS), now)
+    return True
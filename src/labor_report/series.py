@@ -0,0 +1,79 @@
+"""Splitting one fetched range into day, week or month buckets.
+
+A series report body maps each bucket's first day to an ordinary report
+body, {bucket start: {tech: value}}, so every bucket of a year costs no more
+API calls than the year as a whole.
+"""
+from datetime import date, timedelta
+
+BUCKETS = ("day", "week", "month")
+
+
+def bucket_start(day: str, bucket: str) -> str:
+    """First day of the bucket holding day, weeks start on Monday"""
+    when = date.fromisoformat(day[:10])
+
+    if bucket == "day":
+        return when.isoformat()
+    if bucket == "week":
+        return (when - timedelta(days=when.weekday())).isoformat()
+    if bucket == "month":
+        return when.replace(day=1).isoformat()
+
+    raise ValueError(f"unknown bucket {bucket!r}, expected one of {', '.join(BUCKETS)}")
+
+
+def _next_bucket(start: str, bucket: str) -> str:
+    when = date.fromisoformat(start)
+
+    if bucket == "day":
+        return (when + timedelta(days=1)).isoformat()
+    if bucket == "week":
+        return (when + timedelta(days=7)).isoformat()
+
+    return (when.replace(day=28) + timedelta(days=4)).replace(day=1).isoformat()
+
+
+def bucket_ranges(start: str, end: str, bucket: str) -> list[tuple[str, str]]:
+    """[first, last) of every bucket overlapping [start, end), clipped to it"""
+    ranges = []
+    first = bucket_start(start, bucket)
+
+    while first < end:
+        last = _next_bucket(first, bucket)
+        ranges.append((max(first, start), min(last, end)))
+        first = last
+
+    return ranges
+
+
+def split_records(records: list[dict], start: str, end: str, bucket: str) -> dict[str, list[dict]]:
+    """Bucket start -> work orders completed in it, every bucket of the
+    range present even when empty. Keys are clipped to start like
+    bucket_ranges"""
+    buckets = {first: [] for first, _ in bucket_ranges(start, end, bucket)}
+
+    for record in records:
+        completed = record["ActualCompletedDate"][:10]
+        buckets[max(bucket_start(completed, bucket), start)].append(record)
+
+    return buckets
+
+
+def is_series(report: dict) -> bool:
+    return bool(report) and all(isinstance(value, dict) for value in report.values())
+
+
+def series_report_type(report_type: str, bucket: str) -> str:
+    return f"{report_type} by {bucket}"
+
+
+def base_report_type(report_type: str) -> str:
+    """Report type a series_report_type name was made from, other names are
+    returned as they are"""
+    for bucket in BUCKETS:
+        suffix = f" by {bucket}"
+        if report_type.endswith(suffix):
+            return report_type.removesuffix(suffix)
+
+    return report_type
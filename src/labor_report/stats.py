@@ -0,0 +1,123 @@
+"""Statistics over many saved reports at once.
+
+Reports are aligned into a technicians x reports matrix, NaN where a
+technician is missing from a report, and every statistic is one NumPy
+reduction over that matrix. axis=0 reduces each report over its
+technicians (what a chart's average line shows), axis=1 reduces each
+technician over the reports (what the comparison table shows).
+"""
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import numpy as np
+
+# Percentiles shown for every technician across the compared reports
+PERCENTILES = (50, 90)
+
+
+class ReportMatrix(NamedTuple):
+    techs: list[str]
+    labels: list[str]
+    values: np.ndarray
+
+
+class Comparison(NamedTuple):
+    techs: list[str]
+    labels: list[str]
+    values: np.ndarray
+    mean: np.ndarray
+    mean_with_zeros: np.ndarray
+    std: np.ndarray
+    percentiles: np.ndarray
+    z_scores: np.ndarray
+    deltas: np.ndarray
+
+
+def align(reports: Sequence[dict], labels: Sequence[str] | None = None) -> ReportMatrix:
+    """Technicians in first seen order, one column per report"""
+    index = {}
+    for report in reports:
+        for name in report:
+            index.setdefault(name, len(index))
+
+    values = np.full((len(index), len(reports)), np.nan)
+    for column, report in enumerate(reports):
+        rows = np.fromiter((index[name] for name in report), dtype=np.int64, count=len(report))
+        values[rows, column] = np.fromiter(
+            report.values(), dtype=np.float64, count=len(report)
+        )
+
+    labels = list(labels) if labels is not None else [str(i) for i in range(len(reports))]
+    return ReportMatrix(list(index), labels, values)
+
+
+def mean(values: np.ndarray, ignore_zero=True, axis=0) -> np.ndarray:
+    """Mean of the present values, of the positive ones if ignore_zero.
+    0 where nothing is left, like plots._calculate_mean"""
+    counted = values > 0 if ignore_zero else ~np.isnan(values)
+    total = np.where(counted, values, 0).sum(axis=axis)
+    count = counted.sum(axis=axis)
+    return np.divide(total, count, out=np.zeros(total.shape), where=count > 0)
+
+
+def std(values: np.ndarray, means: np.ndarray | None = None, axis=0) -> np.ndarray:
+    """Population standard deviation of every present value, zeros
+    included, around means (the zero ignoring mean by default), rounded to 4
+    places like plots.calculate_stand_dev"""
+    if means is None:
+        means = mean(values, axis=axis)
+
+    present = ~np.isnan(values)
+    squares = np.where(present, (values - np.expand_dims(means, axis)) ** 2, 0)
+    count = present.sum(axis=axis)
+    variance = np.divide(
+        squares.sum(axis=axis), count, out=np.zeros(means.shape), where=count > 0
+    )
+    return np.round(np.sqrt(variance), 4)
+
+
+def percentiles(
+    values: np.ndarray, q: Sequence[float] = PERCENTILES, axis=0
+) -> np.ndarray:
+    """One row per percentile in q, NaN where nothing is present"""
+    values = np.moveaxis(values, axis, -1)
+    result = np.full((len(q), values.shape[0]), np.nan)
+    present = ~np.isnan(values).all(axis=-1)
+    if present.any():
+        result[:, present] = np.nanpercentile(values[present], q, axis=-1)
+    return result
+
+
+def z_scores(values: np.ndarray, axis=0) -> np.ndarray:
+    """Standard scores against the zero ignoring mean, 0 where the spread is 0"""
+    means = mean(values, axis=axis)
+    spread = np.expand_dims(std(values, means, axis=axis), axis)
+    deviation = values - np.expand_dims(means, axis)
+    return np.divide(
+        deviation, spread, out=np.where(np.isnan(values), np.nan, 0.0), where=spread > 0
+    )
+
+
+def deltas(values: np.ndarray) -> np.ndarray:
+    """Change from each report to the next, reports in period order. One
+    column fewer than values, NaN where either side is missing"""
+    return np.diff(values, axis=1)
+
+
+def compare(reports: Sequence[dict], labels: Sequence[str] | None = None) -> Comparison:
+    """Every per technician statistic across reports in one pass over the
+    aligned matrix"""
+    techs, labels, values = align(reports, labels)
+    means = mean(values, axis=1)
+
+    return Comparison(
+        techs,
+        labels,
+        values,
+        means,
+        mean(values, ignore_zero=False, axis=1),
+        std(values, means, axis=1),
+        percentiles(values, axis=1),
+        z_scores(values, axis=1),
+        deltas(values),
+    )
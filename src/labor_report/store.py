@@ -0,0 +1,163 @@
+import os
+import json
+import sqlite3
+from json import JSONDecodeError
+from typing import NamedTuple
+
+REPORT_DB_PATH = os.path.join("data", "reports.sqlite")
+
+
+def split_report_name(name: str) -> tuple[str, str, str]:
+    """Inverse of main.create_report_name: (start, end, report type)"""
+    date_range, _, report_type = name.partition("::")
+    start, _, end = date_range.partition(":")
+    return start, end, report_type
+
+
+class ReportHeader(NamedTuple):
+    name: str
+    start: str
+    end: str
+    report_type: str
+    size: int
+
+
+class ReportStore:
+    """Saved reports in SQLite. Each save or delete touches one row inside a
+    transaction, so a crash can't leave a half written archive behind"""
+
+    def __init__(self, path: str = REPORT_DB_PATH, legacy_json_path: str | None = None):
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL,
+                report_type TEXT NOT NULL,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS reports_start ON reports (start);
+            CREATE INDEX IF NOT EXISTS reports_end ON reports (end);
+            CREATE INDEX IF NOT EXISTS reports_type ON reports (report_type);
+
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta VALUES ('version', 0);
+            """
+        )
+        self._add_size_column()
+
+        if legacy_json_path is not None:
+            self.migrate_json(legacy_json_path)
+
+    def _add_size_column(self) -> None:
+        """Stores made before bodies had their size kept get it filled in once"""
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(reports)")]
+        if "size" in columns:
+            return
+
+        with self._connection:
+            self._connection.execute(
+                "ALTER TABLE reports ADD COLUMN size INTEGER NOT NULL DEFAULT 0"
+            )
+            self._connection.execute("UPDATE reports SET size = length(CAST(body AS BLOB))")
+
+    def migrate_json(self, json_path: str) -> int:
+        """One time import of the old reports.json. The file is renamed
+        afterwards so it is never imported twice"""
+        if not os.path.exists(json_path):
+            return 0
+
+        try:
+            with open(json_path, "r") as f:
+                json_data = json.load(f)
+        except JSONDecodeError:
+            json_data = {}
+
+        with self._connection:
+            for name, body in json_data.items():
+                self._upsert(name, body)
+            self._bump_version()
+
+        os.replace(json_path, f"{json_path}.migrated")
+        return len(json_data)
+
+    def _upsert(self, name: str, body: dict) -> None:
+        start, end, report_type = split_report_name(name)
+        text = json.dumps(body)
+        self._connection.execute(
+            "INSERT INTO reports (name, start, end, report_type, body, size) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET body = excluded.body, size = excluded.size",
+            (name, start, end, report_type, text, len(text.encode())),
+        )
+
+    def _bump_version(self) -> None:
+        self._connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def version(self) -> int:
+        """Changes on every save or delete, from any process"""
+        return self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()[0]
+
+    def save(self, name: str, body: dict) -> None:
+        with self._connection:
+            self._upsert(name, body)
+            self._bump_version()
+
+    def delete(self, name: str) -> bool:
+        with self._connection:
+            cursor = self._connection.execute("DELETE FROM reports WHERE name = ?", (name,))
+            self._bump_version()
+        return cursor.rowcount > 0
+
+    def catalog(self) -> list[ReportHeader]:
+        """Report metadata without reading or parsing any report bodies"""
+        return [
+            ReportHeader(*row) for row in self._connection.execute(
+                "SELECT name, start, end, report_type, size "
+                "FROM reports ORDER BY id"
+            )
+        ]
+
+    def get(self, name: str) -> dict | None:
+        row = self._connection.execute(
+            "SELECT body FROM reports WHERE name = ?", (name,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def find(
+        self,
+        start: str | None = None,
+        end: str | None = None,
+        report_type: str | None = None,
+    ) -> list[str]:
+        """Names of reports starting on or after start, ending on or before
+        end and of the given type, served from the indexes"""
+        clauses, values = [], []
+        if start is not None:
+            clauses.append("start >= ?")
+            values.append(start)
+        if end is not None:
+            clauses.append("end <= ?")
+            values.append(end)
+        if report_type is not None:
+            clauses.append("report_type = ?")
+            values.append(report_type)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [
+            row[0] for row in self._connection.execute(
+                f"SELECT name FROM reports {where} ORDER BY id", values
+            )
+        ]
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.close()
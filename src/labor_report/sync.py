@@ -0,0 +1,186 @@
+import os
+import time
+import sqlite3
+from datetime import date, datetime, timedelta
+
+from labor_report.cache import OPEN_RANGE_TTL, SETTLE_DAYS
+
+SYNC_FILE_PATH = os.path.join("data", "sync.sqlite")
+
+WORK_ORDER_FIELDS = ("RecordID", "ActualCompletedDate", "EntityCompanyName", "ContactsName")
+JOB_ITEM_FIELDS = ("ActivityNo", "Item", "Qty", "Amount")
+
+
+def _days(start: str, end: str) -> list[str]:
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    return [(first + timedelta(days=n)).isoformat() for n in range((last - first).days)]
+
+
+def _next_day(day: str) -> str:
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def matches_customers(record: dict, customers: str | tuple, exclude: bool) -> bool:
+    """Local equivalent of the filter built by generate_customer_filter"""
+    if isinstance(customers, str):
+        customers = (customers,)
+
+    customers = [customer for customer in customers if customer]
+    if not customers:
+        return True
+
+    names = (record["EntityCompanyName"], record["ContactsName"])
+
+    if exclude:
+        return all(names[0] != customer or names[1] != customer for customer in customers)
+
+    return any(customer in names for customer in customers)
+
+
+class SyncStore:
+    """Local mirror of Activity and ActivityJobItems rows, partitioned by the
+    day each work order was completed"""
+
+    def __init__(self, path: str = SYNC_FILE_PATH):
+        self._connection = sqlite3.connect(path)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS work_orders (
+                RecordID TEXT PRIMARY KEY,
+                day TEXT NOT NULL,
+                ActualCompletedDate TEXT,
+                EntityCompanyName TEXT,
+                ContactsName TEXT
+            );
+            CREATE INDEX IF NOT EXISTS work_orders_day ON work_orders (day);
+
+            CREATE TABLE IF NOT EXISTS job_items (
+                ActivityNo TEXT NOT NULL,
+                Item TEXT,
+                Qty REAL,
+                Amount REAL
+            );
+            CREATE INDEX IF NOT EXISTS job_items_activity ON job_items (ActivityNo);
+
+            CREATE TABLE IF NOT EXISTS synced_days (
+                day TEXT PRIMARY KEY,
+                synced_at REAL NOT NULL
+            );
+            """
+        )
+
+    def _is_stale(self, day: str, synced_at: float | None, now: float) -> bool:
+        if synced_at is None:
+            return True
+
+        settled_at = datetime.fromisoformat(day) + timedelta(days=SETTLE_DAYS + 1)
+
+        # Synced after the day settled, nothing will change any more
+        if synced_at >= settled_at.timestamp():
+            return False
+
+        return now - synced_at > OPEN_RANGE_TTL
+
+    def stale_ranges(self, start: str, end: str, now: float | None = None) -> list[tuple[str, str]]:
+        """Runs of consecutive days in [start, end) that are missing or may
+        have changed since they were synced, as (start, end) pairs"""
+        now = time.time() if now is None else now
+
+        synced = dict(
+            self._connection.execute(
+                "SELECT day, synced_at FROM synced_days WHERE day >= ? AND day < ?",
+                (start, end),
+            ).fetchall()
+        )
+
+        ranges = []
+        for day in _days(start, end):
+            if not self._is_stale(day, synced.get(day), now):
+                continue
+
+            if ranges and ranges[-1][1] == day:
+                ranges[-1] = (ranges[-1][0], _next_day(day))
+            else:
+                ranges.append((day, _next_day(day)))
+
+        return ranges
+
+    def replace_days(
+        self,
+        start: str,
+        end: str,
+        work_orders: list[dict],
+        job_items: list[dict],
+        now: float | None = None,
+    ) -> None:
+        """Swap everything stored for [start, end) for freshly fetched rows"""
+        now = time.time() if now is None else now
+        fetched_ids = [str(record["RecordID"]) for record in work_orders]
+
+        with self._connection:
+            stale_ids = [
+                row[0] for row in self._connection.execute(
+                    "SELECT RecordID FROM work_orders WHERE day >= ? AND day < ?", (start, end)
+                )
+            ]
+            for record_id in set(stale_ids) | set(fetched_ids):
+                self._connection.execute(
+                    "DELETE FROM job_items WHERE ActivityNo = ?", (record_id,)
+                )
+                self._connection.execute(
+                    "DELETE FROM work_orders WHERE RecordID = ?", (record_id,)
+                )
+
+            self._connection.executemany(
+                "INSERT INTO work_orders VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        str(record["RecordID"]),
+                        record["ActualCompletedDate"][:10],
+                        record["ActualCompletedDate"],
+                        record.get("EntityCompanyName"),
+                        record.get("ContactsName"),
+                    )
+                    for record in work_orders
+                ],
+            )
+            self._connection.executemany(
+                "INSERT INTO job_items VALUES (?, ?, ?, ?)",
+                [
+                    (str(item["ActivityNo"]), item["Item"], item["Qty"], item["Amount"])
+                    for item in job_items
+                ],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO synced_days VALUES (?, ?)",
+                [(day, now) for day in _days(start, end)],
+            )
+
+    def work_order_records(self, start: str, end: str) -> list[dict]:
+        rows = self._connection.execute(
+            "SELECT RecordID, ActualCompletedDate, EntityCompanyName, ContactsName "
+            "FROM work_orders WHERE day >= ? AND day < ? ORDER BY day, RecordID",
+            (start, end),
+        ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def job_items(self, start: str, end: str, work_orders: list | None = None) -> list[dict]:
+        """Job items of the work orders completed in [start, end), optionally
+        narrowed to the given work order numbers"""
+        rows = self._connection.execute(
+            "SELECT job_items.* FROM job_items "
+            "JOIN work_orders ON job_items.ActivityNo = work_orders.RecordID "
+            "WHERE work_orders.day >= ? AND work_orders.day < ?",
+            (start, end),
+        ).fetchall()
+
+        if work_orders is not None:
+            wanted = {str(work_order) for work_order in work_orders}
+            rows = [row for row in rows if row["ActivityNo"] in wanted]
+
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from labor_report import client, main
+from tests.fake_api import FakeMethodApi
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+TECHS = ["Jane Doe", "John Roe"]
+CUSTOMERS = ["Accurate - Lost Time", "Accurate Rental", "Acme", "Globex"]
+
+
+def build_range_data(days: int = 20) -> tuple[list[dict], list[dict]]:
+    """A few work orders a day across internal and outside customers, each
+    with labor for both techs and one part"""
+    work_orders, job_items = [], []
+    record_id = 1000
+    for day in range(1, days + 1):
+        for n in range(day % 4 + 2):
+            record_id += 1
+            customer = CUSTOMERS[(record_id + n) % len(CUSTOMERS)]
+            work_orders.append({
+                "RecordID": record_id,
+                "ActualCompletedDate": f"2025-01-{day:02d}T0{n}:30:00",
+                "EntityCompanyName": customer,
+                "ContactsName": customer,
+            })
+            for tech_index, tech in enumerate(TECHS):
+                job_items.append({"ActivityNo": str(record_id), "Item": f"labor:{tech}",
+                                  "Qty": (record_id + tech_index) % 3 + 0.5, "Amount": 0})
+            job_items.append({"ActivityNo": str(record_id), "Item": "Hose",
+                              "Qty": 1, "Amount": record_id % 7 * 10.0})
+    return work_orders, job_items
+
+
+def make_work_orders(count: int, completed: str = "2025-01-15T10:00:00") -> list[dict]:
+    return [
+        {"RecordID": i, "ActualCompletedDate": completed,
+         "EntityCompanyName": "Acme", "ContactsName": "Acme"}
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(client, "BACKOFF_FACTOR", 0.001)
+    yield
+    client.close_session()
+    client.governor.reset()
+
+
+@pytest.fixture(autouse=True)
+def roster_file(monkeypatch, tmp_path):
+    path = str(tmp_path / "roster.sqlite")
+    monkeypatch.setattr(main, "ROSTER_FILE_PATH", path)
+    return path
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    work_orders = make_work_orders(250)
+    job_items = [
+        {"ActivityNo": str(i), "Item": "labor:Jane Doe", "Qty": 1.5, "Amount": 0}
+        for i in range(1, 251)
+    ]
+    with FakeMethodApi(["Jane Doe", "John Roe"], work_orders, job_items) as api:
+        monkeypatch.setattr(main, "URL", api.url)
+        yield api
+
+
+@pytest.fixture
+def recorded():
+    """Job items of 40 work orders, with labor, parts and service calls"""
+    with open(FIXTURES / "pplh_job_items.json") as f:
+        return json.load(f)
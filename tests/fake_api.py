@@ -0,0 +1,306 @@
+"""Local stand-in for the rest.method.me endpoints used by labor_report.
+
+Filters are matched with regexes rather than a real OData parser: every
+recognised clause is applied as an AND, and repeated ``ActivityNo eq``
+clauses (or an ``ActivityNo in (...)`` list) are treated as a set
+membership test. That is loose, but it is exactly the shape of filter the
+client code builds. ``orderby=RecordID`` and ``RecordID gt N`` are honoured
+for keyset paging, and offset_cost makes deep skip pages slower the way a
+real table scan does.
+"""
+import gzip
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PAGE_LIMIT = 100
+
+_date_ge = re.compile(r"ActualCompletedDate ge '([\d-]+)T")
+_date_lt = re.compile(r"ActualCompletedDate lt '([\d-]+)T")
+_customer = re.compile(
+    r"\(EntityCompanyName (eq|ne) '(.*?)' or ContactsName (?:eq|ne) '(.*?)'\)"
+)
+_activity_eq = re.compile(r"ActivityNo eq '([^']*)'")
+_activity_in = re.compile(r"ActivityNo in \(([^)]*)\)")
+_contains = re.compile(r"contains\(Item, ?'([^']*)'\)")
+_aggregate = re.compile(r"aggregate\(\$count as (\w+)\)")
+_modified_gt = re.compile(r"LastModifiedDate gt '([^']*)'")
+_record_gt = re.compile(r"RecordID gt '?(\d+)'?")
+_groupby_sum = re.compile(r"groupby\(\((\w+)\), aggregate\((\w+) with sum as (\w+)\)\)")
+
+
+def _work_order_matcher(filter_text: str):
+    """Predicate for Activity rows, the filter is parsed once per request"""
+    ge = _date_ge.search(filter_text)
+    lt = _date_lt.search(filter_text)
+    clauses = _customer.findall(filter_text)
+    eq_clauses = [customer for op, customer, _ in clauses if op == "eq"]
+    ne_clauses = [customer for op, customer, _ in clauses if op == "ne"]
+
+    def match(record: dict) -> bool:
+        completed = record.get("ActualCompletedDate", "")[:10]
+
+        if ge and completed < ge.group(1):
+            return False
+        if lt and completed >= lt.group(1):
+            return False
+
+        names = (record.get("EntityCompanyName"), record.get("ContactsName"))
+
+        if eq_clauses and not any(customer in names for customer in eq_clauses):
+            return False
+        if any(names[0] == customer and names[1] == customer for customer in ne_clauses):
+            return False
+
+        return True
+
+    return match
+
+
+def _job_item_matcher(filter_text: str):
+    """Predicate for ActivityJobItems rows, the filter is parsed once per
+    request"""
+    activity_numbers = set(_activity_eq.findall(filter_text))
+    for values in _activity_in.findall(filter_text):
+        activity_numbers.update(value.strip(" '") for value in values.split(","))
+    needles = _contains.findall(filter_text)
+
+    def match(record: dict) -> bool:
+        if activity_numbers and str(record["ActivityNo"]) not in activity_numbers:
+            return False
+
+        for needle in needles:
+            if not record["Item"] or needle not in record["Item"]:
+                return False
+
+        return True
+
+    return match
+
+
+def _select(record: dict, select: str | None) -> dict:
+    if not select:
+        return dict(record)
+    fields = [field.strip() for field in select.split(",")]
+    return {field: record.get(field) for field in fields}
+
+
+class FakeMethodApi:
+    def __init__(
+        self,
+        technicians: list[str | dict] | None = None,
+        work_orders: list[dict] | None = None,
+        job_items: list[dict] | None = None,
+        latency: float = 0.0,
+        supports_groupby: bool = True,
+        supports_delta: bool = True,
+        has_modified_column: bool = True,
+        rate_limit: float | None = None,
+        page_limit: int = PAGE_LIMIT,
+        offset_cost: float = 0.0,
+    ):
+        self.technicians = technicians or []
+        self.work_orders = work_orders or []
+        # Job items get a RecordID in list order unless they have one
+        self.job_items = [
+            item if "RecordID" in item else {**item, "RecordID": record_id}
+            for record_id, item in enumerate(job_items or [], start=1)
+        ]
+        self.latency = latency
+        # Largest top the server honours
+        self.page_limit = page_limit
+        # Seconds the server spends per row it skips, like a table scan
+        self.offset_cost = offset_cost
+        self.supports_groupby = supports_groupby
+        self.supports_delta = supports_delta
+        # Without it FieldTechnicians can't select LastModifiedDate either
+        self.has_modified_column = has_modified_column
+        # Token bucket of rate_limit requests per second, 429 once it is empty
+        self.rate_limit = rate_limit
+        self.burst = 5
+        self.throttled = 0
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+
+        self.faults = deque()
+        self.requests = []
+        self.bytes_sent = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def inject(self, *statuses: int, retry_after: str | None = None) -> None:
+        """Fail the next len(statuses) requests with the given status codes"""
+        for status in statuses:
+            self.faults.append((status, retry_after))
+
+    def start(self) -> "FakeMethodApi":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeMethodApi":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def requests_to(self, table: str) -> list[dict]:
+        return [request for request in self.requests if request["table"] == table]
+
+    def _record(self, table: str, params: dict) -> tuple[int, str | None] | None:
+        with self._lock:
+            self.requests.append({"table": table, "params": params})
+            if self.faults:
+                return self.faults.popleft()
+
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._refilled_at) * self.rate_limit
+                )
+                self._refilled_at = now
+
+                if self._tokens < 1:
+                    self.throttled += 1
+                    return 429, f"{(1 - self._tokens) / self.rate_limit:.3f}"
+                self._tokens -= 1
+        return None
+
+    def respond(self, table: str, params: dict) -> tuple[int, dict]:
+        if table == "FieldTechnicians":
+            rows = [
+                technician if isinstance(technician, dict) else {
+                    "RecordID": record_id,
+                    "FullName": technician,
+                    "LastModifiedDate": "2025-01-01T00:00:00",
+                }
+                for record_id, technician in enumerate(self.technicians, start=1)
+            ]
+            if not self.has_modified_column and "LastModifiedDate" in params.get("select", ""):
+                return 400, {"error": "unknown field LastModifiedDate"}
+            modified_gt = _modified_gt.search(params.get("filter", ""))
+            if modified_gt:
+                if not self.supports_delta or not self.has_modified_column:
+                    return 400, {"error": "LastModifiedDate is not filterable"}
+                rows = [row for row in rows if row["LastModifiedDate"] > modified_gt.group(1)]
+            return 200, self._page(rows, params)
+
+        if table == "Activity":
+            filter_text = params.get("filter") or params.get("apply", "")
+            match = _work_order_matcher(filter_text)
+            rows = [row for row in self.work_orders if match(row)]
+
+            if "apply" in params:
+                alias = _aggregate.search(params["apply"])
+                if alias is None:
+                    return 400, {"error": "unsupported $apply"}
+                return 200, {"value": [{alias.group(1): len(rows)}]}
+
+            return 200, self._page(rows, params)
+
+        if table == "ActivityJobItems":
+            filter_text = params.get("filter") or params.get("apply", "")
+            match = _job_item_matcher(filter_text)
+            rows = [row for row in self.job_items if match(row)]
+
+            if "apply" in params:
+                groupby = _groupby_sum.search(params["apply"])
+                if groupby is None or not self.supports_groupby:
+                    return 400, {"error": "unsupported $apply"}
+                key, field, alias = groupby.groups()
+                totals = {}
+                for row in rows:
+                    totals[row[key]] = totals.get(row[key], 0) + row[field]
+                grouped = [{key: value, alias: total} for value, total in totals.items()]
+                return 200, self._page(grouped, params)
+
+            return 200, self._page(rows, params)
+
+        return 404, {"error": f"unknown table {table}"}
+
+    def _page(self, rows: list[dict], params: dict) -> dict:
+        if params.get("orderby") == "RecordID":
+            rows = sorted(rows, key=lambda row: int(row["RecordID"]))
+        record_gt = _record_gt.search(params.get("filter", ""))
+        if record_gt:
+            rows = [row for row in rows if int(row["RecordID"]) > int(record_gt.group(1))]
+
+        skip = int(params.get("skip", 0))
+        top = min(int(params.get("top", self.page_limit)), self.page_limit)
+        page = [_select(row, params.get("select")) for row in rows[skip : skip + top]]
+        return {"count": len(page), "value": page}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                table = parts.path.rstrip("/").rsplit("/", 1)[-1]
+                params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+                with api._lock:
+                    api.in_flight += 1
+                    api.max_in_flight = max(api.max_in_flight, api.in_flight)
+
+                delay = api.latency + api.offset_cost * int(params.get("skip", 0))
+                if delay:
+                    time.sleep(delay)
+
+                with api._lock:
+                    api.in_flight -= 1
+
+                fault = api._record(table, params)
+                if fault is not None:
+                    status, retry_after = fault
+                    body = json.dumps({"error": "injected"}).encode()
+                    headers = {"Retry-After": retry_after} if retry_after else {}
+                else:
+                    status, payload = api.respond(table, params)
+                    body = json.dumps(payload).encode()
+                    headers = {}
+
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body)
+                    headers["Content-Encoding"] = "gzip"
+
+                with api._lock:
+                    api.bytes_sent += len(body)
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,100 @@
+import pytest
+
+from labor_report import aggregate, main
+
+
+@pytest.fixture
+def recorded(recorded):
+    recorded["items_by_work_order"] = main.group_by_work_order(
+        recorded["job_items"], recorded["work_orders"]
+    )
+    return recorded
+
+
+class TestAggregate:
+    def test_tally_matches_tally_labor_items(self, recorded):
+        metric = aggregate.TechTally("Hours", "labor:")
+        result = aggregate.aggregate(
+            recorded["items_by_work_order"], [metric], recorded["technicians"]
+        )
+        expected = main.tally_labor_items(
+            recorded["job_items"], "labor:", recorded["technicians"]
+        )
+        assert result["Hours"] == pytest.approx(expected)
+
+    def test_pplh_matches_calculate_parts_per_labor_hour(self, recorded):
+        metric = aggregate.PartsPerLaborHour("PPLH")
+        result = aggregate.aggregate(
+            recorded["items_by_work_order"], [metric], recorded["technicians"]
+        )
+        expected = main.calculate_parts_per_labor_hour(
+            recorded["work_orders"], recorded["technicians"],
+            items_by_work_order=recorded["items_by_work_order"],
+        )
+        assert result["PPLH"] == pytest.approx(expected)
+
+    def test_work_order_subset(self, recorded):
+        subset = recorded["work_orders"][:10]
+        metric = aggregate.TechTally("Hours", "labor:", subset)
+        result = aggregate.aggregate(
+            recorded["items_by_work_order"], [metric], recorded["technicians"]
+        )
+        subset_items = [
+            item for wo in subset for item in recorded["items_by_work_order"][str(wo)]
+        ]
+        assert result["Hours"] == pytest.approx(
+            main.tally_labor_items(subset_items, "labor:", recorded["technicians"])
+        )
+
+    def test_item_quantity_share(self):
+        items = {
+            "1": [
+                {"Item": "labor:A", "Qty": 3, "Amount": 0},
+                {"Item": "labor:B", "Qty": 1, "Amount": 0},
+                {"Item": "BRAKE CLEANER", "Qty": 8, "Amount": 40},
+            ],
+            "2": [{"Item": "BRAKE CLEANER", "Qty": 5, "Amount": 25}],
+        }
+        metric = aggregate.ItemQuantityShare("Brake", "BRAKE CLEANER")
+        assert aggregate.aggregate(items, [metric], ["A", "B"])["Brake"] == {"A": 6, "B": 2}
+
+    def test_items_walked_once_for_all_metrics(self, recorded, monkeypatch):
+        calls = []
+        summarize = aggregate.summarize
+        monkeypatch.setattr(
+            aggregate, "summarize", lambda *args: calls.append(1) or summarize(*args)
+        )
+        metrics = [
+            aggregate.TechTally("Hours", "labor:"),
+            aggregate.TechTally("Calls", "Service call:"),
+            aggregate.PartsPerLaborHour("PPLH"),
+            aggregate.ItemQuantityShare("Brake", "BRAKE CLEANER"),
+        ]
+        aggregate.aggregate(recorded["items_by_work_order"], metrics, recorded["technicians"])
+        assert len(calls) == len(recorded["items_by_work_order"])
+
+    def test_metric_without_add_fails_on_creation(self):
+        class Incomplete(aggregate.Metric):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete("Incomplete")
+
+
+class TestBuildMetric:
+    @pytest.mark.parametrize("report_title, metric_type", [
+        ("Lost Time", aggregate.TechTally),
+        ("Parts per labor hour", aggregate.PartsPerLaborHour),
+        ("Brake cleaner sales", aggregate.ItemQuantityShare),
+    ])
+    def test_kind_picks_the_metric(self, report_title, metric_type):
+        metric = main.build_metric(report_title)
+        assert type(metric) is metric_type
+        assert metric.work_orders is None
+
+    def test_records_limit_to_the_customers(self):
+        records = [
+            {"RecordID": 1, "EntityCompanyName": "Accurate Rental", "ContactsName": ""},
+            {"RecordID": 2, "EntityCompanyName": "Acme", "ContactsName": "Acme"},
+        ]
+        assert main.build_metric("Rental", records).work_orders == {"1"}
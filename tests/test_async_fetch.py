@@ -0,0 +1,80 @@
+import pytest
+
+from labor_report import async_fetch, client, main
+from tests.fake_api import FakeMethodApi
+
+TECHS = ["Jane Doe", "John Roe"]
+
+
+def sequential_job_items(url: str, param_list: list, select: str) -> list:
+    """The paging loop get_all_job_items used before the async engine"""
+    data_list = []
+    for parameter in param_list:
+        params = {"skip": 0, "top": 100, "select": select, "filter": parameter}
+        while True:
+            data = client.get_json(f"{url}/tables/ActivityJobItems", params=params)
+            data_list.extend(data["value"])
+            if data["count"] < 100:
+                break
+            params["skip"] += 100
+    return data_list
+
+
+@pytest.fixture
+def item_api(monkeypatch):
+    job_items = []
+    for wo in range(1, 61):
+        # Work order 7 spills over several pages
+        count = 250 if wo == 7 else wo % 4 + 1
+        for n in range(count):
+            job_items.append({
+                "ActivityNo": str(wo),
+                "Item": f"labor:{TECHS[n % 2]}" if n % 3 else f"Part {n}",
+                "Qty": n % 5 + 0.5,
+                "Amount": n * 3.0,
+            })
+
+    with FakeMethodApi(TECHS, [], job_items, latency=0.01) as api:
+        monkeypatch.setattr(main, "URL", api.url)
+        # About ten work orders per chunk so there are several chunks
+        monkeypatch.setattr(main, "FILTER_BYTE_BUDGET", 300)
+        yield api
+
+
+class TestAsyncJobItems:
+    def test_all_job_items_match_sequential(self, item_api):
+        work_orders = [str(wo) for wo in range(1, 61)]
+        expected = sequential_job_items(
+            item_api.url, main.parameterize_wo_list(work_orders), "ActivityNo, Item, Qty, Amount"
+        )
+
+        assert main.get_all_job_items(work_orders) == expected
+        assert len(expected) > 250
+
+    def test_job_items_match_sequential(self, item_api):
+        work_orders = [str(wo) for wo in range(1, 61)]
+        prefix = "contains(Item, 'labor:') and "
+        param_list = [
+            prefix + parameter for parameter in main.parameterize_wo_list(work_orders, prefix)
+        ]
+        expected = sequential_job_items(item_api.url, param_list, "Item, Qty")
+
+        assert main.get_job_items(work_orders, "labor:") == expected
+
+    def test_item_filter_applied_to_every_chunk(self, item_api):
+        items = main.get_all_job_items([str(wo) for wo in range(1, 61)], "labor:")
+        assert items and all(item["Item"].startswith("labor:") for item in items)
+
+    def test_in_flight_requests_are_bounded(self, item_api):
+        main.get_all_job_items([str(wo) for wo in range(1, 61)], max_concurrency=3)
+        assert 1 < item_api.max_in_flight <= 3
+
+    def test_failed_query_does_not_drop_others(self, item_api, monkeypatch):
+        monkeypatch.setattr(client, "MAX_RETRIES", 0)
+        item_api.inject(400)
+        rows = async_fetch.fetch_all(
+            f"{item_api.url}/tables/ActivityJobItems",
+            [{"filter": "ActivityNo eq '1'"}, {"filter": "ActivityNo eq '2'"}],
+            headers={}, max_concurrency=1,
+        )
+        assert {row["ActivityNo"] for row in rows} == {"2"}
@@ -0,0 +1,82 @@
+import os
+from datetime import date
+
+import pytest
+
+from labor_report import cache, main
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    yield cache.enable(str(tmp_path / "cache.sqlite"))
+    cache.disable()
+
+
+class TestCacheKey:
+    def test_param_order_does_not_matter(self):
+        first = cache.cache_key("https://Rest.Method.me/api/v1/tables/Activity/", {"top": 100, "skip": 0})
+        second = cache.cache_key("https://rest.method.me/api/v1/tables/Activity", {"skip": 0, "top": 100})
+        assert first == second
+
+    def test_different_params_differ(self):
+        assert cache.cache_key("u", {"skip": 0}) != cache.cache_key("u", {"skip": 100})
+
+
+class TestResponseCache:
+    def test_hit_and_miss_counts(self, response_cache):
+        assert cache.lookup("u", {"skip": 0}) is None
+        cache.store("u", {"skip": 0}, {"value": [1]})
+        assert cache.lookup("u", {"skip": 0}) == {"value": [1]}
+        assert cache.stats() == (1, 1)
+
+    def test_open_range_expires(self, response_cache, monkeypatch):
+        cache.set_range("2025-01-01", "2025-02-01", today=date(2025, 1, 20))
+        cache.store("u", {}, {"value": []})
+
+        now = cache.time.time()
+        monkeypatch.setattr(cache.time, "time", lambda: now + cache.OPEN_RANGE_TTL + 1)
+        assert cache.lookup("u", {}) is None
+
+    def test_closed_range_never_expires(self, response_cache, monkeypatch):
+        cache.set_range("2025-01-01", "2025-02-01", today=date(2025, 3, 1))
+        cache.store("u", {}, {"value": []})
+
+        now = cache.time.time()
+        monkeypatch.setattr(cache.time, "time", lambda: now + 10 * 365 * 86400)
+        assert cache.lookup("u", {}) == {"value": []}
+
+    def test_lru_eviction(self, tmp_path):
+        response_cache = cache.ResponseCache(str(tmp_path / "lru.sqlite"), max_bytes=300)
+        for key in ("a", "b", "c", "d"):
+            response_cache.put(key, {"value": os.urandom(60).hex()}, ttl=None)
+            response_cache.get("a")
+
+        assert response_cache.get("a") is not None
+        assert response_cache.get("b") is None
+        assert len(response_cache) < 4
+        response_cache.close()
+
+    def test_refresh_ignores_entries_but_stores(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache.enable(path)
+        cache.store("u", {}, {"value": [1]})
+
+        cache.enable(path, refresh=True)
+        assert cache.lookup("u", {}) is None
+        cache.store("u", {}, {"value": [2]})
+
+        cache.enable(path)
+        assert cache.lookup("u", {}) == {"value": [2]}
+        cache.disable()
+
+
+class TestCachedFetch:
+    def test_second_run_is_served_from_cache(self, fake_api, response_cache):
+        cache.set_range("2025-01-01", "2025-02-01", today=date(2025, 6, 1))
+        first = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "")
+        request_count = len(fake_api.requests)
+
+        second = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "")
+        assert first == second
+        assert len(fake_api.requests) == request_count
+        assert cache.stats()[0] == request_count
@@ -0,0 +1,112 @@
+import pytest
+
+from labor_report import main
+from labor_report.checkpoint import CheckpointStore
+from tests.conftest import TECHS, build_range_data
+from tests.fake_api import FakeMethodApi
+
+NAME = "2025-01-01:2025-01-20::Parts per labor hour"
+
+
+@pytest.fixture
+def checkpoints(tmp_path):
+    checkpoint_store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    yield checkpoint_store
+    checkpoint_store.close()
+
+
+class TestCheckpointStore:
+    def test_run_lifecycle(self, checkpoints):
+        assert checkpoints.work_orders(NAME) is None
+
+        checkpoints.start(NAME, [1, 2, 3])
+        assert checkpoints.partials(NAME, ["a", "b"]) == {}
+        checkpoints.save_partial(NAME, 1, {"Jane Doe": 2.5})
+
+        assert checkpoints.work_orders(NAME) == [1, 2, 3]
+        assert checkpoints.partials(NAME, ["a", "b"]) == {1: {"Jane Doe": 2.5}}
+        assert checkpoints.names() == [NAME]
+
+        checkpoints.finish(NAME)
+        assert checkpoints.work_orders(NAME) is None
+        assert checkpoints.names() == []
+
+    def test_other_chunking_drops_partials(self, checkpoints):
+        checkpoints.start(NAME, [1, 2, 3])
+        checkpoints.partials(NAME, ["a", "b"])
+        checkpoints.save_partial(NAME, 0, {"Jane Doe": 1})
+
+        assert checkpoints.partials(NAME, ["a b"]) == {}
+
+
+class TestCheckpointedReport:
+    @pytest.fixture
+    def range_api(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "CHECKPOINT_FILE_PATH", str(tmp_path / "checkpoints.sqlite"))
+        # A handful of work orders per chunk, so there are several chunks
+        monkeypatch.setattr(main, "FILTER_BYTE_BUDGET", 300)
+        work_orders, job_items = build_range_data()
+        with FakeMethodApi(TECHS, work_orders, job_items) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            main.get_technician_names()
+            api.requests.clear()
+            yield api
+
+    @pytest.mark.parametrize("report_title", ["Lost Time", "All Internals", "Parts per labor hour"])
+    def test_matches_compute_report(self, range_api, report_title):
+        checkpointed = main.compute_checkpointed_report(
+            "2025-01-01", "2025-01-20", report_title, TECHS
+        )
+        direct = main.compute_report("2025-01-01", "2025-01-20", report_title, TECHS)
+
+        assert checkpointed == pytest.approx(direct)
+        assert CheckpointStore(main.CHECKPOINT_FILE_PATH).names() == []
+
+    def test_resumes_after_a_failure(self, range_api, monkeypatch):
+        save_partial = CheckpointStore.save_partial
+        saved = []
+
+        def fail_on_third_chunk(self, name, chunk, partial):
+            if len(saved) == 2:
+                raise RuntimeError("connection lost")
+            saved.append(chunk)
+            save_partial(self, name, chunk, partial)
+
+        monkeypatch.setattr(CheckpointStore, "save_partial", fail_on_third_chunk)
+        with pytest.raises(RuntimeError):
+            main.compute_checkpointed_report(
+                "2025-01-01", "2025-01-20", "Parts per labor hour", TECHS
+            )
+        monkeypatch.setattr(CheckpointStore, "save_partial", save_partial)
+
+        first_run = range_api.requests_to("ActivityJobItems")
+        chunks = len(main._job_item_param_sets(
+            CheckpointStore(main.CHECKPOINT_FILE_PATH).work_orders(NAME)
+        ))
+        range_api.requests.clear()
+
+        report = main.compute_checkpointed_report(
+            "2025-01-01", "2025-01-20", "Parts per labor hour", TECHS
+        )
+
+        # No work order listing, and only the chunks without a partial
+        assert range_api.requests_to("Activity") == []
+        assert len(range_api.requests_to("ActivityJobItems")) == chunks - len(saved)
+        assert len(first_run) >= 3
+        assert report == pytest.approx(
+            main.compute_report("2025-01-01", "2025-01-20", "Parts per labor hour", TECHS)
+        )
+
+    def test_compute_report_uses_checkpoints_when_enabled(self, range_api, monkeypatch):
+        calls = []
+        monkeypatch.setattr(main, "CHECKPOINT_RUNS", True)
+        monkeypatch.setattr(
+            main, "compute_checkpointed_report", lambda *args: calls.append(args) or {}
+        )
+
+        main.compute_report("2025-01-01", "2025-01-20", "Rental", TECHS)
+        assert calls == [("2025-01-01", "2025-01-20", "Rental", TECHS)]
+
+    def test_cli_flag(self):
+        assert main.build_parser().parse_args(["--checkpoint"]).checkpoint
+        assert not main.build_parser().parse_args([]).checkpoint
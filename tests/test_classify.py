@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from labor_report import classify, main
+
+TECHS = ["Amy Ortiz", "Sam Lee", "bob"]
+
+
+class TestItemClassifier:
+    def test_tech_name_is_not_mangled_by_tag_characters(self):
+        # lstrip("labor:") used to strip the leading "b" and "a" off these
+        classifier = classify.ItemClassifier(["Service call:"], TECHS + ["abel"])
+
+        assert classifier.tech_for("labor:bob", "labor:") == 2
+        assert classifier.tech_for("labor:abel", "labor:") == 3
+        assert classifier.tech_for("Service call:Sam Lee", "Service call:") == 1
+
+    def test_unknown_tech_and_missing_tag(self):
+        classifier = classify.ItemClassifier([], TECHS)
+
+        assert classifier.tech_for("labor:Nobody", "labor:") == -1
+        assert classifier.tech_for("BRAKE CLEANER", "labor:") == -1
+        assert classifier.tech_for(None, "labor:") == -1
+
+    def test_parts(self):
+        classifier = classify.ItemClassifier([], TECHS)
+
+        assert classifier.classify("BRAKE CLEANER").is_part
+        assert not classifier.classify("labor:Amy Ortiz").is_part
+        assert not classifier.classify("Service Call Fee").is_part
+        assert not classifier.classify("").is_part
+
+    def test_each_name_is_classified_once(self, monkeypatch):
+        classifier = classify.ItemClassifier([], TECHS)
+        calls = []
+        tech_from_item = classify.tech_from_item
+        monkeypatch.setattr(
+            classify, "tech_from_item", lambda *args: calls.append(args) or tech_from_item(*args)
+        )
+
+        for _ in range(100):
+            classifier.classify("labor:Sam Lee")
+
+        assert len(calls) == 1
+
+    def test_shared_classifier(self):
+        assert classify.get_classifier(TECHS, ["labor:"]) is classify.get_classifier(
+            list(TECHS), ("labor:",)
+        )
+
+
+class TestLoadReportTypes:
+    def write(self, tmp_path, definitions):
+        path = tmp_path / "report_types.json"
+        path.write_text(json.dumps(definitions))
+        return str(path)
+
+    def test_defaults_and_customer_lists(self, tmp_path):
+        path = self.write(tmp_path, {
+            "Internal": {"customer": ["A", "B"], "item": "labor:", "exclude": True},
+            "Calls": {"item": "Service call:"},
+        })
+
+        report_types = classify.load_report_types(path)
+
+        assert report_types["Internal"] == {
+            "customer": ("A", "B"), "item": "labor:", "kind": "tally", "exclude": True,
+        }
+        assert report_types["Calls"]["customer"] == ""
+        assert not report_types["Calls"]["exclude"]
+
+    @pytest.mark.parametrize("definition", [
+        {"customer": ""},
+        {"customer": "", "item": "PPLH", "kind": "median"},
+    ])
+    def test_invalid_definitions(self, tmp_path, definition):
+        with pytest.raises(ValueError):
+            classify.load_report_types(self.write(tmp_path, {"Broken": definition}))
+
+    def test_resolve_uses_definition_flags(self, tmp_path):
+        report_types = classify.load_report_types(self.write(tmp_path, {
+            "Shop time": {"customer": ["A", "B"], "item": "labor:", "exclude": True},
+            "Part share": {"customer": "", "item": "PPLH", "kind": "pplh"},
+        }))
+
+        assert main.resolve_report_type("Shop time", report_types) == (
+            ("A", "B"), "labor:", True, False
+        )
+        assert main.resolve_report_type("Part share", report_types)[3]
+        assert main.resolve_report_type("All Internals", main.report_types)[2]
+        assert main.resolve_report_type("Parts per labor hour", main.report_types)[3]
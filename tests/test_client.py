@@ -0,0 +1,58 @@
+import pytest
+
+from labor_report import client, main
+from labor_report.client import ApiError
+
+
+class TestClientRetries:
+    def test_retries_server_errors(self, fake_api):
+        fake_api.inject(500, 503)
+        data = client.get_json(f"{fake_api.url}/tables/FieldTechnicians")
+        assert len(data["value"]) == 2
+        assert len(fake_api.requests) == 3
+
+    def test_honors_retry_after(self, fake_api, monkeypatch):
+        delays = []
+        monkeypatch.setattr(client.time, "sleep", delays.append)
+        fake_api.inject(429, retry_after="2")
+        client.get_json(f"{fake_api.url}/tables/FieldTechnicians")
+        # Waited out by the governor, measured from when the 429 arrived
+        assert delays == [pytest.approx(2.0, abs=0.05)]
+
+    def test_gives_up_after_max_retries(self, fake_api):
+        fake_api.inject(*[502] * 4)
+        with pytest.raises(ApiError) as error:
+            client.get_json(f"{fake_api.url}/tables/FieldTechnicians", max_retries=2)
+        assert error.value.status_code == 502
+        assert len(fake_api.requests) == 3
+
+    def test_client_errors_are_not_retried(self, fake_api):
+        with pytest.raises(ApiError) as error:
+            client.get_json(f"{fake_api.url}/tables/Nope")
+        assert error.value.status_code == 404
+        assert len(fake_api.requests) == 1
+
+    def test_requests_gzip(self, fake_api):
+        response = client.get(f"{fake_api.url}/tables/FieldTechnicians")
+        assert response.headers["Content-Encoding"] == "gzip"
+
+
+class TestFetchersThroughClient:
+    def test_technician_names(self, fake_api):
+        fake_api.inject(503)
+        assert main.get_technician_names() == ["Jane Doe", "John Roe"]
+
+    def test_work_orders_survive_faults(self, fake_api):
+        fake_api.inject(500, 429)
+        work_orders = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "")
+        assert work_orders == list(range(1, 251))
+
+    def test_work_order_count_returns_none_on_failure(self, fake_api, monkeypatch):
+        monkeypatch.setattr(client, "MAX_RETRIES", 0)
+        fake_api.inject(500)
+        assert main.get_work_order_count("2025-01-01", "2025-02-01", "") is None
+
+    def test_job_items(self, fake_api):
+        fake_api.inject(504)
+        items = main.get_job_items([str(i) for i in range(1, 31)], "labor:")
+        assert len(items) == 30
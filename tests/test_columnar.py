@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from labor_report import columnar, main
+
+TECHS = ["Jane Doe", "John Roe", "Sam Poe", "Ann Lee"]
+
+
+def synthetic_items(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    names = [f"labor:{tech}" for tech in TECHS] + [
+        "labor:Former Tech", "Service Call: standard", "Hose", "Seal kit", None,
+    ]
+    return [
+        {
+            "ActivityNo": str(rng.randrange(count // 5 + 1)),
+            "Item": rng.choice(names),
+            "Qty": rng.choice([0.5, 1, 1.25, 2, 3]),
+            "Amount": round(rng.uniform(0, 300), 2),
+        }
+        for _ in range(count)
+    ]
+
+
+class TestColumnarTally:
+    def test_matches_loop(self):
+        items = synthetic_items(5000)
+        assert columnar.tally_labor_items(items, "labor:", TECHS) == main.tally_labor_items(
+            items, "labor:", TECHS, columnar=False
+        )
+
+    def test_recorded_fixture(self, recorded):
+        techs = recorded["technicians"]
+        assert columnar.tally_labor_items(recorded["job_items"], "labor:", techs) == (
+            main.tally_labor_items(recorded["job_items"], "labor:", techs, columnar=False)
+        )
+
+    def test_large_inputs_use_columnar(self, monkeypatch):
+        monkeypatch.setattr(main, "COLUMNAR_MIN_ITEMS", 10)
+        monkeypatch.setattr(main, "progress_bar", lambda: pytest.fail("loop path used"))
+        assert main.tally_labor_items(synthetic_items(20), "labor:", TECHS)
+
+
+class TestColumnarPartsPerLaborHour:
+    def test_matches_per_work_order_math(self):
+        items = synthetic_items(5000)
+        items_by_work_order = main.group_by_work_order(items)
+
+        expected = main.calculate_parts_per_labor_hour(
+            list(items_by_work_order), TECHS, items_by_work_order=items_by_work_order,
+            columnar=False,
+        )
+        assert columnar.parts_per_labor_hour(items, TECHS) == pytest.approx(expected)
+
+    def test_recorded_fixture(self, recorded):
+        techs = recorded["technicians"]
+        expected = main.calculate_parts_per_labor_hour(
+            recorded["work_orders"], techs,
+            items_by_work_order=main.group_by_work_order(recorded["job_items"]),
+            columnar=False,
+        )
+        assert columnar.parts_per_labor_hour(recorded["job_items"], techs) == pytest.approx(
+            expected
+        )
+
+    def test_no_items(self):
+        assert columnar.parts_per_labor_hour([], TECHS) == {tech: 0 for tech in TECHS}
+
+    def test_large_inputs_use_columnar(self, monkeypatch):
+        items_by_work_order = main.group_by_work_order(synthetic_items(200))
+        # Only the requested work orders count
+        work_orders = list(items_by_work_order)[::2]
+        expected = main.calculate_parts_per_labor_hour(
+            work_orders, TECHS, items_by_work_order=items_by_work_order, columnar=False
+        )
+
+        monkeypatch.setattr(main, "COLUMNAR_MIN_ITEMS", 10)
+        monkeypatch.setattr(main, "progress_bar", lambda: pytest.fail("loop path used"))
+        assert main.calculate_parts_per_labor_hour(
+            work_orders, TECHS, items_by_work_order=items_by_work_order
+        ) == pytest.approx(expected)
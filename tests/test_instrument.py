@@ -0,0 +1,87 @@
+import io
+import json
+import time
+
+import pytest
+from rich.console import Console
+
+from labor_report import instrument, main
+
+
+@pytest.fixture
+def recorder():
+    yield instrument.enable()
+    instrument.disable()
+
+
+class TestDisabled:
+    def test_records_nothing(self, fake_api):
+        assert not instrument.enabled()
+        with instrument.span("stage"):
+            main.get_technician_names()
+        instrument.print_summary()
+
+    def test_overhead_is_negligible(self):
+        @instrument.timed("noop")
+        def noop():
+            pass
+
+        started = time.perf_counter()
+        for _ in range(100_000):
+            noop()
+        per_call = (time.perf_counter() - started) / 100_000
+
+        assert per_call < 5e-6
+
+
+class TestRecorder:
+    def test_nested_spans(self, recorder):
+        with instrument.span("report", report="Lost Time"):
+            with instrument.span("tally"):
+                pass
+
+        spans = {record["name"]: record for record in recorder.spans}
+        assert spans["tally"]["parent"] == "report"
+        assert spans["report"]["report"] == "Lost Time"
+        assert spans["report"]["duration"] >= spans["tally"]["duration"]
+
+    def test_requests_record_retries_rows_and_bytes(self, recorder, fake_api):
+        fake_api.inject(503)
+        main.get_labor_tally(
+            [str(i) for i in range(1, 151)], "labor:", ["Jane Doe"], pushdown=False
+        )
+
+        item_requests = [record for record in recorder.requests
+                         if record["table"] == "ActivityJobItems"]
+        assert sum(record["retries"] for record in item_requests) == 1
+        assert sum(record["rows"] for record in item_requests) == 150
+        assert all(record["status"] == 200 and record["bytes"] > 0 for record in item_requests)
+        assert {"job items", "tally"} <= {record["name"] for record in recorder.spans}
+
+    def test_failed_request_is_recorded(self, recorder, fake_api):
+        with pytest.raises(main.ApiError):
+            main.client.get_json(f"{fake_api.url}/tables/Nope")
+        assert recorder.requests[-1]["status"] == 404
+
+    def test_trace_and_summary(self, recorder, fake_api, tmp_path):
+        main.get_technician_names()
+        path = tmp_path / "trace.json"
+        instrument.write_trace(str(path))
+
+        trace = json.loads(path.read_text())
+        assert trace["requests"][0]["table"] == "FieldTechnicians"
+        assert trace["spans"][0]["name"] == "technician roster"
+
+        output = io.StringIO()
+        instrument.print_summary(Console(file=output, width=120))
+        assert "FieldTechnicians" in output.getvalue()
+        assert "technician roster" in output.getvalue()
+
+
+class TestFlags:
+    def test_parser(self):
+        args = main.build_parser().parse_args(["--trace", "t.json", "--profile", "run",
+                                               "--start", "2025-01-01", "--end", "2025-02-01"])
+        assert args.trace == "t.json"
+        assert args.profile
+        assert not main.build_parser().parse_args([]).stats
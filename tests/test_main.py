@@ -1,7 +1,15 @@
 import os
+import re
+from urllib.parse import quote_plus
+
 import pytest
 
+from labor_report import main
+from labor_report.client import ApiError
 from labor_report.main import initialize_api_key
+from tests.conftest import TECHS, build_range_data, make_work_orders
+from tests.fake_api import FakeMethodApi
+
 
 
 
@@ -22,4 +30,269 @@ class TestInitializeApiKey:
         assert f"APIkey {api_key}" == initialize_api_key(api_key_file)
 
 
+class TestGetWorkOrdersByRange:
+    def test_concurrent_matches_sequential(self, fake_api):
+        concurrent = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "", max_workers=4)
+        sequential = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "", max_workers=1)
+        assert concurrent == sequential == list(range(1, 251))
+
+    def test_concurrent_requests_each_offset_once(self, fake_api):
+        main.get_work_orders_by_range("2025-01-01", "2025-02-01", "", max_workers=4)
+        skips = [int(r["params"]["skip"]) for r in fake_api.requests_to("Activity")
+                 if "skip" in r["params"]]
+        assert sorted(skips) == [0, 100, 200]
+
+    def test_pages_are_ordered(self, fake_api):
+        fake_api.work_orders.reverse()
+        work_orders = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "", max_workers=4)
+
+        assert work_orders == list(range(1, 251))
+        assert all(r["params"]["orderby"] == "RecordID" for r in fake_api.requests_to("Activity")
+                   if "skip" in r["params"])
+
+    def test_falls_back_to_sequential_without_count(self, fake_api, monkeypatch):
+        monkeypatch.setattr(main, "get_work_order_count", lambda *args: None)
+        assert main.get_work_orders_by_range("2025-01-01", "2025-02-01", "") == list(range(1, 251))
+
+    def test_picks_up_rows_added_after_count(self, fake_api, monkeypatch):
+        monkeypatch.setattr(main, "get_work_order_count", lambda *args: 200)
+        work_orders = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "", max_workers=4)
+        assert work_orders == list(range(1, 251))
+
+    def test_deduplicates_record_ids(self, fake_api):
+        fake_api.work_orders = make_work_orders(150) + make_work_orders(150)
+        work_orders = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "", max_workers=4)
+        assert work_orders == list(range(1, 151))
+
+
+class TestPartsPerLaborHour:
+    @pytest.fixture
+    def pplh_api(self, recorded, monkeypatch):
+        with FakeMethodApi(recorded["technicians"], [], recorded["job_items"]) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            yield api
+
+    def test_bulk_matches_per_work_order(self, pplh_api, recorded):
+        work_orders, techs = recorded["work_orders"], recorded["technicians"]
+
+        per_work_order = main.calculate_parts_per_labor_hour(work_orders, techs, bulk=False)
+        bulk = main.calculate_parts_per_labor_hour(work_orders, techs, bulk=True)
+
+        assert bulk == pytest.approx(per_work_order)
+        assert any(value > 0 for value in bulk.values())
+
+    def test_bulk_cuts_request_count(self, pplh_api, recorded):
+        main.calculate_parts_per_labor_hour(recorded["work_orders"], recorded["technicians"])
+        assert len(pplh_api.requests) <= len(recorded["work_orders"]) // 10
+
+    def test_work_orders_without_items_are_grouped(self, pplh_api):
+        grouped = main.get_items_by_work_order([5001, 999999])
+        assert grouped["999999"] == []
+        assert all(item["ActivityNo"] == "5001" for item in grouped["5001"])
+
+
+class TestParameterizeWoList:
+    def test_chunks_fit_budget(self):
+        prefix = "contains(Item, 'labor:') and "
+        chunks = main.parameterize_wo_list(range(100000, 101000), prefix, budget=500)
+        assert all(len(quote_plus(prefix + chunk)) <= 500 for chunk in chunks)
+        assert len(chunks) > 1
+
+    def test_every_work_order_kept_in_order(self):
+        work_orders = list(range(1, 2000))
+        chunks = main.parameterize_wo_list(work_orders, budget=300)
+        found = [int(num) for chunk in chunks for num in re.findall(r"'(\d+)'", chunk)]
+        assert found == work_orders
+
+    def test_short_ids_pack_more_per_chunk(self):
+        short = main.parameterize_wo_list(range(1, 1001))
+        long = main.parameterize_wo_list(range(10**11, 10**11 + 1000))
+        assert len(short) < len(long)
+
+    def test_chunk_is_grouped_for_combination(self):
+        chunk = main.parameterize_wo_list([1, 2])[0]
+        assert chunk == "(ActivityNo eq '1' or ActivityNo eq '2')"
+
+    def test_compact_in_form(self):
+        assert main.parameterize_wo_list([1, 2], compact=True) == ["ActivityNo in ('1','2')"]
+
+    def test_oversized_clause_gets_own_chunk(self):
+        assert len(main.parameterize_wo_list([1, 2], budget=5)) == 2
+
+    def test_empty_list(self):
+        assert main.parameterize_wo_list([]) == []
+
+
+class TestLaborTally:
+    @pytest.fixture
+    def labor_api(self, recorded, monkeypatch):
+        with FakeMethodApi(recorded["technicians"], [], recorded["job_items"]) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            yield api
+
+    def test_pushdown_matches_client_side(self, labor_api, recorded):
+        work_orders, techs = recorded["work_orders"], recorded["technicians"]
+
+        local = main.get_labor_tally(work_orders, "labor:", techs, pushdown=False)
+        local_bytes = labor_api.bytes_sent
+        pushed = main.get_labor_tally(work_orders, "labor:", techs, pushdown=True)
+
+        assert pushed == pytest.approx(local)
+        assert labor_api.bytes_sent - local_bytes < local_bytes
+
+    def test_falls_back_when_aggregation_rejected(self, labor_api, recorded):
+        work_orders, techs = recorded["work_orders"], recorded["technicians"]
+        expected = main.get_labor_tally(work_orders, "labor:", techs, pushdown=False)
+
+        labor_api.supports_groupby = False
+        assert main.get_labor_tally(work_orders, "labor:", techs, pushdown=True) == expected
+
+    @pytest.mark.parametrize("status", [503, None])
+    def test_failures_are_not_a_rejected_aggregation(self, labor_api, recorded, monkeypatch,
+                                                     status):
+        work_orders, techs = recorded["work_orders"], recorded["technicians"]
+
+        def fail(*args, **kwargs):
+            raise ApiError(status, "unavailable", f"{labor_api.url}/tables/ActivityJobItems")
+
+        monkeypatch.setattr(main, "get_item_totals", fail)
+        with pytest.raises(ApiError):
+            main.get_labor_tally(work_orders, "labor:", techs, pushdown=True)
+        assert labor_api.requests == []
+
+    def test_totals_are_summed_across_chunks(self, labor_api, recorded, monkeypatch):
+        monkeypatch.setattr(main, "FILTER_BYTE_BUDGET", 400)
+        work_orders, techs = recorded["work_orders"], recorded["technicians"]
+
+        pushed = main.get_labor_tally(work_orders, "labor:", techs, pushdown=True)
+        assert len(labor_api.requests) > 1
+        assert pushed == pytest.approx(
+            main.get_labor_tally(work_orders, "labor:", techs, pushdown=False)
+        )
+
+
+class TestRunBatch:
+    @pytest.fixture
+    def range_api(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "REPORT_FILE_PATH", str(tmp_path / "reports.json"))
+        monkeypatch.setattr(main, "REPORT_DB_PATH", str(tmp_path / "reports.sqlite"))
+        work_orders, job_items = build_range_data()
+        with FakeMethodApi(TECHS, work_orders, job_items) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            yield api
+
+    def api_report(self, report_title):
+        customers, item, exclude, pplh = main.resolve_report_type(report_title, main.report_types)
+        customer_filter = main.generate_customer_filter(customers, exclude=exclude)
+        work_orders = main.get_work_orders_by_range("2025-01-01", "2025-01-20", customer_filter)
+        if pplh:
+            return main.calculate_parts_per_labor_hour(work_orders, TECHS)
+        return main.get_labor_tally(work_orders, item, TECHS, pushdown=False)
+
+    def test_all_types_share_one_fetch(self, range_api):
+        reports = main.run_batch("2025-01-01", "2025-01-20", list(main.report_types))
+        batch_requests = len(range_api.requests)
+
+        range_api.requests.clear()
+        for report_title in main.report_types:
+            self.api_report(report_title)
+        separate_requests = len(range_api.requests)
+
+        assert set(reports) == set(main.report_types)
+        assert batch_requests * 4 < separate_requests
+
+    @pytest.mark.parametrize(
+        "report_title", ["Lost Time", "Rental", "All Internals", "Parts per labor hour"]
+    )
+    def test_matches_single_report(self, range_api, report_title):
+        reports = main.run_batch("2025-01-01", "2025-01-20", [report_title])
+        assert reports[report_title] == pytest.approx(self.api_report(report_title))
+
+    @pytest.mark.parametrize("report_titles, customers, exclude, item_filter", [
+        (["Lost Time"], ("Accurate - Lost Time",), False, "labor:"),
+        (["Lost Time", "Rental"], ("Accurate - Lost Time", "Accurate Rental"), False, "labor:"),
+        (["All Internals"], main.report_types["All Internals"]["customer"], True, "labor:"),
+        (["Lost Time", "All Internals"], (), False, "labor:"),
+        (["Lost Time", "Parts per labor hour"], (), False, None),
+    ])
+    def test_range_filters(self, report_titles, customers, exclude, item_filter):
+        assert main._range_filters(report_titles) == (
+            main.generate_customer_filter(customers, exclude=exclude), item_filter
+        )
+
+    def test_batch_fetches_only_what_its_types_need(self, range_api):
+        main.get_technician_names()
+        main.run_batch("2025-01-01", "2025-01-20", ["Lost Time"])
+
+        listing = [request for request in range_api.requests_to("Activity")
+                   if "filter" in request["params"]]
+        items = range_api.requests_to("ActivityJobItems")
+        assert listing and all("Accurate - Lost Time" in r["params"]["filter"] for r in listing)
+        assert items and all("contains(Item,'labor:')" in r["params"]["filter"] for r in items)
+
+    def test_reports_are_saved(self, range_api):
+        main.run_batch("2025-01-01", "2025-01-20", ["Lost Time", "Rental"])
+        assert [header.name for header in main.get_report_catalog().values()] == [
+            "2025-01-01:2025-01-20::Lost Time", "2025-01-01:2025-01-20::Rental",
+        ]
+
+    @pytest.fixture
+    def failing_chunk(self, range_api, monkeypatch):
+        """The second job item query answers 400"""
+        respond = range_api.respond
+        item_queries = []
+
+        def respond_or_fail(table, params):
+            if table == "ActivityJobItems":
+                item_queries.append(params)
+                if len(item_queries) == 2:
+                    return 400, {"error": "bad filter"}
+            return respond(table, params)
+
+        monkeypatch.setattr(main, "FILTER_BYTE_BUDGET", 300)
+        monkeypatch.setattr(range_api, "respond", respond_or_fail)
+        return item_queries
+
+    @pytest.mark.parametrize("report_title", ["Parts per labor hour", "All Internals"])
+    def test_failed_chunk_fails_the_report(self, range_api, failing_chunk, monkeypatch,
+                                           report_title):
+        monkeypatch.setattr(main, "USE_PIPELINE", False)
+        monkeypatch.setattr(main, "AGGREGATE_PUSHDOWN", False)
+        main.get_technician_names()
+
+        with pytest.raises(ApiError):
+            main.compute_report("2025-01-01", "2025-01-20", report_title, TECHS)
+        assert len(failing_chunk) > 2
+
+    def test_failed_chunk_fails_the_batch(self, range_api, failing_chunk):
+        with pytest.raises(ApiError):
+            main.run_batch("2025-01-01", "2025-01-20", ["Lost Time", "Rental"])
+        assert main.get_report_catalog() == {}
+
+    def test_get_report_prints_api_errors(self, range_api, monkeypatch, capsys):
+        def fail(*args, **kwargs):
+            raise ApiError(500, b"server error", f"{range_api.url}/tables/ActivityJobItems")
+
+        dates = iter(["2025-01-01", "2025-01-20"])
+        monkeypatch.setattr(main, "get_date", lambda date_type: next(dates))
+        monkeypatch.setattr(main, "get_report_type", lambda types: "Lost Time")
+        monkeypatch.setattr(main, "stream_labor_tally", fail)
+        monkeypatch.setattr(main, "USE_PIPELINE", True)
+
+        main.get_report()
+
+        assert "Lost Time report failed: 500 from" in capsys.readouterr().out
+        assert main.get_report_catalog() == {}
+
+    def test_cli_run_command(self, range_api, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("MY_API_KEY", "TEST_KEY")
+        main.main(["--no-cache", "run", "--start", "2025-01-01", "--end", "2025-01-20",
+                   "--types", "Lost Time,Rental"])
+        assert len(main.get_report_catalog()) == 2
 
+    def test_cli_rejects_unknown_type(self):
+        with pytest.raises(SystemExit):
+            main.build_parser().parse_args(
+                ["run", "--start", "2025-01-01", "--end", "2025-01-20", "--types", "Nope"]
+            )
@@ -0,0 +1,172 @@
+import pytest
+
+from labor_report import instrument, main, paging
+from labor_report.paging import KeysetCursor, PageSizer
+from tests.conftest import TECHS, make_work_orders
+from tests.fake_api import FakeMethodApi
+
+
+class TestPageSizer:
+    def test_grows_when_fast_and_shrinks_when_slow(self):
+        sizer = PageSizer()
+        assert [sizer.update(0.1) for _ in range(5)] == [200, 400, 800, 1000, 1000]
+        assert sizer.update(paging.SLOW_PAGE_SECONDS + 1) == 500
+        assert sizer.update(1.0) == 500
+
+    def test_cap(self):
+        sizer = PageSizer(size=400)
+        sizer.cap(250)
+        assert sizer.size == 250 and sizer.update(0.1) == 250
+
+
+class TestKeysetCursor:
+    def test_params(self):
+        cursor = KeysetCursor(
+            {"skip": 0, "top": 100, "select": "Item, Qty", "filter": "a eq 1 or a eq 2"}
+        )
+        first = cursor.next_params()
+        assert first == {"select": "Item, Qty, RecordID", "filter": "a eq 1 or a eq 2",
+                         "orderby": "RecordID", "top": 100}
+
+        cursor.advance([{"RecordID": n} for n in range(1, 101)])
+        assert cursor.next_params()["filter"] == "(a eq 1 or a eq 2) and RecordID gt 100"
+
+    def test_short_page_ends_the_walk(self):
+        cursor = KeysetCursor({})
+        cursor.next_params()
+        cursor.advance([{"RecordID": "7"}])
+        assert cursor.done and cursor.last == "7"
+
+    def test_server_cap_is_not_the_end(self):
+        cursor = KeysetCursor({}, sizer=PageSizer(size=400))
+        cursor.next_params()
+        cursor.advance([{"RecordID": n} for n in range(250)])
+
+        assert not cursor.done
+        assert cursor.next_params()["top"] == 400
+
+        # A second short page of the same length is the server's cap
+        cursor.advance([{"RecordID": n} for n in range(250, 500)])
+        assert not cursor.done
+        assert cursor.next_params()["top"] == 250
+
+    def test_short_last_page_is_not_a_cap(self):
+        cursor = KeysetCursor({})
+        cursor.next_params()
+        cursor.advance([{"RecordID": n} for n in range(100)])
+        assert cursor.next_params()["top"] == 200
+
+        cursor.advance([{"RecordID": n} for n in range(100, 250)])
+        assert not cursor.done
+        assert cursor.next_params()["top"] == 200
+
+        cursor.advance([])
+        assert cursor.done
+        assert cursor.sizer.maximum == paging.MAX_PAGE_SIZE
+
+
+@pytest.fixture
+def deep_api(monkeypatch):
+    work_orders = make_work_orders(1000)
+    job_items = [
+        {"ActivityNo": str(wo), "Item": f"labor:{TECHS[n % 2]}", "Qty": n + 0.5, "Amount": 0}
+        for wo in range(1, 41) for n in range(wo % 5 * 30 + 1)
+    ]
+    with FakeMethodApi(TECHS, work_orders, job_items, offset_cost=1e-4) as api:
+        monkeypatch.setattr(main, "URL", api.url)
+        yield api
+
+
+class TestKeysetPaging:
+    def test_work_orders_match_offset_paging(self, deep_api):
+        by_offset = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "", keyset=False)
+        deep_api.requests.clear()
+        by_key = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "", keyset=True)
+
+        assert by_key == by_offset == list(range(1, 1001))
+        assert not any("skip" in request["params"] for request in deep_api.requests_to("Activity"))
+
+    def test_job_items_match_offset_paging(self, deep_api):
+        deep_api.offset_cost = 0
+        work_orders = list(range(1, 41))
+        by_offset = main.get_all_job_items(work_orders, keyset=False)
+        by_key = main.get_all_job_items(work_orders, keyset=True)
+
+        def key(item):
+            return int(item["ActivityNo"]), item["Qty"]
+
+        assert [
+            {field: item[field] for field in ("ActivityNo", "Item", "Qty", "Amount")}
+            for item in sorted(by_key, key=key)
+        ] == sorted(by_offset, key=key)
+
+        tallies = [
+            main.tally_labor_items(main.get_job_items(work_orders, "labor:", keyset=keyset),
+                                   "labor:", TECHS)
+            for keyset in (True, False)
+        ]
+        assert tallies[0] == pytest.approx(tallies[1])
+
+    def test_pipeline_report_pages_by_key(self, deep_api, monkeypatch):
+        deep_api.offset_cost = 0
+        main.get_technician_names()
+        monkeypatch.setattr(main, "USE_PIPELINE", True)
+        monkeypatch.setattr(main, "AGGREGATE_PUSHDOWN", False)
+        by_offset = main.compute_report("2025-01-01", "2025-02-01", "All Internals", TECHS)
+
+        monkeypatch.setattr(main, "KEYSET_PAGING", True)
+        deep_api.requests.clear()
+        by_key = main.compute_report("2025-01-01", "2025-02-01", "All Internals", TECHS)
+
+        assert by_key == pytest.approx(by_offset)
+        for table in ("Activity", "ActivityJobItems"):
+            pages = deep_api.requests_to(table)
+            assert pages and all(
+                page["params"]["orderby"] == "RecordID" and "skip" not in page["params"]
+                for page in pages
+            )
+            assert any("RecordID gt" in page["params"]["filter"] for page in pages)
+
+    def test_page_size_grows_up_to_the_server_limit(self, monkeypatch):
+        with FakeMethodApi(TECHS, make_work_orders(3000), page_limit=500) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            work_orders = main.get_work_orders_by_range(
+                "2025-01-01", "2025-02-01", "", keyset=True
+            )
+
+        tops = [int(request["params"]["top"]) for request in api.requests_to("Activity")
+                if "top" in request["params"]]
+        assert work_orders == list(range(1, 3001))
+        # The cap is taken after two pages of 500
+        assert tops[:5] == [100, 200, 400, 800, 800]
+        assert set(tops[5:]) == {500}
+
+    def test_range_not_a_multiple_of_the_page_size(self, monkeypatch):
+        with FakeMethodApi(TECHS, make_work_orders(1150), page_limit=1000) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            work_orders = main.get_work_orders_by_range(
+                "2025-01-01", "2025-02-01", "", keyset=True
+            )
+
+        tops = [int(request["params"]["top"]) for request in api.requests_to("Activity")
+                if "top" in request["params"]]
+        assert work_orders == list(range(1, 1151))
+        # 450 rows come back for the last 800, one more request finds no rows
+        assert tops == [100, 200, 400, 800, 800]
+
+    def test_page_latency_stays_flat_with_depth(self, deep_api):
+        def page_seconds(keyset: bool) -> list[float]:
+            recorder = instrument.enable()
+            main.get_work_orders_by_range(
+                "2025-01-01", "2025-02-01", "", max_workers=1, keyset=keyset
+            )
+            instrument.disable()
+            return [request["seconds"] for request in recorder.requests
+                    if request["table"] == "Activity" and "apply" not in request["params"]]
+
+        by_offset = page_seconds(keyset=False)
+        by_key = page_seconds(keyset=True)
+
+        # The last offset page waits on 900 skipped rows, no keyset page does
+        assert by_offset[-1] > by_offset[0] + 0.05
+        assert max(by_key) < by_offset[-1] / 2
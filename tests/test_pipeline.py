@@ -0,0 +1,113 @@
+import pytest
+
+from labor_report import client, main, pipeline
+from labor_report.client import ApiError
+from tests.conftest import make_work_orders
+from tests.fake_api import FakeMethodApi
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(main, "FILTER_BYTE_BUDGET", 400)
+
+
+@pytest.mark.usefixtures("small_chunks")
+class TestStreamLaborTally:
+    @pytest.mark.parametrize("pushdown", [True, False])
+    def test_matches_staged_tally(self, fake_api, pushdown):
+        streamed = main.stream_labor_tally(
+            "2025-01-01", "2025-02-01", "", "labor:", ["Jane Doe", "John Roe"], pushdown=pushdown
+        )
+        work_orders = main.get_work_orders_by_range("2025-01-01", "2025-02-01", "")
+        staged = main.get_labor_tally(
+            work_orders, "labor:", ["Jane Doe", "John Roe"], pushdown=pushdown
+        )
+
+        assert streamed == pytest.approx(staged)
+        assert streamed["Jane Doe"] == pytest.approx(250 * 1.5)
+
+    def test_item_queries_start_before_listing_ends(self, fake_api):
+        main.stream_labor_tally(
+            "2025-01-01", "2025-02-01", "", "labor:", ["Jane Doe"], pushdown=False
+        )
+
+        tables = [request["table"] for request in fake_api.requests]
+        last_listing = len(tables) - 1 - tables[::-1].index("Activity")
+        assert tables.index("ActivityJobItems") < last_listing
+        # No count request, the listing is paged until a short page
+        assert all("apply" not in request["params"] for request in fake_api.requests_to("Activity"))
+
+    def test_listing_is_ordered(self, fake_api):
+        main.stream_labor_tally(
+            "2025-01-01", "2025-02-01", "", "labor:", ["Jane Doe"], pushdown=False
+        )
+
+        listing = fake_api.requests_to("Activity")
+        assert len(listing) > 1
+        assert all(request["params"]["orderby"] == "RecordID" for request in listing)
+
+    def test_falls_back_without_groupby(self, monkeypatch):
+        work_orders = make_work_orders(120)
+        job_items = [
+            {"ActivityNo": str(i), "Item": "labor:Jane Doe", "Qty": 2, "Amount": 0}
+            for i in range(1, 121)
+        ]
+        with FakeMethodApi(["Jane Doe"], work_orders, job_items, supports_groupby=False) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            tally = main.stream_labor_tally(
+                "2025-01-01", "2025-02-01", "", "labor:", ["Jane Doe"], pushdown=True
+            )
+
+        assert tally == {"Jane Doe": 240}
+
+
+    def test_listing_failure_is_not_a_rejected_aggregation(self, fake_api, monkeypatch):
+        monkeypatch.setattr(client, "MAX_RETRIES", 0)
+        respond = fake_api.respond
+        monkeypatch.setattr(
+            fake_api, "respond",
+            lambda table, params: (503, {}) if table == "Activity" else respond(table, params),
+        )
+
+        with pytest.raises(ApiError) as error:
+            main.stream_labor_tally(
+                "2025-01-01", "2025-02-01", "", "labor:", ["Jane Doe"], pushdown=True
+            )
+
+        assert error.value.status_code == 503
+        assert len(fake_api.requests_to("Activity")) == 1
+
+
+class TestPipeline:
+    @pytest.mark.parametrize("max_concurrency", [1, 4])
+    def test_single_slot_queues_do_not_deadlock(self, fake_api, small_chunks, max_concurrency):
+        pages = []
+
+        work_orders = pipeline.run(
+            f"{fake_api.url}/tables/Activity",
+            main._work_order_params("2025-01-01", "2025-02-01", "", "RecordID"),
+            f"{fake_api.url}/tables/ActivityJobItems",
+            lambda chunk: {"filter": chunk},
+            main.FilterChunker(),
+            pages.append,
+            {},
+            max_concurrency=max_concurrency,
+            queue_size=1,
+        )
+
+        assert work_orders == list(range(1, 251))
+        assert sorted(int(row["ActivityNo"]) for page in pages for row in page) == work_orders
+
+    def test_failure_cancels_every_stage(self, fake_api, small_chunks):
+        with pytest.raises(ApiError) as error:
+            pipeline.run(
+                f"{fake_api.url}/tables/Activity",
+                main._work_order_params("2025-01-01", "2025-02-01", "", "RecordID"),
+                f"{fake_api.url}/tables/Nope",
+                lambda chunk: {"filter": chunk},
+                main.FilterChunker(),
+                lambda rows: None,
+                {},
+            )
+
+        assert error.value.status_code == 404
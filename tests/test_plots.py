@@ -1,6 +1,16 @@
+import os
+
 import pytest
 
-from labor_report.plots import _calculate_mean, calculate_stand_dev
+from labor_report import main
+from labor_report.plots import (
+    ChartJob,
+    ChartRenderer,
+    _calculate_mean,
+    calculate_stand_dev,
+    plot_report_data,
+    render_reports,
+)
 
 
 class TestCalculateMean:
@@ -26,4 +36,89 @@ class TestCalculateStandDev:
         assert calculate_stand_dev(test_dict, mean=5) == pytest.approx(1.2910)
 
     def test_calculate_without_mean(self, test_dict):
-        assert calculate_stand_dev(test_dict) == pytest.approx(1.2910)
\ No newline at end of file
+        assert calculate_stand_dev(test_dict) == pytest.approx(1.2910)
+
+@pytest.fixture
+def reports():
+    return (
+        {"Jane Doe": 12.5, "John Roe": 0, "Sam Lee": 7},
+        {"Jane Doe": 3, "John Roe": 9.25, "Sam Lee": 4},
+    )
+
+
+class TestChartRenderer:
+    @pytest.mark.parametrize("suffix, magic", [
+        (".png", b"\x89PNG"), (".svg", b"<?xml"), (".pdf", b"%PDF"),
+    ])
+    def test_formats(self, tmp_path, reports, suffix, magic):
+        path = str(tmp_path / f"chart{suffix}")
+        ChartRenderer().render(ChartJob(path, reports, ["January", "February"]))
+        with open(path, "rb") as f:
+            assert f.read().startswith(magic)
+
+    def test_reuses_one_figure(self, tmp_path, reports):
+        renderer = ChartRenderer()
+        figure, ax = renderer.figure, renderer.ax
+
+        for n in range(3):
+            renderer.render(ChartJob(str(tmp_path / f"{n}.png"), reports[:1], ["Only"]))
+
+        assert renderer.figure is figure and renderer.figure.axes == [ax]
+        # Three bars from the last chart, nothing left over from earlier ones
+        assert len(ax.patches) == 3
+
+    def test_title(self, tmp_path, reports):
+        renderer = ChartRenderer()
+        renderer.render(ChartJob(str(tmp_path / "a.png"), reports, ["A", "B"]))
+        assert renderer.ax.get_title() == "Hours per Technician"
+
+        renderer.render(ChartJob(str(tmp_path / "b.png"), reports, ["A", "B"], title="Rental"))
+        assert renderer.ax.get_title() == "Rental"
+
+    def test_plot_report_data_to_file(self, tmp_path, reports, monkeypatch):
+        import matplotlib.pyplot as plt
+
+        monkeypatch.setattr(plt, "show", lambda: pytest.fail("opened a window"))
+        path = tmp_path / "chart.svg"
+        plot_report_data(*reports, data_labels=["A", "B"], output=str(path))
+        assert path.exists()
+
+
+class TestRenderReports:
+    def test_process_pool(self, tmp_path, reports):
+        jobs = [ChartJob(str(tmp_path / f"{n}.png"), reports, ["A", "B"]) for n in range(4)]
+        assert render_reports(jobs, max_workers=2) == [job.path for job in jobs]
+        assert all((tmp_path / f"{n}.png").stat().st_size > 0 for n in range(4))
+
+    def test_saved_reports_for_a_month(self, tmp_path, monkeypatch, reports):
+        monkeypatch.setattr(main, "REPORT_FILE_PATH", str(tmp_path / "reports.json"))
+        monkeypatch.setattr(main, "REPORT_DB_PATH", str(tmp_path / "reports.sqlite"))
+        main.write_report_to_file(reports[0], "2025-01-01:2025-02-01::Lost Time")
+        main.write_report_to_file(reports[1], "2025-01-01:2025-02-01::Rental")
+        main.write_report_to_file(reports[1], "2025-02-01:2025-03-01::Rental")
+
+        paths = main.plot_saved_reports(
+            "2025-01-01", "2025-02-01", str(tmp_path / "charts"), "pdf", max_workers=1
+        )
+
+        assert sorted(os.path.basename(path) for path in paths) == [
+            "2025-01-01_2025-02-01_Lost Time.pdf", "2025-01-01_2025-02-01_Rental.pdf",
+        ]
+
+    def test_saved_series_report(self, tmp_path, monkeypatch, reports):
+        monkeypatch.setattr(main, "REPORT_FILE_PATH", str(tmp_path / "reports.json"))
+        monkeypatch.setattr(main, "REPORT_DB_PATH", str(tmp_path / "reports.sqlite"))
+        main.write_report_to_file(
+            {"2025-01-01": reports[0], "2025-02-01": reports[1]},
+            "2025-01-01:2025-03-01::Lost Time by month",
+        )
+
+        # The CLI passes every report type when --types is left at "all"
+        paths = main.plot_saved_reports(
+            "2025-01-01", "2025-03-01", str(tmp_path / "charts"), "png",
+            list(main.report_types), max_workers=1,
+        )
+
+        assert [os.path.basename(path) for path in paths] == [
+            "2025-01-01_2025-03-01_Lost Time by month.png"
+        ]
@@ -0,0 +1,89 @@
+import pytest
+
+from labor_report import client, main, ratelimit
+from labor_report.ratelimit import RateGovernor
+from tests.conftest import make_work_orders
+from tests.fake_api import FakeMethodApi
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+
+    def sleep(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(ratelimit.time, "sleep", sleep)
+    return clock
+
+
+class TestRateGovernor:
+    def test_unlimited_until_throttled(self, clock):
+        governor = RateGovernor(clock=clock)
+        assert all(governor.acquire() == 100.0 for _ in range(50))
+        assert governor.rate is None
+
+    def test_retry_after_pauses_every_caller(self, clock):
+        governor = RateGovernor(clock=clock)
+        governor.on_throttle(pause=2.0)
+
+        assert governor.acquire() == pytest.approx(102.0)
+        # Later callers are spaced at the cut rate after the pause
+        assert governor.acquire() == pytest.approx(102.0 + 1 / governor.rate)
+        assert governor.stats().throttles == 1
+        assert governor.stats().waited == pytest.approx(2.0 + 1 / governor.rate)
+
+    def test_token_bucket_spacing(self, clock):
+        governor = RateGovernor(rate=10, clock=clock)
+        sent = [governor.acquire() for _ in range(ratelimit.BURST + 5)]
+
+        assert sent[: ratelimit.BURST] == [100.0] * ratelimit.BURST
+        assert sent[ratelimit.BURST :] == pytest.approx([100.1, 100.2, 100.3, 100.4, 100.5])
+
+    def test_requests_sent_before_a_cut_do_not_cut_again(self, clock):
+        governor = RateGovernor(rate=40, clock=clock)
+        in_flight = [governor.acquire() for _ in range(5)]
+
+        clock.now += 0.5
+        for sent_at in in_flight:
+            governor.on_throttle(sent_at=sent_at)
+        assert governor.rate == pytest.approx(40 * ratelimit.DECREASE)
+
+        governor.on_throttle(sent_at=governor.acquire())
+        assert governor.rate == pytest.approx(40 * ratelimit.DECREASE ** 2)
+        assert governor.throttles == 6
+
+    def test_recovers_on_success(self, clock):
+        governor = RateGovernor(rate=ratelimit.MIN_RATE, clock=clock)
+        for _ in range(10):
+            governor.on_success()
+        assert governor.rate == ratelimit.MIN_RATE + 10 * ratelimit.INCREASE
+
+
+class TestThrottledApi:
+    def test_concurrent_paging_settles_under_the_limit(self, monkeypatch):
+        job_items = [
+            {"ActivityNo": str(i), "Item": "labor:Jane Doe", "Qty": 1, "Amount": 0}
+            for i in range(1, 301)
+        ]
+        with FakeMethodApi(
+            ["Jane Doe"], make_work_orders(300), job_items, rate_limit=100
+        ) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            monkeypatch.setattr(main, "FILTER_BYTE_BUDGET", 200)
+            items = main.get_all_job_items(list(range(1, 301)), raise_errors=True)
+
+        stats = client.governor.stats()
+        assert len(items) == 300
+        assert stats.throttles == api.throttled > 0
+        # Once the rate adapted, most requests went straight through
+        assert api.throttled < len(api.requests) / 2
+        assert stats.rate is not None
@@ -0,0 +1,113 @@
+import pytest
+
+from labor_report import client, main, roster
+from labor_report.client import ApiError
+from tests.fake_api import FakeMethodApi
+
+
+def technician(record_id: int, name: str, modified: str = "2025-01-01T00:00:00") -> dict:
+    return {"RecordID": record_id, "FullName": name, "LastModifiedDate": modified}
+
+
+@pytest.fixture
+def roster_store(tmp_path):
+    roster_store = roster.RosterStore(str(tmp_path / "roster.sqlite"))
+    yield roster_store
+    roster_store.close()
+
+
+@pytest.fixture
+def big_api(monkeypatch):
+    technicians = [technician(n, f"Tech {n:03d}") for n in range(1, 251)]
+    with FakeMethodApi(technicians) as api:
+        monkeypatch.setattr(main, "URL", api.url)
+        yield api
+
+
+class TestFetchTechnicians:
+    def test_pages_past_the_first_hundred(self, big_api):
+        rows = roster.fetch_technicians(big_api.url, {})
+        assert len(rows) == 250
+        assert len(big_api.requests_to("FieldTechnicians")) == 3
+
+
+class TestRefresh:
+    def test_fresh_roster_skips_the_api(self, big_api, roster_store):
+        assert roster.refresh(roster_store, big_api.url, {}, now=1000)
+        requests = len(big_api.requests)
+
+        assert not roster.refresh(roster_store, big_api.url, {}, now=1000 + roster.ROSTER_TTL - 1)
+        assert len(big_api.requests) == requests
+
+    def test_delta_keeps_indexes(self, big_api, roster_store):
+        roster.refresh(roster_store, big_api.url, {}, now=1000)
+        before = roster_store.index()
+
+        big_api.technicians[4] = technician(5, "Tech Renamed", "2025-02-01T00:00:00")
+        big_api.technicians.append(technician(251, "Tech New", "2025-02-01T00:00:00"))
+        roster.refresh(roster_store, big_api.url, {}, now=1000 + roster.ROSTER_TTL)
+
+        delta = big_api.requests_to("FieldTechnicians")[-1]["params"]
+        assert "LastModifiedDate gt '2025-01-01T00:00:00'" in delta["filter"]
+
+        after = roster_store.index()
+        assert after["Tech Renamed"] == before["Tech 005"]
+        assert after["Tech New"] == 250
+        assert "Tech 005" not in after
+        assert len(after) == 251
+
+    def test_falls_back_to_full_refresh(self, monkeypatch, roster_store):
+        with FakeMethodApi(["Jane Doe"], supports_delta=False) as api:
+            roster.refresh(roster_store, api.url, {}, now=1000)
+            api.technicians.append("John Roe")
+            roster.refresh(roster_store, api.url, {}, now=1000 + roster.ROSTER_TTL)
+
+        assert roster_store.names() == ["Jane Doe", "John Roe"]
+        assert not roster_store.supports_delta
+        assert api.requests_to("FieldTechnicians")[-1]["params"]["select"] == "RecordID,FullName"
+
+    def test_table_without_modified_field(self, roster_store):
+        with FakeMethodApi(["Jane Doe"], has_modified_column=False) as api:
+            roster.refresh(roster_store, api.url, {}, now=1000)
+            api.technicians.append("John Roe")
+            api.requests.clear()
+            roster.refresh(roster_store, api.url, {}, now=1000 + roster.ROSTER_TTL)
+
+        assert roster_store.names() == ["Jane Doe", "John Roe"]
+        assert not roster_store.supports_delta
+        assert len(api.requests_to("FieldTechnicians")) == 1
+
+    def test_full_refresh_drops_removed_technicians(self, big_api, roster_store):
+        roster.refresh(roster_store, big_api.url, {}, now=1000)
+        del big_api.technicians[0]
+        roster.refresh(roster_store, big_api.url, {}, now=1000 + roster.FULL_REFRESH_AGE)
+
+        assert "Tech 001" not in roster_store.index()
+        assert roster_store.index()["Tech 002"] == 0
+
+
+class TestGetTechnicianRoster:
+    def test_reuses_stored_roster(self, fake_api):
+        assert main.get_technician_roster() == {"Jane Doe": 0, "John Roe": 1}
+        assert main.get_technician_names() == ["Jane Doe", "John Roe"]
+        assert len(fake_api.requests_to("FieldTechnicians")) == 1
+
+    def test_failed_refresh_uses_stored_roster(self, fake_api, monkeypatch):
+        main.get_technician_roster()
+        monkeypatch.setattr(client, "MAX_RETRIES", 0)
+        fake_api.inject(503)
+
+        assert main.get_technician_roster(refresh=True) == {"Jane Doe": 0, "John Roe": 1}
+
+    def test_failed_refresh_without_stored_roster(self, fake_api, monkeypatch):
+        monkeypatch.setattr(client, "MAX_RETRIES", 0)
+        fake_api.inject(503)
+
+        with pytest.raises(ApiError):
+            main.get_technician_roster()
+
+    def test_refresh_flag(self, fake_api, monkeypatch):
+        main.get_technician_roster()
+        monkeypatch.setattr(main, "REFRESH_ROSTER", True)
+        main.get_technician_roster()
+        assert len(fake_api.requests_to("FieldTechnicians")) == 2
@@ -0,0 +1,102 @@
+import pytest
+
+from labor_report import main, series
+from labor_report.plots import ChartJob, ChartRenderer
+from tests.conftest import TECHS, build_range_data
+from tests.fake_api import FakeMethodApi
+
+
+class TestBuckets:
+    @pytest.mark.parametrize("bucket, expected", [
+        ("day", "2025-01-15"), ("week", "2025-01-13"), ("month", "2025-01-01"),
+    ])
+    def test_bucket_start(self, bucket, expected):
+        assert series.bucket_start("2025-01-15T10:00:00", bucket) == expected
+
+    def test_unknown_bucket(self):
+        with pytest.raises(ValueError):
+            series.bucket_start("2025-01-15", "year")
+
+    def test_ranges_are_clipped(self):
+        assert series.bucket_ranges("2024-11-15", "2025-02-10", "month") == [
+            ("2024-11-15", "2024-12-01"), ("2024-12-01", "2025-01-01"),
+            ("2025-01-01", "2025-02-01"), ("2025-02-01", "2025-02-10"),
+        ]
+        assert series.bucket_ranges("2025-01-01", "2025-01-14", "week") == [
+            ("2025-01-01", "2025-01-06"), ("2025-01-06", "2025-01-13"),
+            ("2025-01-13", "2025-01-14"),
+        ]
+
+    def test_base_report_type(self):
+        assert series.base_report_type(series.series_report_type("Lost Time", "week")) == (
+            "Lost Time"
+        )
+        assert series.base_report_type("Lost Time") == "Lost Time"
+
+    def test_split_keeps_empty_buckets(self):
+        records = [{"RecordID": 1, "ActualCompletedDate": "2025-01-02T08:00:00"}]
+        assert series.split_records(records, "2025-01-01", "2025-01-04", "day") == {
+            "2025-01-01": [], "2025-01-02": records, "2025-01-03": [],
+        }
+
+
+class TestRunSeries:
+    @pytest.fixture
+    def range_api(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "REPORT_FILE_PATH", str(tmp_path / "reports.json"))
+        monkeypatch.setattr(main, "REPORT_DB_PATH", str(tmp_path / "reports.sqlite"))
+        work_orders, job_items = build_range_data()
+        with FakeMethodApi(TECHS, work_orders, job_items) as api:
+            monkeypatch.setattr(main, "URL", api.url)
+            yield api
+
+    def test_one_fetch_for_every_bucket(self, range_api):
+        titles = ["Lost Time", "Parts per labor hour"]
+        main.get_technician_names()
+        range_api.requests.clear()
+
+        reports = main.run_series("2025-01-01", "2025-01-20", titles, "week")
+        series_requests = len(range_api.requests)
+
+        weeks = reports["Lost Time"]
+        assert list(weeks) == ["2025-01-01", "2025-01-06", "2025-01-13"]
+
+        range_api.requests.clear()
+        main.run_batch("2025-01-01", "2025-01-20", titles)
+        assert series_requests == len(range_api.requests)
+
+        # Every bucket matches a report over just its own dates
+        week = main.run_batch("2025-01-06", "2025-01-13", titles)
+        assert reports["Lost Time"]["2025-01-06"] == pytest.approx(week["Lost Time"])
+        assert reports["Parts per labor hour"]["2025-01-06"] == pytest.approx(
+            week["Parts per labor hour"]
+        )
+
+    def test_saved_as_one_series_report(self, range_api):
+        main.run_series("2025-01-01", "2025-01-20", ["Rental"], "month")
+
+        report = main.load_report("2025-01-01:2025-01-20::Rental by month")
+        assert series.is_series(report)
+        assert list(report) == ["2025-01-01"]
+
+    def test_cli(self):
+        args = main.build_parser().parse_args(
+            ["run", "--start", "2025-01-01", "--end", "2025-07-01", "--bucket", "month"]
+        )
+        assert args.bucket == "month"
+
+
+class TestSeriesChart:
+    def test_one_line_per_technician(self, tmp_path):
+        report = {
+            "2025-01-01": {"Jane Doe": 4, "John Roe": 2},
+            "2025-02-01": {"Jane Doe": 6, "John Roe": 0},
+            "2025-03-01": {"Jane Doe": 5, "John Roe": 3},
+        }
+        renderer = ChartRenderer()
+        renderer.render(ChartJob(str(tmp_path / "series.png"), (report,), ["Lost Time"]))
+
+        lines = renderer.ax.get_lines()
+        assert [line.get_label() for line in lines] == ["Jane Doe", "John Roe"]
+        assert list(lines[0].get_ydata()) == [4, 6, 5]
+        assert renderer.ax.get_title() == "Hours per Technician over time"
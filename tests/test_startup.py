@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from labor_report import store
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# Seconds to import main and run a storage-only action. Importing the
+# plotting stack alone takes longer than this
+STARTUP_BUDGET = 0.6
+HEAVY_MODULES = ("matplotlib", "numpy", "requests", "asyncio", "dotenv")
+
+PROBE = """
+import json, sys, time
+
+started = time.perf_counter()
+from labor_report import main
+imported = time.perf_counter() - started
+
+main.REPORT_DB_PATH, main.REPORT_FILE_PATH, action = sys.argv[1:4]
+if action:
+    getattr(main, action)()
+
+print(json.dumps({
+    "import": imported,
+    "total": time.perf_counter() - started,
+    "heavy": sorted(name for name in %r if name in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def probe(tmp_path, action: str = "", stdin: str = "") -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, str(tmp_path / "reports.sqlite"),
+         str(tmp_path / "reports.json"), action],
+        input=stdin, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": str(SRC)},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture
+def saved_report(tmp_path):
+    report_store = store.ReportStore(str(tmp_path / "reports.sqlite"))
+    report_store.save("2025-01-01:2025-02-01::Lost Time", {"Jane Doe": 4.5})
+    report_store.close()
+
+
+class TestStartup:
+    def test_import_loads_no_heavy_dependencies(self, tmp_path):
+        result = probe(tmp_path)
+        assert result["heavy"] == []
+        assert result["import"] < STARTUP_BUDGET
+
+    @pytest.mark.parametrize("action", ["list_report", "delete_report"])
+    def test_storage_actions(self, tmp_path, saved_report, action):
+        result = probe(tmp_path, action, stdin="1\n")
+        assert result["heavy"] == []
+        assert result["total"] < STARTUP_BUDGET
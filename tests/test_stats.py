@@ -0,0 +1,119 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from labor_report import main, stats
+
+
+def loop_mean(data_set: dict, ignore_zero=True) -> float:
+    """The pure Python mean stats has to agree with"""
+    values = [value for value in data_set.values() if value > 0 or not ignore_zero]
+    return sum(values) / len(values) if values else 0
+
+
+def loop_std(data_set: dict, mean: float) -> float:
+    total = sum((value - mean) ** 2 for value in data_set.values())
+    return round(math.sqrt(total / len(data_set)), 4)
+
+
+@pytest.fixture
+def reports():
+    return [
+        {"Jane Doe": 12.5, "John Roe": 0, "Sam Lee": 7},
+        {"Jane Doe": 3, "Sam Lee": 4, "Ann Bay": 2},
+        {"Jane Doe": 6, "John Roe": 9.25, "Sam Lee": 4, "Ann Bay": 0},
+    ]
+
+
+class TestAlign:
+    def test_missing_technicians_are_nan(self, reports):
+        matrix = stats.align(reports, ["Jan", "Feb", "Mar"])
+
+        assert matrix.techs == ["Jane Doe", "John Roe", "Sam Lee", "Ann Bay"]
+        assert matrix.labels == ["Jan", "Feb", "Mar"]
+        assert matrix.values.shape == (4, 3)
+        assert np.isnan(matrix.values[1, 1]) and np.isnan(matrix.values[3, 0])
+        assert matrix.values[1, 2] == 9.25
+
+
+class TestPerReport:
+    def test_matches_the_loops_for_random_reports(self):
+        rng = random.Random(7)
+        names = [f"Tech {i}" for i in range(30)]
+        reports = [
+            {name: rng.choice([0, 0, rng.uniform(0, 40)]) for name in rng.sample(names, 20)}
+            for _ in range(25)
+        ]
+        values = stats.align(reports).values
+
+        means = stats.mean(values)
+        assert means == pytest.approx([loop_mean(report) for report in reports])
+        assert stats.mean(values, ignore_zero=False) == pytest.approx(
+            [loop_mean(report, ignore_zero=False) for report in reports]
+        )
+        assert stats.std(values) == pytest.approx(
+            [loop_std(report, loop_mean(report)) for report in reports]
+        )
+
+    def test_all_zero_report(self):
+        values = stats.align([{"A": 0, "B": 0}]).values
+        assert stats.mean(values).tolist() == [0]
+        assert stats.std(values).tolist() == [0]
+
+
+class TestCompare:
+    def test_per_technician(self, reports):
+        comparison = stats.compare(reports, ["Jan", "Feb", "Mar"])
+        jane, john, sam, ann = range(4)
+
+        assert comparison.mean[jane] == pytest.approx((12.5 + 3 + 6) / 3)
+        # John is missing in Feb, his 0 only counts when zeros do
+        assert comparison.mean[john] == pytest.approx(9.25)
+        assert comparison.mean_with_zeros[john] == pytest.approx(9.25 / 2)
+        assert comparison.std[ann] == pytest.approx(loop_std({"Feb": 2, "Mar": 0}, 2))
+        assert comparison.percentiles[:, sam] == pytest.approx([4, 6.4])
+
+        assert comparison.deltas[jane] == pytest.approx([-9.5, 3])
+        assert np.isnan(comparison.deltas[john]).tolist() == [True, True]
+        assert comparison.z_scores[jane, 0] == pytest.approx(
+            (12.5 - comparison.mean[jane]) / comparison.std[jane], abs=1e-3
+        )
+        assert np.isnan(comparison.z_scores[ann, 0])
+
+    def test_flat_technician_has_zero_z_scores(self):
+        comparison = stats.compare([{"A": 5}, {"A": 5}])
+        assert comparison.z_scores.tolist() == [[0, 0]]
+
+    def test_no_reports(self):
+        comparison = stats.compare([])
+        assert comparison.techs == [] and comparison.values.shape == (0, 0)
+
+
+class TestCompareSavedReports:
+    def test_table_over_periods(self, tmp_path, monkeypatch, reports, capsys):
+        monkeypatch.setattr(main, "REPORT_FILE_PATH", str(tmp_path / "reports.json"))
+        monkeypatch.setattr(main, "REPORT_DB_PATH", str(tmp_path / "reports.sqlite"))
+        # Saved out of order, compared in period order
+        main.write_report_to_file(reports[2], "2025-03-01:2025-04-01::Lost Time")
+        main.write_report_to_file(reports[0], "2025-01-01:2025-02-01::Lost Time")
+        main.write_report_to_file(reports[1], "2025-02-01:2025-03-01::Lost Time")
+        main.write_report_to_file(reports[1], "2025-02-01:2025-03-01::Rental")
+
+        comparison = main.compare_saved_reports("2025-01-01", "2025-04-01", "Lost Time")
+
+        assert comparison.labels == ["2025-01-01", "2025-02-01", "2025-03-01"]
+        assert comparison.values[0].tolist() == [12.5, 3, 6]
+        assert "Lost Time, 3 report(s)" in capsys.readouterr().out
+
+    def test_parser(self):
+        args = main.build_parser().parse_args(
+            ["compare", "--start", "2025-01-01", "--end", "2025-04-01", "--type", "Lost Time"]
+        )
+        assert args.type == "Lost Time"
+
+        with pytest.raises(SystemExit):
+            main.build_parser().parse_args(
+                ["compare", "--start", "2025-01-01", "--end", "2025-04-01", "--type", "all"]
+            )
@@ -0,0 +1,139 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from labor_report import main
+from labor_report.store import ReportStore, split_report_name
+
+
+@pytest.fixture
+def report_store(tmp_path):
+    opened = ReportStore(str(tmp_path / "reports.sqlite"))
+    yield opened
+    opened.close()
+
+
+class TestReportStore:
+    def test_save_get_delete(self, report_store):
+        report_store.save("2025-01-01:2025-02-01::Lost Time", {"Jane Doe": 4.5})
+        assert report_store.get("2025-01-01:2025-02-01::Lost Time") == {"Jane Doe": 4.5}
+
+        assert report_store.delete("2025-01-01:2025-02-01::Lost Time")
+        assert report_store.get("2025-01-01:2025-02-01::Lost Time") is None
+        assert not report_store.delete("2025-01-01:2025-02-01::Lost Time")
+
+    def test_overwrite_keeps_menu_position(self, report_store):
+        report_store.save("2025-01-01:2025-02-01::Lost Time", {"A": 1})
+        report_store.save("2025-02-01:2025-03-01::Lost Time", {"A": 2})
+        report_store.save("2025-01-01:2025-02-01::Lost Time", {"A": 3})
+
+        assert [header.name for header in report_store.catalog()] == [
+            "2025-01-01:2025-02-01::Lost Time", "2025-02-01:2025-03-01::Lost Time",
+        ]
+        assert report_store.get("2025-01-01:2025-02-01::Lost Time") == {"A": 3}
+
+    def test_find_by_indexed_columns(self, report_store):
+        report_store.save("2025-01-01:2025-02-01::Lost Time", {})
+        report_store.save("2025-01-01:2025-02-01::Rental", {})
+        report_store.save("2025-03-01:2025-04-01::Rental", {})
+
+        assert report_store.find(report_type="Rental") == [
+            "2025-01-01:2025-02-01::Rental", "2025-03-01:2025-04-01::Rental",
+        ]
+        assert report_store.find(start="2025-02-01") == ["2025-03-01:2025-04-01::Rental"]
+        assert report_store.find(end="2025-02-01", report_type="Lost Time") == [
+            "2025-01-01:2025-02-01::Lost Time"
+        ]
+
+    def test_split_report_name(self):
+        name = main.create_report_name("2025-01-01", "2025-02-01", "All Internals")
+        assert split_report_name(name) == ("2025-01-01", "2025-02-01", "All Internals")
+
+
+class TestJsonMigration:
+    def test_imports_json_once(self, tmp_path):
+        json_path = tmp_path / "reports.json"
+        reports = {
+            "2025-01-01:2025-02-01::Lost Time": {"Jane Doe": 1},
+            "2025-02-01:2025-03-01::Rental": {"Jane Doe": 2},
+        }
+        json_path.write_text(json.dumps(reports, indent=4))
+
+        report_store = ReportStore(str(tmp_path / "reports.sqlite"), str(json_path))
+        assert {name: report_store.get(name) for name in reports} == reports
+        assert not json_path.exists()
+        assert os.path.exists(f"{json_path}.migrated")
+
+        report_store.delete("2025-01-01:2025-02-01::Lost Time")
+        report_store.close()
+
+        reopened = ReportStore(str(tmp_path / "reports.sqlite"), str(json_path))
+        assert [header.name for header in reopened.catalog()] == [
+            "2025-02-01:2025-03-01::Rental"
+        ]
+        reopened.close()
+
+
+class TestReportCatalog:
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "REPORT_FILE_PATH", str(tmp_path / "reports.json"))
+        return str(tmp_path / "reports.sqlite")
+
+    def test_catalog_lists_headers(self, db_path):
+        main.write_report_to_file({"Jane Doe": 3}, "2025-01-01:2025-02-01::Lost Time", db_path)
+        catalog = main.get_report_catalog(db_path)
+
+        assert list(catalog) == [0]
+        assert catalog[0].name == "2025-01-01:2025-02-01::Lost Time"
+        assert (catalog[0].start, catalog[0].end, catalog[0].report_type) == (
+            "2025-01-01", "2025-02-01", "Lost Time"
+        )
+        assert catalog[0].size == len(json.dumps({"Jane Doe": 3}))
+        assert main.load_report(catalog[0].name, db_path) == {"Jane Doe": 3}
+
+    def test_size_follows_the_saved_body(self, db_path):
+        main.write_report_to_file({"Jane Doe": 3}, "2025-01-01:2025-02-01::Lost Time", db_path)
+        body = {"Jane Doe": 3, "Jos\u00e9 P\u00e9rez": 4}
+        main.write_report_to_file(body, "2025-01-01:2025-02-01::Lost Time", db_path)
+
+        assert main.get_report_catalog(db_path)[0].size == len(json.dumps(body).encode())
+
+    def test_sizes_filled_in_for_older_stores(self, db_path):
+        connection = sqlite3.connect(db_path)
+        connection.execute(
+            "CREATE TABLE reports (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, "
+            "start TEXT NOT NULL, end TEXT NOT NULL, report_type TEXT NOT NULL, "
+            "body TEXT NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO reports (name, start, end, report_type, body) VALUES (?, ?, ?, ?, ?)",
+            ("2025-01-01:2025-02-01::Lost Time", "2025-01-01", "2025-02-01", "Lost Time",
+             json.dumps({"Jane Doe": 3})),
+        )
+        connection.commit()
+        connection.close()
+
+        assert main.get_report_catalog(db_path)[0].size == len(json.dumps({"Jane Doe": 3}))
+
+    def test_catalog_does_not_load_bodies(self, db_path, monkeypatch):
+        main.write_report_to_file({"Jane Doe": 3}, "2025-01-01:2025-02-01::Lost Time", db_path)
+        monkeypatch.setattr(json, "loads", lambda *args, **kwargs: pytest.fail("body parsed"))
+        assert len(main.get_report_catalog(db_path)) == 1
+
+    def test_catalog_cached_until_store_changes(self, db_path, monkeypatch):
+        main.write_report_to_file({}, "2025-01-01:2025-02-01::Lost Time", db_path)
+        first = main.get_report_catalog(db_path)
+
+        calls = []
+        original = ReportStore.catalog
+        monkeypatch.setattr(ReportStore, "catalog", lambda self: calls.append(1) or original(self))
+
+        assert main.get_report_catalog(db_path) == first
+        assert calls == []
+
+        main.write_report_to_file({}, "2025-02-01:2025-03-01::Rental", db_path)
+        assert len(main.get_report_catalog(db_path)) == 2
+        assert calls == [1]
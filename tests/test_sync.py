@@ -0,0 +1,85 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from labor_report import main, sync
+from tests.conftest import TECHS, build_range_data
+from tests.fake_api import FakeMethodApi
+
+
+@pytest.fixture
+def sync_api(monkeypatch):
+    work_orders, job_items = build_range_data()
+    with FakeMethodApi(TECHS, work_orders, job_items) as api:
+        monkeypatch.setattr(main, "URL", api.url)
+        yield api
+
+
+@pytest.fixture
+def store(tmp_path):
+    sync_store = sync.SyncStore(str(tmp_path / "sync.sqlite"))
+    yield sync_store
+    sync_store.close()
+
+
+def api_report(start, end, report_title):
+    customers, item, exclude, pplh = main.resolve_report_type(report_title, main.report_types)
+    customer_filter = main.generate_customer_filter(customers, exclude=exclude)
+    work_orders = main.get_work_orders_by_range(start, end, customer_filter)
+    if pplh:
+        return main.calculate_parts_per_labor_hour(work_orders, TECHS)
+    return main.get_labor_tally(work_orders, item, TECHS, pushdown=False)
+
+
+class TestSyncedReports:
+    @pytest.mark.parametrize(
+        "report_title", ["Lost Time", "Rental", "All Internals", "Parts per labor hour"]
+    )
+    def test_matches_api_report(self, sync_api, store, report_title):
+        expected = api_report("2025-01-03", "2025-01-15", report_title)
+        synced = main.get_synced_report("2025-01-03", "2025-01-15", report_title, TECHS, store)
+        assert synced == pytest.approx(expected)
+        assert any(synced.values())
+
+    def test_closed_range_is_fetched_once(self, sync_api, store):
+        main.get_synced_report("2025-01-01", "2025-01-10", "Lost Time", TECHS, store)
+        request_count = len(sync_api.requests)
+
+        main.get_synced_report("2025-01-01", "2025-01-10", "Rental", TECHS, store)
+        assert len(sync_api.requests) == request_count
+
+    def test_only_missing_days_are_fetched(self, sync_api, store):
+        main.sync_range("2025-01-01", "2025-01-10", store)
+        sync_api.requests.clear()
+
+        main.sync_range("2025-01-01", "2025-01-12", store)
+        filters = [r["params"].get("filter", r["params"].get("apply", ""))
+                   for r in sync_api.requests_to("Activity")]
+        assert filters and all("2025-01-10" in text and "2025-01-12" in text for text in filters)
+
+
+class TestStaleRanges:
+    def test_unsynced_days_are_grouped(self, store):
+        store.replace_days("2025-01-03", "2025-01-05", [], [])
+        assert store.stale_ranges("2025-01-01", "2025-01-08") == [
+            ("2025-01-01", "2025-01-03"), ("2025-01-05", "2025-01-08"),
+        ]
+
+    def test_open_days_go_stale(self, store):
+        synced_at = datetime(2025, 1, 6).timestamp()
+        store.replace_days("2025-01-05", "2025-01-06", [], [], now=synced_at)
+
+        assert store.stale_ranges("2025-01-05", "2025-01-06", now=synced_at + 60) == []
+        assert store.stale_ranges("2025-01-05", "2025-01-06", now=time.time()) == [
+            ("2025-01-05", "2025-01-06")
+        ]
+
+    def test_resync_replaces_rows(self, store):
+        record = {"RecordID": 1, "ActualCompletedDate": "2025-01-05T10:00:00",
+                  "EntityCompanyName": "Acme", "ContactsName": "Acme"}
+        item = {"ActivityNo": "1", "Item": "labor:Jane Doe", "Qty": 1, "Amount": 0}
+
+        store.replace_days("2025-01-05", "2025-01-06", [record], [item])
+        store.replace_days("2025-01-05", "2025-01-06", [record], [item, item])
+        assert len(store.job_items("2025-01-01", "2025-02-01")) == 2